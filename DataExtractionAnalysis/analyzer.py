@@ -16,7 +16,7 @@ class EDAResult:
 class Analyzer:
     def basic_profile(self, df: pd.DataFrame, time_col: str) -> EDAResult:
         if ptypes.is_datetime64_any_dtype(df[time_col]):
-            ts_sec = df[time_col].view('int64') / 1e9
+            ts_sec = pd.Series(df[time_col].to_numpy(dtype='datetime64[ns]').view('int64') / 1e9)
         else:
             ts_sec = pd.to_numeric(df[time_col], errors='coerce')
         if len(ts_sec) < 2:
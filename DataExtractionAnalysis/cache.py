@@ -0,0 +1,124 @@
+# Content-addressed, on-disk cache in front of DBExtractor.load_window.
+# A window is keyed by a hash of everything that defines the query except its end
+# (DB URL, table, time/axis columns, axes, schema mode, pivot policy, train_start).
+# Each entry is a list of Parquet parts covering [train_start, end); asking for a later
+# train_end fetches only the new tail from the DB and appends it as another part.
+# Entries are evicted least-recently-used once the cache exceeds `max_bytes`.
+# Each load_window holds an inter-process lock on the cache dir from reading the index to writing
+# it back, so concurrent runs sharing the dir neither lose index entries nor evict parts another
+# run is reading (runs on the same cache dir extract one at a time).
+# Resampled windows are keyed with their end as well: the last bucket of a shorter window is
+# partial, so such entries are never extended or truncated.
+
+from pathlib import Path
+from typing import Sequence
+import hashlib, json, os, time, uuid
+import pandas as pd
+import pandas.api.types as ptypes
+
+from ModelRegistry.publish import FileLock
+
+class ExtractionCache:
+    """Size-bounded LRU cache of extracted windows stored as Parquet parts.
+    Wraps a DBExtractor and exposes the same `load_window` signature."""
+    def __init__(self, extractor, root_dir: str, max_bytes: int = 2 * 1024**3):
+        self.extractor = extractor
+        self.root = Path(root_dir)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.index_path = self.root / "index.json"
+
+    def load_window(self, table: str, time_col: str, axes: Sequence,
+                    start_val, end_val, **kwargs) -> pd.DataFrame:
+        """Same contract as DBExtractor.load_window, served from the cache where possible."""
+        with FileLock(self.root / ".lock"):
+            return self._load_window(table, time_col, axes, start_val, end_val, kwargs)
+
+    def _load_window(self, table: str, time_col: str, axes: Sequence, start_val, end_val,
+                     kwargs: dict) -> pd.DataFrame:
+        extractor = self.extractor
+        key = self.key(table, time_col, axes, start_val, kwargs, end_val)
+        index = self._read_index()
+        entry = index.get(key)
+        if entry is not None and not all((self.root / p["file"]).exists() for p in entry["parts"]):
+            entry = None  # parts removed behind our back → refetch
+
+        if entry is None:
+            df = extractor.load_window(table, time_col, axes, start_val, end_val, **kwargs)
+            entry = {"start": start_val, "end": end_val, "parts": [], "columns_name": df.columns.name}
+            self._append_part(key, entry, df)
+        else:
+            parts = [pd.read_parquet(self.root / p["file"]) for p in entry["parts"]]
+            df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+            if self._after(end_val, entry["end"]):
+                # Only the tail beyond the cached end goes to the DB
+                tail = extractor.load_window(table, time_col, axes, entry["end"], end_val, **kwargs)
+                self._append_part(key, entry, tail)
+                entry["end"] = end_val
+                df = pd.concat([df, tail], ignore_index=True)
+            elif self._after(entry["end"], end_val):
+                df = df[df[time_col] < self._bound(df[time_col], end_val)].reset_index(drop=True)
+            df.columns.name = entry.get("columns_name")  # not kept by Parquet
+
+        entry["last_used"] = time.time()
+        index[key] = entry
+        self._evict(index, keep=key)
+        self._write_index(index)
+        return df
+
+    def key(self, table: str, time_col: str, axes: Sequence, start_val, kwargs: dict, end_val=None) -> str:
+        """Hash of the query parameters and schema mode (train_end excluded unless resampled, see module notes)."""
+        params = {
+            "url": str(self.extractor.engine.url), "table": table, "time_col": time_col,
+            "axes": list(axes), "mode": self.extractor._schema_mode(axes), "start": start_val,
+            **{k: v for k, v in sorted(kwargs.items()) if k not in ("chunksize", "pushdown")},
+        }
+        if kwargs.get("resample_seconds"):
+            params["end"] = end_val
+        return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+    # ---- storage -------------------------------------------------------------------------
+
+    def _append_part(self, key: str, entry: dict, df: pd.DataFrame) -> None:
+        name = f"{key}-{uuid.uuid4().hex[:8]}.parquet"
+        df.to_parquet(self.root / name, index=False)
+        entry["parts"].append({"file": name, "bytes": (self.root / name).stat().st_size})
+
+    def _evict(self, index: dict, keep: str) -> None:
+        total = sum(p["bytes"] for e in index.values() for p in e["parts"])
+        for key in sorted(index, key=lambda k: index[k].get("last_used", 0)):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            for p in index.pop(key)["parts"]:
+                (self.root / p["file"]).unlink(missing_ok=True)
+                total -= p["bytes"]
+
+    def _read_index(self) -> dict:
+        if not self.index_path.exists():
+            return {}
+        with open(self.index_path) as f:
+            return json.load(f)
+
+    def _write_index(self, index: dict) -> None:
+        tmp = self.index_path.with_suffix(f".{uuid.uuid4().hex[:8]}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(index, f, indent=2, default=str)
+        os.replace(tmp, self.index_path)
+
+    # ---- window bounds -------------------------------------------------------------------
+
+    @staticmethod
+    def _after(a, b) -> bool:
+        """a > b for numeric or ISO-string bounds."""
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+            return a > b
+        return pd.Timestamp(a) > pd.Timestamp(b)
+
+    @staticmethod
+    def _bound(ts: pd.Series, v):
+        """Window bound in the dtype of the time column (WIDE reads parse float ts as datetimes)."""
+        if ptypes.is_datetime64_any_dtype(ts):
+            return pd.to_datetime(v, unit="s") if isinstance(v, (int, float)) else pd.Timestamp(v)
+        return v
@@ -1,76 +1,319 @@
 from dataclasses import dataclass
-from typing import List, Sequence
+from typing import Iterator, List, Sequence
 import os
-import pandas as pd
-from sqlalchemy import create_engine
+import numpy as np, pandas as pd
+import pandas.api.types as ptypes
+from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 
+from DataExtractionAnalysis.pivot import LongPivot
+from DataPreparation.resample import GRID_EPS, RESAMPLE_AGGS, grid_buckets
+
 @dataclass
 class DBConfig:
     """Configuration to locate the DB URL in environment variables."""
     url_env: str
 
+_ENGINES: dict = {}  # DB URL → Engine, shared by every DBExtractor in this process
+
+def pooled_engine(url: str):
+    """One SQLAlchemy engine (and connection pool) per DB URL per process, so repeated
+    extractions (e.g. batch jobs in one worker) reuse connections instead of reopening them."""
+    engine = _ENGINES.get(url)
+    if engine is None:
+        engine = _ENGINES[url] = create_engine(url)
+    return engine
+
+if hasattr(os, "register_at_fork"):
+    # Pooled connections must not be shared with a forked child; it opens its own
+    os.register_at_fork(after_in_child=_ENGINES.clear)
+
 class DBExtractor:
     """Loads a time window of data from a relational DB using SQLAlchemy.
     Supports both WIDE and LONG schemas.
 
     - WIDE:  time_col + axes columns (e.g., axis1..axis8)
-    - LONG:  time_col, axis_id_col, value_col  → pivoted to WIDE in pandas
+    - LONG:  time_col, axis_id_col, value_col  → pivoted to WIDE incrementally (LongPivot)
+
+    Window bounds and axis ids are bound parameters (`sqlalchemy.text`), so the DB can reuse
+    plans across windows. Resampling, zero/NULL filtering and the LONG pivot are pushed into the
+    SQL on dialects listed in PUSHDOWN_DIALECTS; elsewhere the same result is computed in pandas.
+    `rows_read` / `bytes_read` count what came back from the DB (result frames as received).
     """
+    LONG_CHUNKSIZE = 200_000  # rows per LONG chunk when no chunksize is configured
+    # Dialects with a known time-bucket expression (floor of epoch seconds / step)
+    PUSHDOWN_DIALECTS = ("sqlite", "postgresql", "duckdb", "mysql", "mariadb")
+
     def __init__(self, cfg: DBConfig):
         load_dotenv()
         url = os.getenv(cfg.url_env)
         if not url:
             raise RuntimeError(f"Environment variable {cfg.url_env} is not set.")
-        self.engine = create_engine(url)
+        self.engine = pooled_engine(url)
+        self.rows_read = 0
+        self.bytes_read = 0
 
     def load_window(self, table: str, time_col: str, axes: Sequence,
                     start_val, end_val,
                     axis_id_col: str | None = None,
-                    value_col: str | None = None) -> pd.DataFrame:
+                    value_col: str | None = None,
+                    chunksize: int | None = None,
+                    duplicates: str = "raise",
+                    missing: str = "nan",
+                    resample_seconds: float | None = None,
+                    agg: str = "mean",
+                    drop_zeros: bool = False,
+                    pushdown: bool = True) -> pd.DataFrame:
         """Load a time slice.
         If `axes` are strings → treat as WIDE schema.
         If `axes` are numbers → treat as LONG schema and pivot to WIDE.
         `start_val` / `end_val` may be numeric (for float ts) or ISO strings (for TIMESTAMP).
+        `chunksize` reads the window through `iter_window` (server-side cursor where supported)
+        instead of one buffered result set. LONG windows are always streamed into a `LongPivot`;
+        `duplicates` / `missing` select its policy for repeated or absent (ts, axis_id) pairs.
+
+        `resample_seconds` aggregates values (`agg`: one of RESAMPLE_AGGS) into the buckets of
+        `grid_buckets` (floor(epoch_seconds / step), anchored at 0), one row per non-empty bucket,
+        stamped with the bucket start. LONG rows are pivoted first (so `duplicates` applies per raw
+        timestamp) and `missing="drop"` removes buckets (not raw timestamps) lacking an axis.
+        `drop_zeros` treats exact zeros (and NULLs) as missing before aggregation/pivoting.
+        With `pushdown` (default) all of this runs in the DB when `can_push_down` allows it; the
+        result is the same frame either way (timestamps holding only other axis ids included).
         """
-        # Detect schema mode from the type of `axes` entries
-        wide_mode = all(isinstance(a, str) for a in axes)
-        long_mode = all(isinstance(a, (int, float)) for a in axes)
+        if resample_seconds is not None and not resample_seconds > 0:
+            raise ValueError(f"resample_seconds must be positive, got {resample_seconds!r}.")
+        if agg not in RESAMPLE_AGGS:
+            raise ValueError(f"agg must be one of {RESAMPLE_AGGS}, got {agg!r}.")
+        long_mode = self._schema_mode(axes) == "long"
+        if pushdown and self.can_push_down(long_mode, resample_seconds, agg, duplicates):
+            return self._load_pushed(table, time_col, axes, start_val, end_val, axis_id_col, value_col,
+                                     chunksize, missing, resample_seconds, agg, drop_zeros)
 
-        if wide_mode:
-            cols = ", ".join([time_col] + list(axes))
-            q = f"""            SELECT {cols}
-            FROM {table}
-            WHERE {time_col} >= {self._literal(start_val)} AND {time_col} < {self._literal(end_val)}
-            ORDER BY {time_col} ASC
-            """
-            df = pd.read_sql_query(q, self.engine, parse_dates=[time_col], coerce_float=True)
-            return df
+        if long_mode:
+            n_ts = self._count_timestamps(table, time_col, start_val, end_val)
+            # With resampling, `missing="drop"` applies to buckets (below), not raw timestamps
+            pivot = LongPivot(axes, n_timestamps_hint=n_ts, duplicates=duplicates,
+                              missing="nan" if resample_seconds else missing)
+            for chunk in self.iter_window(table, time_col, axes, start_val, end_val,
+                                          axis_id_col=axis_id_col, value_col=value_col,
+                                          chunksize=chunksize or self.LONG_CHUNKSIZE):
+                if drop_zeros:
+                    v = chunk[value_col]
+                    chunk = chunk[v.notna() & (v != 0)]
+                pivot.push_frame(chunk, time_col, axis_id_col, value_col)
+            df = pivot.to_frame(time_col, columns_name=axis_id_col)
+        elif chunksize:
+            chunks = list(self.iter_window(table, time_col, axes, start_val, end_val, chunksize=chunksize))
+            df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=[time_col, *axes])
+        else:
+            q, params = self._window_query(table, time_col, axes, start_val, end_val, axis_id_col, value_col)
+            with self.engine.connect() as conn:
+                df = self._count(pd.read_sql_query(q, conn, params=params, parse_dates=[time_col],
+                                                   coerce_float=True))
+        if drop_zeros and not long_mode:
+            cols = [c for c in df.columns if c != time_col]
+            df[cols] = df[cols].mask(df[cols] == 0)
+        if resample_seconds:
+            df = resample_frame(df, time_col, resample_seconds, agg)
+            if long_mode and missing == "drop":
+                df = df.dropna().reset_index(drop=True)
+        return df
+
+    def can_push_down(self, long_mode: bool, resample_seconds: float | None, agg: str,
+                      duplicates: str = "raise") -> bool:
+        """Whether `load_window` can run these options as one SQL query on this engine."""
+        if self.engine.dialect.name not in self.PUSHDOWN_DIALECTS:
+            return False
+        if resample_seconds and agg not in SQL_AGGS:
+            return False
+        # A LONG pivot keeps one value per (ts, axis): duplicates can be detected in SQL
+        # ("raise") but not resolved by row order ("first" / "last")
+        return not long_mode or duplicates == "raise"
+
+    def iter_window(self, table: str, time_col: str, axes: Sequence,
+                    start_val, end_val,
+                    axis_id_col: str | None = None,
+                    value_col: str | None = None,
+                    chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+        """Stream a time slice as typed chunks of at most `chunksize` rows, ordered by time.
 
+        WIDE chunks hold `time_col` + axis columns (float64); LONG chunks hold the raw
+        (time_col, axis_id_col, value_col) rows with int64 ids and float64 values.
+        Uses a server-side cursor when the dialect supports one, so peak memory follows
+        `chunksize` rather than the window length.
+        """
+        if chunksize <= 0:
+            raise ValueError("chunksize must be a positive integer.")
+        long_mode = self._schema_mode(axes) == "long"
+        q, params = self._window_query(table, time_col, axes, start_val, end_val, axis_id_col, value_col)
+        if long_mode:
+            kwargs = dict(dtype={axis_id_col: "int64", value_col: "float64"})
+        else:
+            kwargs = dict(parse_dates=[time_col], dtype={a: "float64" for a in axes})
+
+        with self.engine.connect() as conn:
+            if self.engine.dialect.supports_server_side_cursors:
+                conn = conn.execution_options(stream_results=True, max_row_buffer=chunksize)
+            for chunk in pd.read_sql_query(q, conn, params=params, chunksize=chunksize,
+                                           coerce_float=True, **kwargs):
+                yield self._count(chunk)
+
+    def _load_pushed(self, table: str, time_col: str, axes: Sequence, start_val, end_val,
+                     axis_id_col: str | None, value_col: str | None, chunksize: int | None,
+                     missing: str, resample_seconds: float | None, agg: str,
+                     drop_zeros: bool) -> pd.DataFrame:
+        """`load_window` as a single aggregate query; output matches the pandas path."""
+        long_mode = self._schema_mode(axes) == "long"
+        timestamp = isinstance(start_val, str)
+        params = {"t0": start_val, "t1": end_val}
+        fn = SQL_AGGS[agg] if resample_seconds else "MAX"  # MAX of the single value per (ts, axis)
+        if resample_seconds:
+            key = f"{self._bucket_expr(time_col, timestamp)} AS _bucket"
+            params.update(step=float(resample_seconds), grid_eps=GRID_EPS)
+        else:
+            key = time_col
+
+        where = f"{time_col} >= :t0 AND {time_col} < :t1"
         if long_mode:
+            if not axis_id_col or not value_col:
+                raise ValueError("axis_id_col and value_col must be provided for LONG schema.")
+            ids = [f":a{i}" for i in range(len(axes))]
+            params.update({f"a{i}": int(a) for i, a in enumerate(axes)})
+            # Conditional aggregation: one output column per axis id (the pivot). Other ids stay in
+            # the scan, so their timestamps still get a row (all-NaN), as in LongPivot.
+            cols = [f"{fn}(CASE WHEN {axis_id_col} = {p} THEN {value_col} END) AS axis{int(a)}"
+                    for p, a in zip(ids, axes)]
+            known = f"{axis_id_col} IN ({', '.join(ids)})"
+            if not resample_seconds:
+                cols.append(f"SUM(CASE WHEN {known} THEN 1 ELSE 0 END)"
+                            f" - COUNT(DISTINCT CASE WHEN {known} THEN {axis_id_col} END) AS _dups")
+            if drop_zeros:
+                where += f" AND {value_col} IS NOT NULL AND {value_col} <> 0"
+            if resample_seconds:
+                self._check_duplicates(table, time_col, axis_id_col, known, where, params)
+        else:
+            val = (lambda a: f"NULLIF({a}, 0)") if drop_zeros else (lambda a: a)
+            cols = [f"{fn}({val(a)}) AS {a}" if resample_seconds else f"{val(a)} AS {a}" for a in axes]
+        group = " GROUP BY 1" if long_mode or resample_seconds else ""
+        q = text(f"SELECT {key}, {', '.join(cols)} FROM {table} WHERE {where}{group} ORDER BY 1")
+
+        parse_dates = [time_col] if not long_mode and not resample_seconds else None
+        with self.engine.connect() as conn:
+            if chunksize and self.engine.dialect.supports_server_side_cursors:
+                conn = conn.execution_options(stream_results=True, max_row_buffer=chunksize)
+            if chunksize:
+                chunks = [self._count(c) for c in pd.read_sql_query(q, conn, params=params, chunksize=chunksize,
+                                                                     parse_dates=parse_dates, coerce_float=True)]
+                df = pd.concat(chunks, ignore_index=True) if chunks else None
+            else:
+                df = self._count(pd.read_sql_query(q, conn, params=params, parse_dates=parse_dates,
+                                                   coerce_float=True))
+        names = [f"axis{int(a)}" for a in axes] if long_mode else list(axes)
+        if df is None:
+            df = pd.DataFrame(columns=[key.split(" AS ")[-1], *names])
+        df[names] = df[names].astype(np.float64)
+
+        if resample_seconds:
+            t = df.pop("_bucket").to_numpy(dtype=np.float64) * float(resample_seconds)
+            df.insert(0, time_col, pd.to_datetime(t, unit="s") if timestamp or not long_mode else t)
+        if long_mode:
+            if not resample_seconds:
+                if (df.pop("_dups") > 0).any():
+                    raise ValueError("Index contains duplicate entries, cannot reshape")
+            if missing == "drop":
+                df = df.dropna().reset_index(drop=True)
+            df.columns.name = axis_id_col
+        return df
+
+    def _check_duplicates(self, table: str, time_col: str, axis_id_col: str, known: str,
+                          where: str, params: dict) -> None:
+        """LongPivot's "raise" policy for a resampled pushdown, whose buckets hide repeated pairs."""
+        q = text(f"SELECT 1 FROM {table} WHERE {where} AND {known}"
+                 f" GROUP BY {time_col}, {axis_id_col} HAVING COUNT(*) > 1 LIMIT 1")
+        with self.engine.connect() as conn:
+            if conn.execute(q, params).first() is not None:
+                raise ValueError("Index contains duplicate entries, cannot reshape")
+
+    def _bucket_expr(self, time_col: str, timestamp: bool) -> str:
+        """SQL for `grid_buckets` (floor(epoch_seconds(time_col) / :step + :grid_eps)) on this dialect."""
+        name = self.engine.dialect.name
+        if timestamp:
+            # SQLite: integer epoch seconds plus the exact fractional part ('%f' is SS.SSS); the
+            # julianday() route is off by ~1e-5 s and drops samples on bucket edges a bucket early
+            secs = {"sqlite": f"(CAST(strftime('%s', {time_col}) AS INTEGER)"
+                              f" + (CAST(strftime('%f', {time_col}) AS REAL) - CAST(strftime('%S', {time_col}) AS INTEGER)))",
+                    "postgresql": f"EXTRACT(EPOCH FROM {time_col})",
+                    "duckdb": f"epoch({time_col})",
+                    "mysql": f"UNIX_TIMESTAMP({time_col})",
+                    "mariadb": f"UNIX_TIMESTAMP({time_col})"}[name]
+        else:
+            secs = time_col
+        x = f"(({secs}) / :step + :grid_eps)"
+        if name == "sqlite":
+            # No FLOOR() in stock SQLite: truncate, then step down for negative non-integers
+            return f"(CAST({x} AS INTEGER) - ({x} < CAST({x} AS INTEGER)))"
+        return f"FLOOR({x})"
+
+    def _count(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Account a result frame in rows_read / bytes_read."""
+        self.rows_read += len(df)
+        self.bytes_read += int(df.memory_usage(index=False, deep=True).sum())
+        return df
+
+    def _schema_mode(self, axes: Sequence) -> str:
+        """Detect schema mode from the type of `axes` entries."""
+        if all(isinstance(a, str) for a in axes):
+            return "wide"
+        if all(isinstance(a, (int, float)) for a in axes):
+            return "long"
+        raise ValueError("`axes` must be either all strings (WIDE) or all numbers (LONG).")
+
+    def _window_query(self, table: str, time_col: str, axes: Sequence, start_val, end_val,
+                      axis_id_col: str | None, value_col: str | None):
+        """SQL (with bound window parameters) for one time window in either schema mode."""
+        if self._schema_mode(axes) == "wide":
+            cols = ", ".join([time_col] + list(axes))
+            order = time_col
+        else:
             if not axis_id_col or not value_col:
                 raise ValueError("axis_id_col and value_col must be provided for LONG schema.")
             cols = ", ".join([time_col, axis_id_col, value_col])
-            q = f"""            SELECT {cols}
+            order = f"{time_col} ASC, {axis_id_col}"
+        q = text(f"""            SELECT {cols}
             FROM {table}
-            WHERE {time_col} >= {self._literal(start_val)} AND {time_col} < {self._literal(end_val)}
-            ORDER BY {time_col} ASC, {axis_id_col} ASC
-            """
-            df_long = pd.read_sql_query(q, self.engine, coerce_float=True)
-            # Pivot to WIDE
-            df_wide = df_long.pivot(index=time_col, columns=axis_id_col, values=value_col).reset_index()
-            # Ensure consistent column names: axis1..axisN
-            rename_map = {aid: f"axis{int(aid)}" for aid in df_wide.columns if aid != time_col}
-            df_wide = df_wide.rename(columns=rename_map)
-            # Sort columns by axis order
-            axis_names = [f"axis{int(a)}" for a in axes]
-            return df_wide[[time_col] + axis_names]
+            WHERE {time_col} >= :t0 AND {time_col} < :t1
+            ORDER BY {order} ASC
+            """)
+        return q, {"t0": start_val, "t1": end_val}
 
-        raise ValueError("`axes` must be either all strings (WIDE) or all numbers (LONG).")
+    def _count_timestamps(self, table: str, time_col: str, start_val, end_val) -> int:
+        """Distinct timestamps in the window; sizes the pivot block up front."""
+        q = text(f"""            SELECT COUNT(DISTINCT {time_col})
+            FROM {table}
+            WHERE {time_col} >= :t0 AND {time_col} < :t1
+            """)
+        with self.engine.connect() as conn:
+            return int(conn.execute(q, {"t0": start_val, "t1": end_val}).scalar() or 0)
+
+SQL_AGGS = {"mean": "AVG", "min": "MIN", "max": "MAX", "sum": "SUM"}  # portable SQL aggregates
+
+def epoch_seconds(ts: pd.Series) -> np.ndarray:
+    """Seconds since the epoch for datetime or ISO-string columns; numeric columns as is."""
+    if ptypes.is_numeric_dtype(ts):
+        return ts.to_numpy(dtype=np.float64)
+    if not ptypes.is_datetime64_any_dtype(ts):
+        ts = pd.to_datetime(ts)
+    return ts.to_numpy(dtype="datetime64[ns]").view(np.int64) / 1e9
 
-    def _literal(self, v):
-        """Best-effort SQL literal for numbers or ISO strings."""
-        if isinstance(v, (int, float)) and not isinstance(v, bool):
-            return str(v)
-        # Assume string; wrap in single quotes
-        return f"'{v}'"
+def resample_frame(df: pd.DataFrame, time_col: str, step: float, agg: str = "mean") -> pd.DataFrame:
+    """Pandas equivalent of the pushed-down resampling: `agg` of every non-time column over
+    buckets `grid_buckets(epoch_seconds, step)`, stamped with the bucket start (time dtype preserved)."""
+    ts = df[time_col]
+    bucket = grid_buckets(epoch_seconds(ts), step)
+    g = df.drop(columns=time_col).groupby(bucket, sort=True)
+    out = g.sum(min_count=1) if agg == "sum" else getattr(g, agg)()
+    t = out.index.to_numpy(dtype=np.float64) * step
+    out = out.reset_index(drop=True)
+    out.insert(0, time_col, t if ptypes.is_numeric_dtype(ts) else pd.to_datetime(t, unit="s"))
+    out.columns.name = df.columns.name
+    return out
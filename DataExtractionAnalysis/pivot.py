@@ -0,0 +1,148 @@
+# Incremental LONG → WIDE pivot.
+# Consumes (ts, axis_id, value) chunks ordered by ts and writes values straight into a
+# preallocated float64 block of shape (n_timestamps, n_axes), so the full long frame,
+# the pivoted copy and the renamed copy are never materialized.
+
+from typing import Sequence
+import numpy as np
+import pandas as pd
+
+DUPLICATE_POLICIES = ("raise", "first", "last")
+MISSING_POLICIES = ("nan", "drop")
+
+class LongPivot:
+    """Fills a WIDE block from time-ordered LONG chunks.
+
+    - duplicates: what to do when a (ts, axis_id) pair repeats
+        "raise" (default, same as DataFrame.pivot) | "first" | "last"
+    - missing: what to do with timestamps lacking some axes
+        "nan" (default, same as DataFrame.pivot) | "drop" (remove incomplete timestamps)
+
+    Axis ids that are not in `axes` are ignored. A timestamp may span several chunks.
+    """
+    def __init__(self, axes: Sequence, n_timestamps_hint: int = 0,
+                 duplicates: str = "raise", missing: str = "nan"):
+        if duplicates not in DUPLICATE_POLICIES:
+            raise ValueError(f"duplicates must be one of {DUPLICATE_POLICIES}, got {duplicates!r}.")
+        if missing not in MISSING_POLICIES:
+            raise ValueError(f"missing must be one of {MISSING_POLICIES}, got {missing!r}.")
+        self.axis_names = [f"axis{int(a)}" for a in axes]
+        self.duplicates = duplicates
+        self.missing = missing
+
+        # Sorted id lookup: axis_id → column position in `axes` order
+        ids = np.asarray([int(a) for a in axes], dtype=np.int64)
+        self._id_order = np.argsort(ids, kind="stable")
+        self._ids_sorted = ids[self._id_order]
+
+        self._cap = max(int(n_timestamps_hint), 1)
+        self._block = np.full((self._cap, len(ids)), np.nan, dtype=np.float64)
+        self._ts: np.ndarray | None = None          # allocated on first chunk (source dtype)
+        self._n = 0                                 # filled timestamps
+        self._carry_seen = np.zeros(len(ids), dtype=bool)  # axes already set on the last row
+
+    def push(self, ts, axis_id, value) -> None:
+        """Add one chunk; arrays must be ordered by ts (ties in any order)."""
+        ts = np.asarray(ts)
+        if ts.size == 0:
+            return
+        axis_id = np.asarray(axis_id, dtype=np.int64)
+        value = np.asarray(value, dtype=np.float64)
+
+        if self._ts is None:
+            self._ts = np.empty(self._cap, dtype=ts.dtype)
+        new_ts = np.empty(ts.size, dtype=bool)
+        new_ts[1:] = ts[1:] != ts[:-1]
+        if self._n == 0:
+            new_ts[0] = True
+        else:
+            last = self._ts[self._n - 1]
+            if ts[0] < last:
+                raise ValueError("LONG chunks must be ordered by time.")
+            new_ts[0] = ts[0] != last
+        if ts.size > 1 and np.any(ts[1:] < ts[:-1]):
+            raise ValueError("LONG chunks must be ordered by time.")
+
+        # Row of every element: the carried row (n-1) until the first new timestamp
+        rows = (self._n - 1) + np.cumsum(new_ts)
+        n_new = int(rows[-1]) + 1
+        self._reserve(n_new)
+        self._ts[rows[new_ts]] = ts[new_ts]
+
+        # Column of every element; drop ids outside `axes`
+        pos = np.searchsorted(self._ids_sorted, axis_id)
+        pos = np.minimum(pos, len(self._ids_sorted) - 1)
+        known = self._ids_sorted[pos] == axis_id
+        if not known.all():
+            rows, pos, value = rows[known], pos[known], value[known]
+        cols = self._id_order[pos]
+
+        rows, cols, value = self._apply_duplicate_policy(rows, cols, value)
+        self._block[rows, cols] = value
+
+        # Remember which axes the (possibly continuing) last row already holds
+        last_row = n_new - 1
+        if last_row != self._n - 1:
+            self._carry_seen[:] = False
+        self._carry_seen[cols[rows == last_row]] = True
+        self._n = n_new
+
+    def _apply_duplicate_policy(self, rows: np.ndarray, cols: np.ndarray, value: np.ndarray):
+        """Resolve repeated (row, col) pairs within the chunk and against the carried row."""
+        n_axes = self._block.shape[1]
+        keys = rows * n_axes + cols
+        # Cells of the row continued from the previous chunk that already hold a value
+        if self._n:
+            carry_dup = (rows == self._n - 1) & self._carry_seen[cols]
+        else:
+            carry_dup = np.zeros(rows.size, dtype=bool)
+
+        if keys.size > 1 and not np.all(keys[1:] > keys[:-1]):
+            order = np.argsort(keys, kind="stable")
+            ks = keys[order]
+            same_prev = np.zeros(ks.size, dtype=bool)
+            same_prev[1:] = ks[1:] == ks[:-1]
+            if same_prev.any():
+                if self.duplicates == "raise":
+                    raise ValueError("Index contains duplicate entries, cannot reshape")
+                same_next = np.zeros(ks.size, dtype=bool)
+                same_next[:-1] = same_prev[1:]
+                drop_sorted = same_prev if self.duplicates == "first" else same_next
+                keep = np.ones(keys.size, dtype=bool)
+                keep[order[drop_sorted]] = False
+                rows, cols, value, carry_dup = rows[keep], cols[keep], value[keep], carry_dup[keep]
+
+        if carry_dup.any():
+            if self.duplicates == "raise":
+                raise ValueError("Index contains duplicate entries, cannot reshape")
+            if self.duplicates == "first":
+                keep = ~carry_dup
+                rows, cols, value = rows[keep], cols[keep], value[keep]
+        return rows, cols, value
+
+    def _reserve(self, n_rows: int) -> None:
+        """Grow the block geometrically when the timestamp hint was too small."""
+        if n_rows <= self._cap:
+            return
+        cap = max(n_rows, 2 * self._cap)
+        block = np.full((cap, self._block.shape[1]), np.nan, dtype=np.float64)
+        block[:self._n] = self._block[:self._n]
+        ts = np.empty(cap, dtype=self._ts.dtype)
+        ts[:self._n] = self._ts[:self._n]
+        self._block, self._ts, self._cap = block, ts, cap
+
+    def push_frame(self, chunk: pd.DataFrame, time_col: str, axis_id_col: str, value_col: str) -> None:
+        """Convenience wrapper for DataFrame chunks as yielded by DBExtractor.iter_window."""
+        self.push(chunk[time_col].to_numpy(), chunk[axis_id_col].to_numpy(), chunk[value_col].to_numpy())
+
+    def to_frame(self, time_col: str, columns_name: str | None = None) -> pd.DataFrame:
+        """WIDE frame (time_col + axis1..axisN) over the filled rows, in `axes` order."""
+        ts = self._ts[:self._n] if self._ts is not None else np.empty(0, dtype=np.float64)
+        block = self._block[:self._n]
+        if self.missing == "drop":
+            complete = ~np.isnan(block).any(axis=1)
+            ts, block = ts[complete], block[complete]
+        df = pd.DataFrame(block, columns=self.axis_names, copy=False)
+        df.insert(0, time_col, ts)
+        df.columns.name = columns_name
+        return df
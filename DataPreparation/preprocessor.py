@@ -1,35 +1,111 @@
 # Normalizes the time axis to start at zero (saving the origin as time0)
 # Optionally interpolates axis values (Not used in this assignment) -> added
+# Optionally resamples onto a fixed grid with gap-limited interpolation, also chunk by chunk -> added
 # returns ['time_s', *axes] while writing prep_stats.json for reproducibility. -> added
 
-import pandas as pd
 from dataclasses import dataclass, asdict
 from pathlib import Path
+from typing import Iterable, Iterator, Optional
 import json
+import numpy as np, pandas as pd
 import pandas.api.types as ptypes
 
+from DataPreparation.resample import MAX_CARRY_ROWS, PrepPipeline
+
 @dataclass
 class PrepStats:
     time0: float
+    resample_seconds: Optional[float] = None   # grid step of the prepared rows (None: raw cadence)
     def to_json(self): return asdict(self)
 
 class Preprocessor:
-    def __init__(self, out_dir: str):
+    """`resample_seconds` puts samples on a fixed grid (bucket `agg`, see DataPreparation.resample);
+    `interpolate` fills NaN cells time-linearly across gaps of at most `max_gap_seconds`;
+    chunked input holds back at most `max_carry_rows` rows waiting for a gap to close.
+    Without either, rows pass through unchanged (no copy of the input)."""
+    def __init__(self, out_dir: str, resample_seconds: Optional[float] = None, agg: str = "mean",
+                 max_gap_seconds: Optional[float] = None, max_carry_rows: Optional[int] = MAX_CARRY_ROWS):
         self.out_dir = Path(out_dir)
         self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.resample_seconds = resample_seconds
+        self.agg = agg
+        self.max_gap_seconds = max_gap_seconds
+        self.max_carry_rows = max_carry_rows
         self.stats: PrepStats | None = None
 
     def fit_transform(self, df: pd.DataFrame, time_col: str, axes: list[str], interpolate: bool = True) -> pd.DataFrame:
-        df = df.copy()
-        if interpolate:
-            df[axes] = df[axes].interpolate(limit_direction="both")
-        if ptypes.is_datetime64_any_dtype(df[time_col]):
-            t = df[time_col].view('int64') / 1e9
-        else:
-            t = pd.to_numeric(df[time_col], errors='coerce')
-        t0 = float(t.iloc[0])
-        df['time_s'] = t - t0
-        self.stats = PrepStats(time0=t0)
-        with open(self.out_dir / 'prep_stats.json', 'w') as f:
-            json.dump(self.stats.to_json(), f, indent=2)
-        return df[['time_s', *axes]]
+        return self._collect(self.fit_transform_chunks([df], time_col, axes, interpolate))
+
+    # Same output as fit_transform, but keeps the saved time origin (prep_stats.json) so a
+    # later slice lines up with the original fit (e.g. for LinearAxisTrainer.partial_fit).
+    def transform(self, df: pd.DataFrame, time_col: str, axes: list[str], interpolate: bool = True) -> pd.DataFrame:
+        return self._collect(self.transform_chunks([df], time_col, axes, interpolate))
+
+    def fit_transform_chunks(self, chunks: Iterable[pd.DataFrame], time_col: str, axes: list[str],
+                             interpolate: bool = True) -> Iterator[pd.DataFrame]:
+        """Streaming fit_transform over time-ordered chunks (e.g. DBExtractor.iter_window):
+        state carries over between chunks and the first prepared row sets time0."""
+        self.stats = None
+        return self._stream(chunks, time_col, axes, interpolate)
+
+    def transform_chunks(self, chunks: Iterable[pd.DataFrame], time_col: str, axes: list[str],
+                         interpolate: bool = True) -> Iterator[pd.DataFrame]:
+        if self.stats is None:
+            with open(self.out_dir / 'prep_stats.json') as f:
+                self.stats = PrepStats(**json.load(f))
+        return self._stream(chunks, time_col, axes, interpolate)
+
+    def _stream(self, chunks, time_col: str, axes: list[str], interpolate: bool) -> Iterator[pd.DataFrame]:
+        if not (self.resample_seconds or interpolate):
+            for chunk in chunks:
+                t = self._seconds(chunk[time_col])
+                if len(t):
+                    yield self._frame(chunk, axes, t - self._origin(float(t.iloc[0])))
+            return
+        pipe = PrepPipeline(len(axes), self.resample_seconds, self.agg, interpolate, self.max_gap_seconds,
+                            self.max_carry_rows)
+        # One chunk of lookahead, so the last one is pushed as final (no separate flush block)
+        it = iter(chunks)
+        chunk = next(it, None)
+        while chunk is not None:
+            following = next(it, None)
+            t = self._seconds(chunk[time_col]).to_numpy(dtype=np.float64)
+            block = self._block(*pipe.push(t, chunk[axes].to_numpy(dtype=np.float64), final=following is None), axes)
+            if block is not None:
+                yield block
+            chunk = following
+
+    def _origin(self, t_first: float) -> float:
+        """time0; when fitting, the first prepared row fixes it and prep_stats.json is written."""
+        if self.stats is None:
+            self.stats = PrepStats(time0=t_first, resample_seconds=self.resample_seconds)
+            with open(self.out_dir / 'prep_stats.json', 'w') as f:
+                json.dump(self.stats.to_json(), f, indent=2)
+        return self.stats.time0
+
+    def _block(self, t: np.ndarray, Y: np.ndarray, axes: list[str]) -> pd.DataFrame | None:
+        if len(t) == 0:
+            return None
+        out = pd.DataFrame(Y, columns=axes, copy=False)
+        out.insert(0, 'time_s', t - self._origin(float(t[0])))
+        return out
+
+    @staticmethod
+    def _collect(frames: Iterator[pd.DataFrame]) -> pd.DataFrame:
+        frames = list(frames)
+        if not frames:
+            raise ValueError("No rows to prepare.")
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def _frame(df: pd.DataFrame, axes: list[str], time_s: pd.Series) -> pd.DataFrame:
+        """['time_s', *axes] built without copying the whole input."""
+        out = df[axes]
+        out.insert(0, 'time_s', time_s.to_numpy())
+        return out
+
+    @staticmethod
+    def _seconds(ts: pd.Series) -> pd.Series:
+        if ptypes.is_datetime64_any_dtype(ts):
+            return pd.Series(ts.to_numpy(dtype='datetime64[ns]').view('int64') / 1e9, index=ts.index)
+        return pd.to_numeric(ts, errors='coerce')
@@ -0,0 +1,241 @@
+# Vectorized preparation kernels that run chunk by chunk with carry-over state, so the same code
+# serves a whole frame (one push + finish) or the streaming extraction path (iter_window chunks).
+#   GridResampler   → time-ordered samples onto a fixed grid floor(t / step) anchored at 0 (the same
+#                     grid DBExtractor pushes into SQL), one row per bucket, empty buckets as NaN rows.
+#                     Only the open (last) bucket's raw rows are carried between chunks.
+#   GapInterpolator → time-linear interpolation of NaN cells, only across gaps (time between the
+#                     surrounding valid samples) of at most `max_gap` seconds; edges take the nearest
+#                     valid value under the same limit. Rows still waiting for their next valid
+#                     sample are carried; `max_gap` bounds them in time and `max_carry_rows` in
+#                     rows (past it the oldest are released with trailing cells edge-filled, as
+#                     at the end of the data), so one long NaN stretch cannot hold every chunk.
+#   PrepPipeline    → resample → interpolate → drop rows left entirely NaN (e.g. long empty spans).
+
+from typing import Optional, Tuple
+import numpy as np
+
+RESAMPLE_AGGS = ("mean", "min", "max", "sum", "first", "last", "median")
+GRID_EPS = 1e-9  # bucket starts written back as float / datetime stay in their own bucket
+MAX_CARRY_ROWS = 1 << 20  # default cap on rows GapInterpolator holds back between chunks
+
+Block = Tuple[np.ndarray, np.ndarray]  # (t seconds (n,), values (n, n_axes))
+
+def _empty(k: int) -> Block:
+    return np.empty(0), np.empty((0, k))
+
+def _ordered(t: np.ndarray) -> None:
+    if t.size > 1 and np.any(t[1:] < t[:-1]):
+        raise ValueError("Samples must be ordered by time.")
+
+def grid_buckets(t: np.ndarray, step: float) -> np.ndarray:
+    """Bucket ids floor(t / step) on the grid anchored at 0. The one bucketing rule for every
+    layer: GridResampler, DBExtractor's resample_frame and (same expression) its SQL pushdown."""
+    return np.floor(t / step + GRID_EPS)
+
+def aggregate_buckets(b: np.ndarray, Y: np.ndarray, agg: str) -> Block:
+    """`agg` of Y's rows per run of equal bucket ids `b` (non-decreasing), ignoring NaN;
+    an all-NaN column in a bucket gives NaN. Returns (bucket ids, (n_buckets, n_axes))."""
+    if b.size == 0:
+        return np.empty(0), np.empty((0, Y.shape[1]))
+    starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+    valid = ~np.isnan(Y)
+    count = np.add.reduceat(valid, starts, axis=0)
+    if agg in ("mean", "sum"):
+        out = np.empty((len(starts), Y.shape[1]))
+        for j in range(Y.shape[1]):  # column-wise: NaN→0 temporaries stay one column long
+            col = Y[:, j]
+            out[:, j] = np.add.reduceat(np.where(valid[:, j], col, 0.0) if count[:, j].sum() < len(col) else col, starts)
+        if agg == "mean":
+            out = np.divide(out, count, out=np.full_like(out, np.nan), where=count > 0)
+    elif agg == "min":
+        out = np.fmin.reduceat(Y, starts, axis=0)
+    elif agg == "max":
+        out = np.fmax.reduceat(Y, starts, axis=0)
+    elif agg in ("first", "last"):
+        rows = np.arange(len(b))[:, None]
+        if agg == "first":
+            pick = np.minimum.reduceat(np.where(valid, rows, len(b)), starts, axis=0)
+        else:
+            pick = np.maximum.reduceat(np.where(valid, rows, -1), starts, axis=0)
+        out = np.take_along_axis(Y, np.clip(pick, 0, len(b) - 1), axis=0)
+    elif agg == "median":
+        group = np.cumsum(np.r_[True, b[1:] != b[:-1]]) - 1
+        out = np.empty((len(starts), Y.shape[1]))
+        for j in range(Y.shape[1]):
+            v = Y[np.lexsort((Y[:, j], group)), j]  # NaN last within each bucket
+            c = count[:, j]
+            lo, hi = starts + np.maximum(c - 1, 0) // 2, starts + c // 2
+            out[:, j] = 0.5 * (v[lo] + v[np.minimum(hi, len(v) - 1)])
+    else:
+        raise ValueError(f"agg must be one of {RESAMPLE_AGGS}, got {agg!r}.")
+    out[count == 0] = np.nan
+    return b[starts], out
+
+class GridResampler:
+    """Streams time-ordered samples onto a fixed grid; see module notes."""
+    def __init__(self, step: float, n_axes: int, agg: str = "mean"):
+        if not step > 0:
+            raise ValueError(f"step must be positive, got {step!r}.")
+        if agg not in RESAMPLE_AGGS:
+            raise ValueError(f"agg must be one of {RESAMPLE_AGGS}, got {agg!r}.")
+        self.step, self.agg = float(step), agg
+        self._t, self._Y = _empty(n_axes)   # raw rows of the open bucket
+        self._next: Optional[float] = None  # first bucket id not emitted yet
+
+    def push(self, t: np.ndarray, Y: np.ndarray, final: bool = False) -> Block:
+        """Add samples; returns the grid rows of every bucket they close (all of them if `final`)."""
+        if self._t.size:
+            t, Y = np.concatenate([self._t, t]), np.concatenate([self._Y, Y])
+        _ordered(t)
+        if t.size == 0:
+            return _empty(Y.shape[1])
+        b = grid_buckets(t, self.step)
+        n = t.size if final else int(np.searchsorted(b, b[-1]))  # rows of closed buckets
+        self._t, self._Y = t[n:], Y[n:]
+        return self._emit(*aggregate_buckets(b[:n], Y[:n], self.agg))
+
+    def finish(self) -> Block:
+        """Grid rows of the open bucket (call once, after the last push)."""
+        return self.push(np.empty(0), np.empty((0, self._Y.shape[1])), final=True)
+
+    def _emit(self, buckets: np.ndarray, vals: np.ndarray) -> Block:
+        """Place aggregated buckets on the contiguous grid, empty buckets as NaN rows."""
+        if buckets.size == 0:
+            return np.empty(0), vals
+        first = buckets[0] if self._next is None else self._next
+        self._next = buckets[-1] + 1
+        grid = np.arange(first, buckets[-1] + 1)
+        if grid.size == buckets.size:
+            return grid * self.step, vals
+        out = np.full((grid.size, vals.shape[1]), np.nan)
+        out[(buckets - first).astype(np.int64)] = vals
+        return grid * self.step, out
+
+class GapInterpolator:
+    """Gap-limited, time-linear interpolation over streamed rows; see module notes.
+    Works per column on the NaN runs only, so cost follows the number of missing cells.
+    Chunked output equals whole-input output unless a pending run outgrows `max_carry_rows`
+    (None = unbounded carry)."""
+    def __init__(self, n_axes: int, max_gap: Optional[float] = None,
+                 max_carry_rows: Optional[int] = MAX_CARRY_ROWS):
+        if max_carry_rows is not None and max_carry_rows < 0:
+            raise ValueError(f"max_carry_rows must be >= 0, got {max_carry_rows!r}.")
+        self.max_gap = np.inf if max_gap is None else float(max_gap)
+        self.max_carry_rows = max_carry_rows
+        self._t, self._Y = _empty(n_axes)                 # carried, unresolved raw rows
+        self._anchor_t = np.full(n_axes, np.nan)          # last valid sample before them
+        self._anchor_y = np.full(n_axes, np.nan)
+
+    def push(self, t: np.ndarray, Y: np.ndarray, final: bool = False) -> Block:
+        """Add rows; returns the leading rows whose cells are all resolved (filled or final NaN).
+        Filled in place when the rows were carried over, else on a copy of `Y`."""
+        if self._t.size:
+            t, Y = np.concatenate([self._t, t]), np.concatenate([self._Y, Y])
+        elif np.isnan(Y).any():
+            Y = Y.copy()
+        else:
+            _ordered(t)
+            self._remember(t, Y, len(t))
+            return t, Y
+        _ordered(t)
+        n, k = Y.shape
+        if n == 0:
+            return _empty(k)
+
+        runs = []  # per column: (starts, ends) of NaN runs [s, e)
+        r0 = n     # first row with a cell that may still change
+        for j in range(k):
+            m = np.isnan(Y[:, j])
+            edges = np.diff(m.view(np.int8), prepend=np.int8(0), append=np.int8(0))
+            s, e = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+            runs.append((s, e))
+            if not final and s.size and e[-1] == n:
+                # Trailing run: a next valid sample could still arrive within max_gap
+                s_last = s[-1]
+                if s_last > 0 or not np.isnan(self._anchor_t[j]):
+                    tp = t[s_last - 1] if s_last > 0 else self._anchor_t[j]
+                    first = s_last if t[s_last] - tp <= self.max_gap else n
+                else:
+                    first = max(s_last, int(np.searchsorted(t, t[-1] - self.max_gap)))
+                r0 = min(r0, first)
+        # Over the cap: release the oldest pending rows, their trailing cells filled as edges
+        forced = self.max_carry_rows is not None and n - r0 > self.max_carry_rows
+        if forced:
+            r0 = n - self.max_carry_rows
+
+        for j, (s, e) in enumerate(runs):
+            if s.size:
+                self._fill(t, Y[:, j], s, e, self._anchor_t[j], self._anchor_y[j], r0, final or forced)
+        self._remember(t, Y, r0)
+        self._t, self._Y = t[r0:], Y[r0:]
+        return t[:r0], Y[:r0]
+
+    def finish(self) -> Block:
+        """Resolve the carried rows (edges filled within max_gap)."""
+        return self.push(np.empty(0), np.empty((0, self._Y.shape[1])), final=True)
+
+    def _fill(self, t: np.ndarray, y: np.ndarray, s: np.ndarray, e: np.ndarray,
+              anchor_t: float, anchor_y: float, r0: int, final: bool) -> None:
+        """Fill one column's NaN runs [s, e) in rows < r0 (`final`: trailing runs as edges too)."""
+        n = len(y)
+        tp = np.where(s > 0, t[np.maximum(s - 1, 0)], anchor_t)
+        yp = np.where(s > 0, y[np.maximum(s - 1, 0)], anchor_y)
+        has_n = e < n
+        tn, yn = t[np.minimum(e, n - 1)], y[np.minimum(e, n - 1)]
+        e = np.minimum(e, r0)
+        lens = np.maximum(e - s, 0)
+        if not lens.any():
+            return
+        run = np.repeat(np.arange(s.size), lens)
+        rows = s[run] + np.arange(run.size) - np.repeat(np.cumsum(lens) - lens, lens)
+        tt, tp, yp, tn, yn, has_n = t[rows], tp[run], yp[run], tn[run], yn[run], has_n[run]
+        have_p = ~np.isnan(tp)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            inner = have_p & has_n & (tn - tp <= self.max_gap)
+            y[rows[inner]] = yp[inner] + (tt[inner] - tp[inner]) / (tn[inner] - tp[inner]) * (yn[inner] - yp[inner])
+            lead = ~have_p & has_n & (tn - tt <= self.max_gap)
+            y[rows[lead]] = yn[lead]
+            if final:
+                trail = have_p & ~has_n & (tt - tp <= self.max_gap)
+                y[rows[trail]] = yp[trail]
+
+    def _remember(self, t: np.ndarray, Y: np.ndarray, r0: int) -> None:
+        """Last valid sample per column among the first r0 (emitted) rows."""
+        if r0 == 0:
+            return
+        for j in range(Y.shape[1]):
+            col = Y[:r0, j]
+            idx = [r0 - 1] if not np.isnan(col[-1]) else np.flatnonzero(~np.isnan(col))
+            if len(idx):
+                self._anchor_t[j], self._anchor_y[j] = t[idx[-1]], col[idx[-1]]
+
+class PrepPipeline:
+    """Optional grid resampling, then optional gap interpolation, over time-ordered chunks.
+    With resampling, rows that stay entirely NaN (empty buckets not bridged) are dropped."""
+    def __init__(self, n_axes: int, resample_seconds: Optional[float] = None, agg: str = "mean",
+                 interpolate: bool = False, max_gap_seconds: Optional[float] = None,
+                 max_carry_rows: Optional[int] = MAX_CARRY_ROWS):
+        self.n_axes = n_axes
+        self.resampler = GridResampler(resample_seconds, n_axes, agg) if resample_seconds else None
+        self.interp = GapInterpolator(n_axes, max_gap_seconds, max_carry_rows) if interpolate else None
+
+    def push(self, t: np.ndarray, Y: np.ndarray, final: bool = False) -> Block:
+        """Add a chunk; `final` marks the last one (flushes all carried state)."""
+        if self.resampler is not None:
+            t, Y = self.resampler.push(t, Y, final=final)
+        if self.interp is not None:
+            t, Y = self.interp.push(t, Y, final=final)
+        return self._drop_empty(t, Y)
+
+    def finish(self) -> Block:
+        return self.push(*_empty(self.n_axes), final=True)
+
+    def run(self, t: np.ndarray, Y: np.ndarray) -> Block:
+        """Whole input in one go."""
+        return self.push(t, Y, final=True)
+
+    def _drop_empty(self, t: np.ndarray, Y: np.ndarray) -> Block:
+        if self.resampler is None or Y.size == 0:
+            return t, Y
+        keep = ~np.isnan(Y).all(axis=1)
+        return (t, Y) if keep.all() else (t[keep], Y[keep])
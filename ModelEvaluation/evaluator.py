@@ -1,50 +1,193 @@
 # Evaluate the model’s predictions (metrics) 
 # Save plots to files.
+# Plots are drawn with the object-oriented Agg API (no pyplot state), so axes can be rendered
+# on a process pool. Long series are decimated to the figure's pixel grid before drawing:
+# scatter points keep one representative per occupied pixel cell, the fit line keeps the
+# min/max per pixel column (both in fixed-size blocks), which is visually identical at the saved resolution.
+# matplotlib is imported only when a series is decimated or drawn (metrics-only runs never load it).
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import argparse
 import pandas as pd
 import numpy as np
-from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
-import matplotlib.pyplot as plt
+
+from ModelEvaluation.metrics import MetricStats
+from ModelTraining.trainer import Prediction
+
+FIT_SIZE, RES_SIZE = (8, 4), (8, 3)   # inches; pixel grid = size * figure.dpi
+PLOT_DATA = "plot_data.npz"           # decimated series written in lazy mode
+DECIMATE_BLOCK = 1 << 20              # rows per decimation pass
 
 class Evaluator:
-    """Computes metrics and persists simple diagnostic plots."""
-    def __init__(self, plot_dir: str):
+    """Computes metrics and persists simple diagnostic plots.
+
+    mode: "eager" renders PNGs in `plots`, "lazy" only stores the decimated series
+    (render later with `render_saved` / `python -m ModelEvaluation.evaluator`), "off" skips plots.
+    Series longer than `decimate_above` points are reduced to the pixel grid (None = never).
+    """
+    def __init__(self, plot_dir: str, mode: str = "eager", n_jobs: int = 1,
+                 decimate_above: int | None = 200_000):
+        if mode not in ("eager", "lazy", "off"):
+            raise ValueError(f"mode must be 'eager', 'lazy' or 'off', got {mode!r}.")
         self.plot_dir = Path(plot_dir)
         self.plot_dir.mkdir(parents=True, exist_ok=True)
+        self.mode = mode
+        self.n_jobs = int(n_jobs or 1)
+        self.decimate_above = decimate_above
 
-    # Return a dataframe with per-axis metrics (R^2, MAE, RMSE)
-    def metrics(self, df_pred: pd.DataFrame, axes: list[str]) -> pd.DataFrame:
-        rows = []
-        for k in axes:
-            y = df_pred[k].values
-            yhat = df_pred[f"{k}_pred"].values
-            rows.append({
-                "axis": k,
-                "r2": r2_score(y, yhat),
-                "mae": mean_absolute_error(y, yhat),
-                "rmse": mean_squared_error(y, yhat) ** 0.5,
-            })
-        return pd.DataFrame(rows)
+    # Return a dataframe with per-axis metrics (R^2, MAE, RMSE; + residual mean/std/max if extended)
+    # All axes in one fused pass; for chunked input use MetricStats.from_chunks(...).to_frame()
+    # `df_pred` may also be a Prediction (trainer.predict_arrays), read without widening a frame.
+    def metrics(self, df_pred: pd.DataFrame | Prediction, axes: list[str], extended: bool = False) -> pd.DataFrame:
+        if isinstance(df_pred, Prediction):
+            j = [df_pred.axes.index(k) for k in axes]
+            pred, res = (df_pred.pred, df_pred.res) if j == list(range(len(df_pred.axes))) \
+                else (df_pred.pred[:, j], df_pred.res[:, j])
+            return MetricStats.from_residuals(pred, res, axes).to_frame(extended)
+        return MetricStats.from_frame(df_pred, axes).to_frame(extended)
 
     # Two plots per axis : 
     # 1. fit plot - scatter & line -> save
     # 2. residuals - scatter & baesline -> save
-    def plots(self, df_pred: pd.DataFrame, axes: list[str]) -> None:
-        for k in axes:
-            # Scatter + regression line
-            fig = plt.figure(figsize=(8, 4))
-            colors = plt.rcParams['axes.prop_cycle'].by_key().get('color', ['C0','C1','C2'])
-            c_data = colors[0]  # data color
-            c_line = colors[1]  # line color
-
-            plt.scatter(df_pred["time_s"], df_pred[k], s=10, alpha=0.7, label="data", c=c_data)
-            plt.plot(df_pred["time_s"], df_pred[f"{k}_pred"], label="fit", color=c_line, linewidth=1.5)
-            plt.xlabel("time (s)"); plt.ylabel(k); plt.legend(); plt.tight_layout()
-            fig.savefig(self.plot_dir / f"{k}_fit.png"); plt.close(fig)
-
-            # Residual series
-            fig = plt.figure(figsize=(8, 3))
-            plt.scatter(df_pred["time_s"], df_pred[f"{k}_res"], s=10, alpha=0.8, label="residuals", c=c_data)
-            plt.axhline(0, color=c_line, linestyle="--", linewidth=1)
-            plt.tight_layout(); fig.savefig(self.plot_dir / f"{k}_residual.png"); plt.close(fig)
+    def plots(self, df_pred: pd.DataFrame | Prediction, axes: list[str]) -> list[Path]:
+        """Render (eager) or stash (lazy) the per-axis plots; returns the files written."""
+        if self.mode == "off":
+            return []
+        series = {k: self._series(df_pred, k) for k in axes}
+        if self.mode == "lazy":
+            path = self.plot_dir / PLOT_DATA
+            np.savez(path, **{f"{k}|{name}": arr for k, d in series.items() for name, arr in d.items()})
+            return [path]
+        return self._render(series)
+
+    def render_saved(self, axes: list[str] | None = None) -> list[Path]:
+        """Render plots from the series stored by a lazy `plots` call (all axes by default)."""
+        series: dict[str, dict] = {}
+        with np.load(self.plot_dir / PLOT_DATA) as z:
+            for key in z.files:
+                k, name = key.split("|", 1)
+                if axes is None or k in axes:
+                    series.setdefault(k, {})[name] = z[key]
+        return self._render(series)
+
+    def plot_files(self, axes: list[str]) -> list[Path]:
+        """Files `plots` writes in the current mode."""
+        if self.mode == "off":
+            return []
+        if self.mode == "lazy":
+            return [self.plot_dir / PLOT_DATA]
+        return [self.plot_dir / f"{k}_{kind}.png" for k in axes for kind in ("fit", "residual")]
+
+    def _render(self, series: dict) -> list[Path]:
+        jobs = [(self.plot_dir, k, d) for k, d in series.items()]
+        if self.n_jobs > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.n_jobs, len(jobs))) as pool:
+                done = list(pool.map(_render_axis, *zip(*jobs)))
+        else:
+            done = [_render_axis(*j) for j in jobs]
+        return [p for pair in done for p in pair]
+
+    def _series(self, df_pred: pd.DataFrame | Prediction, k: str) -> dict:
+        """Arrays to draw for one axis, decimated when the series is long. Non-finite cells (e.g.
+        zeros dropped as missing) are left out of each series, as in the metrics."""
+        if isinstance(df_pred, Prediction):
+            t = df_pred.t
+            y, yhat, res = df_pred.column(k)
+        else:
+            t = df_pred["time_s"].to_numpy(dtype=np.float64)
+            y = df_pred[k].to_numpy(dtype=np.float64)
+            yhat = df_pred[f"{k}_pred"].to_numpy(dtype=np.float64)
+            res = df_pred[f"{k}_res"].to_numpy(dtype=np.float64)
+        if self.decimate_above is None or t.size <= self.decimate_above:
+            fy, fl, fr = (np.isfinite(t) & np.isfinite(v) for v in (y, yhat, res))
+            return {"t": t[fy], "y": y[fy], "line_t": t[fl], "line_y": yhat[fl], "res_t": t[fr], "res": res[fr]}
+        import matplotlib
+        dpi = matplotlib.rcParams["figure.dpi"]
+        fw, fh = (int(v * dpi) for v in FIT_SIZE)
+        rw, rh = (int(v * dpi) for v in RES_SIZE)
+        st, sy = _decimate_scatter(t, y, fw, fh)
+        lt, ly = _decimate_line(t, yhat, fw)
+        rt, rr = _decimate_scatter(t, res, rw, rh)
+        return {"t": st, "y": sy, "line_t": lt, "line_y": ly, "res_t": rt, "res": rr}
+
+def _decimate_scatter(x: np.ndarray, y: np.ndarray, w: int, h: int) -> tuple[np.ndarray, np.ndarray]:
+    """One point per occupied cell of a w x h grid over the data range (placed at the cell centre)."""
+    x0, x1 = _finite_range(x)
+    y0, y1 = _finite_range(y)
+    sx = (w - 1) / (x1 - x0) if x1 > x0 else 0.0
+    sy = (h - 1) / (y1 - y0) if y1 > y0 else 0.0
+    occupied = np.zeros(w * h, dtype=bool)
+    for i in range(0, x.size, DECIMATE_BLOCK):  # bounded temporaries on long series
+        bx, by = x[i:i + DECIMATE_BLOCK], y[i:i + DECIMATE_BLOCK]
+        ok = np.isfinite(bx) & np.isfinite(by)
+        cell = np.rint((bx[ok] - x0) * sx).astype(np.int64) * h
+        cell += np.rint((by[ok] - y0) * sy).astype(np.int64)
+        occupied[cell] = True
+    cx, cy = np.divmod(np.flatnonzero(occupied), h)
+    return (x0 + cx / sx if sx else np.full(cx.size, x0),
+            y0 + cy / sy if sy else np.full(cy.size, y0))
+
+def _decimate_line(x: np.ndarray, y: np.ndarray, w: int) -> tuple[np.ndarray, np.ndarray]:
+    """Min and max of y per pixel column, drawn as a vertical stroke in each column."""
+    x0, x1 = _finite_range(x)
+    sx = (w - 1) / (x1 - x0) if x1 > x0 else 0.0
+    lo, hi = np.full(w, np.inf), np.full(w, -np.inf)
+    for i in range(0, x.size, DECIMATE_BLOCK):
+        bx, by = x[i:i + DECIMATE_BLOCK], y[i:i + DECIMATE_BLOCK]
+        ok = np.isfinite(bx) & np.isfinite(by)
+        col = np.rint((bx[ok] - x0) * sx).astype(np.int64)
+        np.minimum.at(lo, col, by[ok])
+        np.maximum.at(hi, col, by[ok])
+    cols = np.flatnonzero(lo <= hi)
+    cx = x0 + cols / sx if sx else np.full(cols.size, x0)
+    return np.repeat(cx, 2), np.column_stack([lo[cols], hi[cols]]).ravel()
+
+def _finite_range(v: np.ndarray) -> tuple[float, float]:
+    """(min, max) over the finite values of v, in blocks; (0, 0) when there are none."""
+    lo, hi = np.inf, -np.inf
+    for i in range(0, v.size, DECIMATE_BLOCK):
+        b = v[i:i + DECIMATE_BLOCK]
+        b = b[np.isfinite(b)]
+        if b.size:
+            lo, hi = min(lo, float(b.min())), max(hi, float(b.max()))
+    return (lo, hi) if lo <= hi else (0.0, 0.0)
+
+def _render_axis(plot_dir: Path, k: str, d: dict) -> tuple[Path, Path]:
+    """Draw and save the fit and residual figures for one axis (runs in pool workers too)."""
+    import matplotlib
+    from matplotlib.figure import Figure
+    colors = matplotlib.rcParams['axes.prop_cycle'].by_key().get('color', ['C0','C1','C2'])
+    c_data = colors[0]  # data color
+    c_line = colors[1]  # line color
+
+    # Scatter + regression line
+    fig = Figure(figsize=FIT_SIZE)
+    ax = fig.add_subplot()
+    ax.scatter(d["t"], d["y"], s=10, alpha=0.7, label="data", color=c_data)
+    ax.plot(d["line_t"], d["line_y"], label="fit", color=c_line, linewidth=1.5)
+    ax.set_xlabel("time (s)"); ax.set_ylabel(k); ax.legend(); fig.tight_layout()
+    fit_path = Path(plot_dir) / f"{k}_fit.png"
+    fig.savefig(fit_path)
+
+    # Residual series
+    fig = Figure(figsize=RES_SIZE)
+    ax = fig.add_subplot()
+    ax.scatter(d["res_t"], d["res"], s=10, alpha=0.8, label="residuals", color=c_data)
+    ax.axhline(0, color=c_line, linestyle="--", linewidth=1)
+    fig.tight_layout()
+    res_path = Path(plot_dir) / f"{k}_residual.png"
+    fig.savefig(res_path)
+    return fit_path, res_path
+
+def main():
+    p = argparse.ArgumentParser(description="Render plots stored by a lazy Evaluator run.")
+    p.add_argument("--dir", default="out", help="plot dir holding plot_data.npz")
+    p.add_argument("--axes", nargs="*", help="axes to render (default: all)")
+    p.add_argument("--jobs", type=int, default=1)
+    a = p.parse_args()
+    for path in Evaluator(a.dir, mode="lazy", n_jobs=a.jobs).render_saved(a.axes or None):
+        print(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# Fused regression metrics for all axes at once (R^2, MAE, RMSE, residual mean/std/max).
+# Rows are visited in cache-sized blocks; each block yields mergeable statistics, so the same
+# kernel serves a whole prediction matrix or a stream of chunks that is never held in memory.
+# Results match sklearn's r2_score / mean_absolute_error / mean_squared_error to float tolerance.
+# Non-finite cells (e.g. zeros dropped as missing) are skipped per axis, as in AxisStats.from_block.
+
+from dataclasses import dataclass
+from typing import Iterable
+import numpy as np, pandas as pd
+
+BLOCK_ROWS = 1 << 14  # rows per kernel pass (keeps the block's temporaries in cache)
+
+@dataclass
+class MetricStats:
+    """Mergeable per-axis error statistics (centered, Chan/Welford form).
+
+    n: samples per axis (finite y and yhat), sum_abs: sum(|y - yhat|), sse: sum((y - yhat)^2),
+    mean_y / m2_y: mean of y and sum((y - mean_y)^2) (the R^2 denominator),
+    mean_r / m2_r / max_r: same for the residual y - yhat, and its maximum.
+    """
+    axes: list[str]
+    n: np.ndarray
+    sum_abs: np.ndarray
+    sse: np.ndarray
+    mean_y: np.ndarray
+    m2_y: np.ndarray
+    mean_r: np.ndarray
+    m2_r: np.ndarray
+    max_r: np.ndarray
+
+    @classmethod
+    def empty(cls, axes: list[str]) -> "MetricStats":
+        z = lambda: np.zeros(len(axes))
+        return cls(list(axes), z(), z(), z(), z(), z(), z(), z(), np.full(len(axes), -np.inf))
+
+    @classmethod
+    def from_block(cls, Y: np.ndarray, Yhat: np.ndarray, axes: list[str]) -> "MetricStats":
+        """Statistics of Y (n, n_axes) against Yhat, one fused pass per BLOCK_ROWS rows."""
+        return cls._reduce(Y, Yhat, axes, residuals=False)
+
+    @classmethod
+    def from_residuals(cls, Yhat: np.ndarray, R: np.ndarray, axes: list[str]) -> "MetricStats":
+        """Same statistics from predictions and residuals R = Y - Yhat (e.g. `Prediction.pred/res`)."""
+        return cls._reduce(R, Yhat, axes, residuals=True)
+
+    @classmethod
+    def _reduce(cls, A: np.ndarray, Yhat: np.ndarray, axes: list[str], residuals: bool) -> "MetricStats":
+        A = np.asarray(A, dtype=np.float64)
+        Yhat = np.asarray(Yhat, dtype=np.float64)
+        if A.shape != Yhat.shape or A.ndim != 2 or A.shape[1] != len(axes):
+            raise ValueError(f"Inputs must both be (n, {len(axes)}), got {A.shape} and {Yhat.shape}.")
+        masked = not (np.isfinite(A).all() and np.isfinite(Yhat).all())
+        out = cls.empty(axes)
+        # Axis-major (n_axes, rows) blocks: reductions then run along contiguous memory.
+        # pandas hands back column blocks in that layout already, so usually nothing is copied.
+        B = np.empty((len(axes), min(BLOCK_ROWS, A.shape[0])))
+        D = np.empty_like(B)
+        for i in range(0, A.shape[0], BLOCK_ROWS):
+            a, yhat = _axis_major(A[i:i + BLOCK_ROWS]), _axis_major(Yhat[i:i + BLOCK_ROWS])
+            m = a.shape[1]
+            b, d = B[:, :m], D[:, :m]
+            if masked:
+                # Zero the skipped cells so they drop out of every sum; counts come from the mask
+                ok = np.isfinite(a) & np.isfinite(yhat)
+                a, yhat = np.where(ok, a, 0.0), np.where(ok, yhat, 0.0)
+                n = ok.sum(axis=1).astype(np.float64)
+            else:
+                ok, n = None, np.full(len(axes), float(m))
+            if residuals:
+                y, r = np.add(yhat, a, out=b), a
+            else:
+                y, r = a, np.subtract(a, yhat, out=b)
+            n_safe = np.maximum(n, 1.0)
+            mean_y, mean_r = y.sum(axis=1) / n_safe, r.sum(axis=1) / n_safe
+            np.subtract(y, mean_y[:, None], out=d)
+            if ok is not None:
+                d *= ok
+            m2_y = np.einsum("ij,ij->i", d, d)
+            np.subtract(r, mean_r[:, None], out=d)
+            if ok is not None:
+                d *= ok
+            m2_r = np.einsum("ij,ij->i", d, d)
+            max_r = r.max(axis=1) if ok is None else np.where(ok, r, -np.inf).max(axis=1)
+            np.abs(r, out=d)
+            out = out.merge(cls(list(axes), n, d.sum(axis=1), np.einsum("ij,ij->i", r, r),
+                                mean_y, m2_y, mean_r, m2_r, max_r))
+        return out
+
+    @classmethod
+    def from_frame(cls, df_pred: pd.DataFrame, axes: list[str]) -> "MetricStats":
+        """Statistics from the `k` / `k_pred` columns of a prediction frame."""
+        return cls.from_block(df_pred[axes].to_numpy(dtype=np.float64),
+                              df_pred[[f"{k}_pred" for k in axes]].to_numpy(dtype=np.float64), axes)
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[pd.DataFrame], axes: list[str]) -> "MetricStats":
+        """Accumulate over prediction-frame chunks without holding them all."""
+        out = cls.empty(axes)
+        for chunk in chunks:
+            out = out.merge(cls.from_frame(chunk, axes))
+        return out
+
+    def merge(self, other: "MetricStats") -> "MetricStats":
+        """Combine with statistics of another, disjoint set of rows (same axes)."""
+        if other.axes != self.axes:
+            raise ValueError(f"Cannot merge metrics for axes {other.axes} into {self.axes}.")
+        n = self.n + other.n
+        n_safe = np.maximum(n, 1.0)
+        f = self.n * other.n / n_safe
+        d_y, d_r = other.mean_y - self.mean_y, other.mean_r - self.mean_r
+        return MetricStats(self.axes, n,
+                           sum_abs=self.sum_abs + other.sum_abs,
+                           sse=self.sse + other.sse,
+                           mean_y=self.mean_y + d_y * other.n / n_safe,
+                           m2_y=self.m2_y + other.m2_y + d_y * d_y * f,
+                           mean_r=self.mean_r + d_r * other.n / n_safe,
+                           m2_r=self.m2_r + other.m2_r + d_r * d_r * f,
+                           max_r=np.maximum(self.max_r, other.max_r))
+
+    def r2(self) -> np.ndarray:
+        """Coefficient of determination; constant y gives 1.0 for a perfect fit else 0.0 (as sklearn).
+        NaN for an axis without samples."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r2 = 1.0 - self.sse / self.m2_y
+        r2 = np.where(self.m2_y > 0, r2, np.where(self.sse == 0, 1.0, 0.0))
+        return np.where(self.n > 0, r2, np.nan)
+
+    def to_frame(self, extended: bool = False) -> pd.DataFrame:
+        """Per-axis table: axis, r2, mae, rmse (+ res_mean, res_std, res_max when extended).
+        Axes without samples get NaN."""
+        if not self.n.any():
+            raise ValueError("No samples accumulated.")
+        n = np.where(self.n > 0, self.n, np.nan)
+        out = pd.DataFrame({
+            "axis": self.axes,
+            "r2": self.r2(),
+            "mae": self.sum_abs / n,
+            "rmse": np.sqrt(self.sse / n),
+        })
+        if extended:
+            out["res_mean"] = np.where(self.n > 0, self.mean_r, np.nan)
+            out["res_std"] = np.sqrt(self.m2_r / np.maximum(n - 1, 1))  # sample std, as pandas
+            out["res_max"] = np.where(self.n > 0, self.max_r, np.nan)
+        return out
+
+def _axis_major(block: np.ndarray) -> np.ndarray:
+    """(rows, n_axes) block as an (n_axes, rows) array with unit stride along rows."""
+    t = block.T
+    return t if t.strides[1] == t.itemsize else np.ascontiguousarray(t)
@@ -0,0 +1,96 @@
+# Fixed-layout binary artifact for serving: one (fields x axes) float64 .npy plus manifest.json.
+# Row i of model.npy is field FIELDS[i] for every axis, so each field is one contiguous vector.
+# The file is opened with mmap (zero-copy, pages shared between worker processes); nothing is
+# unpickled. Versions saved before this format (models.pkl + JSON only) still load via the
+# legacy path.
+
+from dataclasses import dataclass
+from pathlib import Path
+import hashlib, json
+import numpy as np
+
+from ModelRegistry.publish import resolve_version
+
+FORMAT = "linear-axis-npy"
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+ARRAY_FILE = "model.npy"
+FIELDS = ("coef", "intercept", "MinC", "MaxC", "T_long_steps", "T_short_steps", "dt_seconds")
+
+@dataclass
+class RegistryModel:
+    """Per-axis parameters of one registry version; vectors are in `axes` order
+    (read-only memmap views for the columnar format)."""
+    axes: list[str]
+    coef: np.ndarray
+    intercept: np.ndarray
+    minc: np.ndarray
+    maxc: np.ndarray
+    t_long: np.ndarray
+    t_short: np.ndarray
+    dt_seconds: np.ndarray
+    time0: float
+    version: str      # tag the version was saved under
+    version_dir: Path  # resolved (immutable) directory
+    format: str        # FORMAT or "legacy-pkl"
+
+def write_columnar(vdir, models: dict, thresholds: dict, time0: float, version: str = "") -> Path:
+    """Write model.npy + manifest.json into a version dir; returns the manifest path."""
+    vdir = Path(vdir)
+    axes = [k for k in models if k in thresholds]
+    get = {"coef": lambda k: models[k]["coef"], "intercept": lambda k: models[k]["intercept"]}
+    block = np.asarray([[get[f](k) if f in get else thresholds[k][f] for k in axes] for f in FIELDS],
+                       dtype="<f8").reshape(len(FIELDS), len(axes))
+    np.save(vdir / ARRAY_FILE, block)
+    manifest = {
+        "format": FORMAT, "format_version": FORMAT_VERSION,
+        "array": ARRAY_FILE, "dtype": "<f8", "shape": list(block.shape), "fields": list(FIELDS),
+        "version": version, "axes": axes, "time0": float(time0),
+        "sha256": hashlib.sha256((vdir / ARRAY_FILE).read_bytes()).hexdigest(),
+    }
+    with open(vdir / MANIFEST, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return vdir / MANIFEST
+
+def load_version(root_dir: str = "ModelRegistry/artifacts", version: str = "latest",
+                 verify: bool = False) -> RegistryModel:
+    """Open a registry version: memory-mapped columnar format when present, else legacy pickle.
+    `verify` re-hashes model.npy against the manifest (reads the whole file)."""
+    vdir = resolve_version(root_dir, version)
+    if not (vdir / MANIFEST).exists():
+        return _load_legacy(vdir)
+    with open(vdir / MANIFEST) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT or int(manifest.get("format_version", 0)) > FORMAT_VERSION:
+        raise ValueError(f"Unsupported registry format in {vdir}: "
+                         f"{manifest.get('format')} v{manifest.get('format_version')}.")
+    path = vdir / manifest["array"]
+    if verify and hashlib.sha256(path.read_bytes()).hexdigest() != manifest["sha256"]:
+        raise ValueError(f"Checksum mismatch for {path}.")
+    block = np.load(path, mmap_mode="r", allow_pickle=False)
+    if list(block.shape) != manifest["shape"]:
+        raise ValueError(f"{path} has shape {block.shape}, manifest says {manifest['shape']}.")
+    row = {f: block[i] for i, f in enumerate(manifest["fields"])}
+    return RegistryModel(axes=list(manifest["axes"]), coef=row["coef"], intercept=row["intercept"],
+                         minc=row["MinC"], maxc=row["MaxC"],
+                         t_long=row["T_long_steps"].astype(np.int64), t_short=row["T_short_steps"].astype(np.int64),
+                         dt_seconds=row["dt_seconds"], time0=float(manifest["time0"]),
+                         version=manifest.get("version") or vdir.name, version_dir=vdir, format=FORMAT)
+
+def _load_legacy(vdir: Path) -> RegistryModel:
+    """models.pkl (joblib) + thresholds.json + prep_stats.json, as written before the manifest."""
+    import joblib
+    models = joblib.load(vdir / "models.pkl")
+    with open(vdir / "thresholds.json") as f:
+        th = json.load(f)
+    with open(vdir / "prep_stats.json") as f:
+        time0 = float(json.load(f)["time0"])
+    axes = [k for k in models if k in th]
+    col = lambda get: np.asarray([get(k) for k in axes], dtype=np.float64)
+    return RegistryModel(axes=axes,
+                         coef=col(lambda k: models[k]["coef"]), intercept=col(lambda k: models[k]["intercept"]),
+                         minc=col(lambda k: th[k]["MinC"]), maxc=col(lambda k: th[k]["MaxC"]),
+                         t_long=col(lambda k: th[k]["T_long_steps"]).astype(np.int64),
+                         t_short=col(lambda k: th[k]["T_short_steps"]).astype(np.int64),
+                         dt_seconds=col(lambda k: th[k].get("dt_seconds", np.nan)),
+                         time0=time0, version=vdir.name, version_dir=vdir, format="legacy-pkl")
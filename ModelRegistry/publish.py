@@ -0,0 +1,174 @@
+# Atomic, concurrent-safe publishing primitives for a registry root:
+#   blobs/<aa>/<sha256>    content-addressed, read-only artifact files; identical files across
+#                          versions are stored once and hardlinked into each version
+#   .versions/<tag>.<id>/  immutable version dirs, staged elsewhere and renamed in complete
+#   <tag>, latest          symlinks to a version dir, swapped with os.replace, so readers see the
+#                          old or the new version and never a partial one. Where symlinks are not
+#                          available, `<name>.pointer` files (same swap) hold the target instead.
+#   .lock                  inter-process lock (fcntl / msvcrt) held while publishing
+#   .retired/<dir>         marker (mtime = when the version lost its last pointer); superseded
+#                          versions are kept for a grace period, since readers resolve without the lock
+# Always open versions through `resolve_version`, which follows either kind of pointer.
+
+from pathlib import Path
+import hashlib, os, shutil, stat, sys, time, uuid
+
+BLOBS, VERSIONS, LOCK, RETIRED = "blobs", ".versions", ".lock", ".retired"
+POINTER_SUFFIX = ".pointer"
+
+class FileLock:
+    """Exclusive inter-process lock on a file (blocking), usable as a context manager."""
+    def __init__(self, path):
+        self.path = Path(path)
+        self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if sys.platform == "win32":
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)  # retries for ~10s, then raises
+                    break
+                except OSError:
+                    continue
+        else:
+            import fcntl
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+def fsync_file(path) -> None:
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())
+
+def fsync_dir(path) -> None:
+    """Persist a directory's entries (renames, links); a no-op where dirs cannot be opened."""
+    if sys.platform == "win32":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def sha256_file(path, bufsize: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(bufsize):
+            h.update(chunk)
+    return h.hexdigest()
+
+def intern_file(root, path) -> bool:
+    """Move a staged file's content into the blob store and hardlink it back in place.
+    Returns True if an identical blob already existed (deduplicated). Call under the lock.
+    Where hardlinks are unsupported the staged file is simply kept as a private copy."""
+    root, path = Path(root), Path(path)
+    digest = sha256_file(path)
+    blob = root / BLOBS / digest[:2] / digest
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    existed = blob.exists()
+    try:
+        if existed:
+            tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}")
+            os.link(blob, tmp)
+            os.replace(tmp, path)
+        else:
+            os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)  # shared inode: never edit in place
+            os.link(path, blob)
+            fsync_dir(blob.parent)
+    except OSError:
+        return False
+    return existed
+
+def swap_pointer(root, name: str, target) -> None:
+    """Atomically point `root/name` at `target` (a dir under root)."""
+    root = Path(root)
+    rel = os.path.relpath(target, root)
+    dest = root / name
+    tmp = root / f".{name}.{uuid.uuid4().hex[:8]}"
+    try:
+        tmp.symlink_to(rel, target_is_directory=True)
+    except OSError:
+        # No symlink support: pointer file, swapped the same way
+        with open(tmp, "w") as f:
+            f.write(rel)
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, root / (name + POINTER_SUFFIX))
+        fsync_dir(root)
+        return
+    if dest.is_dir() and not dest.is_symlink():
+        # Version dir or copied `latest` from the pre-pointer layout: move it aside once
+        aside = root / VERSIONS / f"{name}.legacy-{uuid.uuid4().hex[:8]}"
+        aside.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(dest, aside)
+    os.replace(tmp, dest)
+    (root / (name + POINTER_SUFFIX)).unlink(missing_ok=True)
+    fsync_dir(root)
+
+def resolve_version(root, name: str) -> Path:
+    """Directory a version name currently refers to (symlink, pointer file or plain dir)."""
+    root = Path(root)
+    p = root / name
+    if p.exists():
+        return Path(os.path.realpath(p))
+    ptr = root / (name + POINTER_SUFFIX)
+    if ptr.exists():
+        return root / ptr.read_text().strip()
+    return p  # missing; callers get the usual FileNotFoundError on open
+
+def collect_garbage(root, grace_s: float = 300.0) -> None:
+    """Drop version dirs no pointer has referred to for `grace_s` seconds, and blobs no version
+    links to. A reader that resolved `latest` just before a swap can still open the superseded
+    version until its grace period ends. Call under the lock."""
+    root = Path(root)
+    vroot = root / VERSIONS
+    if not vroot.is_dir():
+        return
+    live = set()
+    for entry in root.iterdir():
+        if entry.is_symlink():
+            live.add(Path(os.path.realpath(entry)))
+        elif entry.name.endswith(POINTER_SUFFIX):
+            live.add(Path(os.path.realpath(root / entry.read_text().strip())))
+    retired = root / RETIRED
+    now = time.time()
+    for vdir in vroot.iterdir():
+        marker = retired / vdir.name
+        if Path(os.path.realpath(vdir)) in live:
+            marker.unlink(missing_ok=True)
+        elif not marker.exists():
+            retired.mkdir(exist_ok=True)
+            marker.touch()
+        elif now - marker.stat().st_mtime >= grace_s:
+            rmtree(vdir)
+            marker.unlink()
+    if retired.is_dir():
+        for marker in retired.iterdir():
+            if not (vroot / marker.name).exists():
+                marker.unlink()
+    broot = root / BLOBS
+    if broot.is_dir():
+        for blob in broot.glob("*/*"):
+            if blob.stat().st_nlink <= 1:
+                blob.unlink()
+
+def rmtree(path) -> None:
+    """shutil.rmtree that also removes read-only (interned) files on Windows."""
+    def _retry(fn, p, _exc):
+        os.chmod(p, stat.S_IWRITE)
+        fn(p)
+    shutil.rmtree(path, onerror=_retry)
@@ -2,44 +2,82 @@
 # In existing tasks, it was saved as a variable such as model, not a file.
 
 from pathlib import Path
-from joblib import dump
-import yaml, shutil, datetime as dt
+from joblib import load
+import json, os, yaml, shutil, uuid, datetime as dt
+
+from ModelRegistry.columnar import write_columnar
+from ModelRegistry.publish import (FileLock, LOCK, VERSIONS, collect_garbage, fsync_dir, fsync_file,
+                                   intern_file, rmtree, swap_pointer)
 
 class ModelRegistry:
-    """Stores versioned ML artifacts and maintains a `latest` pointer."""
-    def __init__(self, root_dir: str):
+    """Stores versioned ML artifacts and maintains a `latest` pointer.
+
+    A version is staged in a temp dir, fsynced, and published by renaming it under `.versions/`
+    and atomically swapping the `<version_tag>` and `latest` pointers (see ModelRegistry/publish.py).
+    Files are content-addressed, so identical artifacts across versions are stored once, and a
+    file lock makes concurrent `save` calls (e.g. parallel pipeline runs) safe. Superseded
+    versions stay on disk for `gc_grace_s` seconds, as readers resolve pointers without the lock.
+    """
+    def __init__(self, root_dir: str, gc_grace_s: float = 300.0):
         self.root = Path(root_dir)
+        self.gc_grace_s = gc_grace_s
         self.root.mkdir(parents=True, exist_ok=True)
 
     def save(self, version_tag: str, models_pkl_path: str,
              prep_stats_path: str, thresholds_path: str,
-             metrics_df, meta: dict) -> None:
-        vdir = self.root / version_tag
-        if vdir.exists():
-            shutil.rmtree(vdir)
-        vdir.mkdir(parents=True)
+             metrics_df, meta: dict, stats_path: str | None = None,
+             profile: dict | None = None, update_latest: bool = True) -> Path:
+        """Publish a version; returns its (immutable) directory. `profile` (the pipeline's
+        per-stage measurements) is stored as profile.json. With `update_latest=False` only the
+        `<version_tag>` pointer moves (batch jobs must not repoint the shared `latest`)."""
+        staging = self.root / ".staging" / f"{version_tag}.{uuid.uuid4().hex[:12]}"
+        staging.mkdir(parents=True)
+        try:
+            self._stage(staging, version_tag, models_pkl_path, prep_stats_path, thresholds_path,
+                        metrics_df, meta, stats_path, profile)
+            with FileLock(self.root / LOCK):
+                for path in sorted(staging.iterdir()):
+                    intern_file(self.root, path)
+                fsync_dir(staging)
+                vdir = self.root / VERSIONS / staging.name
+                vdir.parent.mkdir(exist_ok=True)
+                os.replace(staging, vdir)
+                fsync_dir(vdir.parent)
+                swap_pointer(self.root, version_tag, vdir)
+                if update_latest:
+                    swap_pointer(self.root, "latest", vdir)
+                collect_garbage(self.root, self.gc_grace_s)
+        finally:
+            if staging.exists():
+                rmtree(staging)
+        return vdir
 
+    def _stage(self, vdir: Path, version_tag: str, models_pkl_path: str, prep_stats_path: str,
+               thresholds_path: str, metrics_df, meta: dict, stats_path: str | None,
+               profile: dict | None = None) -> None:
         # Copy artifacts
-        shutil.copy2(models_pkl_path, vdir / "models.pkl")
-        shutil.copy2(prep_stats_path,  vdir / "prep_stats.json")
-        shutil.copy2(thresholds_path,  vdir / "thresholds.json")
+        shutil.copyfile(models_pkl_path, vdir / "models.pkl")
+        shutil.copyfile(prep_stats_path,  vdir / "prep_stats.json")
+        shutil.copyfile(thresholds_path,  vdir / "thresholds.json")
+        if stats_path:
+            shutil.copyfile(stats_path,   vdir / "axis_stats.json")
         metrics_df.to_csv(vdir / "metrics.csv", index=False)
 
+        # Serving format: memory-mappable model.npy + manifest.json (models.pkl kept for older readers)
+        with open(thresholds_path) as f:
+            thresholds = json.load(f)
+        with open(prep_stats_path) as f:
+            time0 = json.load(f)["time0"]
+        write_columnar(vdir, load(models_pkl_path), thresholds, time0, version=version_tag)
+
         # Meta
         meta = dict(meta)
         meta.setdefault("saved_at", dt.datetime.utcnow().isoformat() + "Z")
         with open(vdir / "meta.yaml", "w") as f:
             yaml.safe_dump(meta, f, sort_keys=False)
+        if profile is not None:
+            with open(vdir / "profile.json", "w") as f:
+                json.dump(profile, f, indent=2)
 
-        # Update 'latest' pointer (symlink if possible, else copy)
-        latest = self.root / "latest"
-        if latest.exists() or latest.is_symlink():
-            try:
-                latest.unlink()
-            except Exception:
-                shutil.rmtree(latest, ignore_errors=True)
-        try:
-            latest.symlink_to(vdir, target_is_directory=True)
-        except Exception:
-            # Platforms without symlink permissions
-            shutil.copytree(vdir, latest)
+        for path in vdir.iterdir():
+            fsync_file(path)
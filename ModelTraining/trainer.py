@@ -2,37 +2,207 @@
 # Uses those coefficients to add predictions and residuals to a Dataframe
 # The existing code is easy to initialize because it only stores the value in a variable called model. -> Save the value to a file.
 # Exact-zero filtering - same as privios codebase
+# All axes are fitted at once in closed form from masked, centered sums (no per-axis sklearn objects).
+# Those sums are kept as mergeable statistics so new batches update the fit without re-reading history.
+# Predictions come back as columnar (n, n_axes) blocks (`predict_arrays`); the widened DataFrame of
+# `predict` is only a view over them.
 
-from sklearn.linear_model import LinearRegression
 import numpy as np, pandas as pd
+from dataclasses import dataclass
 from pathlib import Path
 import joblib, json
 
+FIT_BLOCK_ROWS = 1 << 18  # rows per masked pass in AxisStats.from_frame
+
+@dataclass
+class AxisStats:
+    """Mergeable per-axis sufficient statistics for y = a*t + b (centered, Chan/Welford form).
+
+    n: samples used, mean_t / mean_y: their means,
+    m2_t: sum((t - mean_t)^2), c_ty: sum((t - mean_t) * (y - mean_y)).
+    Statistics of disjoint batches or shards combine exactly with `merge`.
+    """
+    axes: list[str]
+    n: np.ndarray
+    mean_t: np.ndarray
+    mean_y: np.ndarray
+    m2_t: np.ndarray
+    c_ty: np.ndarray
+
+    @classmethod
+    def from_block(cls, t: np.ndarray, Y: np.ndarray, axes: list[str]) -> "AxisStats":
+        """Statistics for every column of Y against t, in one masked pass.
+
+        Rows where an axis is exactly zero or non-finite are excluded for that axis only
+        (to match the notebook). t is shifted to its mean before the sums are formed, so
+        large time magnitudes do not cancel out the second moments.
+        """
+        mask = np.isfinite(Y) & (Y != 0)
+        w = mask.astype(np.float64)
+        n = w.sum(axis=0)
+        Yz = np.where(mask, Y, 0.0)
+
+        # Masked sums for all axes via matrix-vector products
+        shift = float(t.mean()) if t.size else 0.0
+        tc = t - shift
+        St, Stt = tc @ w, (tc * tc) @ w
+        Sy, Sty = Yz.sum(axis=0), tc @ Yz
+
+        n_safe = np.maximum(n, 1.0)
+        return cls(axes=list(axes), n=n,
+                   mean_t=np.where(n > 0, St / n_safe + shift, 0.0),
+                   mean_y=Sy / n_safe,
+                   m2_t=Stt - St * St / n_safe,
+                   c_ty=Sty - St * Sy / n_safe)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, axes: list[str]) -> "AxisStats":
+        """Statistics of a whole frame, merged from FIT_BLOCK_ROWS-row blocks (bounded temporaries)."""
+        t = df["time_s"].to_numpy(dtype=np.float64)
+        cols = df[axes]
+        out = None
+        for i in range(0, max(len(df), 1), FIT_BLOCK_ROWS):
+            part = cls.from_block(t[i:i + FIT_BLOCK_ROWS],
+                                  cols.iloc[i:i + FIT_BLOCK_ROWS].to_numpy(dtype=np.float64), axes)
+            out = part if out is None else out.merge(part)
+        return out
+
+    def merge(self, other: "AxisStats") -> "AxisStats":
+        """Combine with statistics of another, disjoint set of rows (axes matched by name)."""
+        axes = self.axes + [k for k in other.axes if k not in self.axes]
+        a, b = self._aligned(axes), other._aligned(axes)
+        n = a.n + b.n
+        n_safe = np.maximum(n, 1.0)
+        d_t = b.mean_t - a.mean_t
+        d_y = b.mean_y - a.mean_y
+        f = a.n * b.n / n_safe
+        return AxisStats(axes=axes, n=n,
+                         mean_t=a.mean_t + d_t * b.n / n_safe,
+                         mean_y=a.mean_y + d_y * b.n / n_safe,
+                         m2_t=a.m2_t + b.m2_t + d_t * d_t * f,
+                         c_ty=a.c_ty + b.c_ty + d_t * d_y * f)
+
+    def _aligned(self, axes: list[str]) -> "AxisStats":
+        """Same statistics laid out in `axes` order; unknown axes get empty (n=0) entries."""
+        idx = {k: i for i, k in enumerate(self.axes)}
+        take = np.asarray([idx.get(k, -1) for k in axes], dtype=np.intp)
+        pick = lambda v: np.where(take >= 0, v[take] if len(v) else 0.0, 0.0)
+        return AxisStats(axes=list(axes), n=pick(self.n), mean_t=pick(self.mean_t),
+                         mean_y=pick(self.mean_y), m2_t=pick(self.m2_t), c_ty=pick(self.c_ty))
+
+    def solve(self) -> tuple[np.ndarray, np.ndarray]:
+        """Least-squares (coef, intercept) per axis."""
+        if (self.n == 0).any():
+            empty = [k for k, c in zip(self.axes, self.n) if c == 0]
+            raise ValueError(f"No finite non-zero samples to fit for axes: {empty}")
+        coef = np.divide(self.c_ty, self.m2_t, out=np.zeros_like(self.c_ty), where=self.m2_t > 0)
+        return coef, self.mean_y - coef * self.mean_t
+
+    def to_json(self):
+        fields = ("n", "mean_t", "mean_y", "m2_t", "c_ty")
+        return {k: {f: float(getattr(self, f)[i]) for f in fields} for i, k in enumerate(self.axes)}
+
+    @classmethod
+    def from_json(cls, d: dict) -> "AxisStats":
+        axes = list(d)
+        col = lambda f: np.asarray([d[k][f] for k in axes], dtype=np.float64)
+        return cls(axes=axes, n=col("n"), mean_t=col("mean_t"), mean_y=col("mean_y"),
+                   m2_t=col("m2_t"), c_ty=col("c_ty"))
+
+@dataclass
+class Prediction:
+    """Columnar model output for a frame.
+
+    pred / res: (n, n_axes) float64 blocks in `axes` order, column-contiguous (each axis is one
+    contiguous run, and pandas stores a 2-D block that way too). `frame` is the input frame,
+    referenced, not copied; t is its time_s column.
+    """
+    axes: list[str]
+    t: np.ndarray
+    pred: np.ndarray
+    res: np.ndarray
+    frame: pd.DataFrame
+
+    def __len__(self) -> int:
+        return self.t.size
+
+    def column(self, k: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(y, pred, res) arrays for one axis."""
+        j = self.axes.index(k)
+        return self.frame[k].to_numpy(dtype=np.float64), self.pred[:, j], self.res[:, j]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Input columns followed by <axis>_pred, <axis>_res per axis (the layout `predict` always had),
+        sharing memory with the blocks through read-only views, so writes cannot reach pred / res
+        (copy the frame before modifying it)."""
+        pred, res = _readonly(self.pred), _readonly(self.res)
+        cols = {}
+        for j, k in enumerate(self.axes):
+            cols[f"{k}_pred"], cols[f"{k}_res"] = pred[:, j], res[:, j]
+        return pd.concat([self.frame, pd.DataFrame(cols, index=self.frame.index, copy=False)], axis=1)
+
+def _readonly(a: np.ndarray) -> np.ndarray:
+    """View of `a` that cannot be written through (`a` itself stays writeable)."""
+    v = a.view()
+    v.flags.writeable = False
+    return v
+
 class LinearAxisTrainer:
     def __init__(self, out_dir: str):
         self.out_dir = Path(out_dir); self.out_dir.mkdir(parents=True, exist_ok=True)
         self.models = {}
+        self.stats: AxisStats | None = None
 
-        # For each axis train with linerregression and save coefficient & intercept in models.pkl.
+        # For each axis fit y = a*t + b and save coefficient & intercept in models.pkl
+        # (plus the mergeable statistics in axis_stats.json for later partial_fit calls).
     def fit(self, train_df: pd.DataFrame, axes: list[str]) -> None:
-        X_full = train_df[["time_s"]].values
-        for k in axes:
-            y = train_df[k].values
-            # EXCLUDE exact zeros for this axis (to match the notebook)
-            mask = np.isfinite(y) & (y != 0)
-            X = X_full[mask]
-            y = y[mask]
-            lr = LinearRegression().fit(X, y)
-            self.models[k] = {"coef": float(lr.coef_[0]), "intercept": float(lr.intercept_)}
+        self._solve_and_save(AxisStats.from_frame(train_df, axes))
+
+        # Fold a new batch / time slice into the saved statistics and refresh the coefficients.
+        # `batch_df` must use the same time origin (prep_stats.json time0) as the original fit.
+    def partial_fit(self, batch_df: pd.DataFrame, axes: list[str]) -> None:
+        if self.stats is None:
+            self.stats = self.load_stats(self.out_dir / "axis_stats.json")
+        self._solve_and_save(self.stats.merge(AxisStats.from_frame(batch_df, axes)))
+
+    @staticmethod
+    def load_stats(path) -> AxisStats:
+        with open(path) as f:
+            return AxisStats.from_json(json.load(f))
+
+    def _solve_and_save(self, stats: AxisStats) -> None:
+        coef, intercept = stats.solve()
+        self.stats = stats
+        self.models = {k: {"coef": float(a), "intercept": float(b)}
+                       for k, a, b in zip(stats.axes, coef, intercept)}
 
         joblib.dump(self.models, self.out_dir / "models.pkl")
+        with open(self.out_dir / "axis_stats.json", "w") as f:
+            json.dump(stats.to_json(), f, indent=2)
 
-        # Calculate using the saved coef & intercept values ​​and add <axis>_pred, <axis>_res columns.
+        # Calculate using the saved coef & intercept values and return <axis>_pred, <axis>_res columns
+        # (DataFrame view over `predict_arrays`; use that directly to avoid widening frames).
     def predict(self, df: pd.DataFrame) -> pd.DataFrame:
-        out = df.copy()
-        t = out[["time_s"]].values
-        for k, m in self.models.items():
-            yhat = m["coef"] * t.ravel() + m["intercept"]
-            out[f"{k}_pred"] = yhat
-            out[f"{k}_res"]  = out[k].values - yhat
-        return out
+        return self.predict_arrays(df).to_frame()
+
+        # All axes at once: pred = coef * t + intercept, res = y - pred, written into (n, n_axes) blocks.
+        # `out=(pred_buf, res_buf)` reuses buffers with at least n rows (e.g. across chunks).
+    def predict_arrays(self, df: pd.DataFrame, out: tuple[np.ndarray, np.ndarray] | None = None) -> Prediction:
+        axes = list(self.models)
+        n, k = len(df), len(axes)
+        if out is None:
+            pred, res = np.empty((n, k), order="F"), np.empty((n, k), order="F")
+        else:
+            pred, res = out
+            if pred.shape[0] < n or res.shape[0] < n or pred.shape[1:] != (k,) or res.shape[1:] != (k,):
+                raise ValueError(f"out buffers must be (>= {n}, {k}), got {pred.shape} and {res.shape}.")
+            pred, res = pred[:n], res[:n]
+        coef = np.asarray([m["coef"] for m in self.models.values()], dtype=np.float64)
+        intercept = np.asarray([m["intercept"] for m in self.models.values()], dtype=np.float64)
+
+        t = df["time_s"].to_numpy(dtype=np.float64)
+        np.multiply(t[:, None], coef, out=pred)
+        np.add(pred, intercept, out=pred)
+        for j, key in enumerate(axes):
+            np.subtract(df[key].to_numpy(dtype=np.float64), pred[:, j], out=res[:, j])
+        return Prediction(axes, t, pred, res, df)
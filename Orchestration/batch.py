@@ -0,0 +1,118 @@
+# Batch mode: run many pipelines (one per machine table / axis group) from one process.
+# Jobs come from a `jobs:` list in a config, each entry deep-merged over the rest of that file,
+# or from a glob of config files (one job per file, named after it). Jobs run on a bounded
+# process pool whose workers import the pipeline once and are reused across jobs; DBExtractor
+# keeps one pooled engine per DB URL per worker. So N jobs pay for `max_workers` interpreter
+# start-ups and connection pools instead of N.
+# Every job gets its own work dir, plot dir and cache dir (under <work_dir>/jobs/<name> and
+# <cache.dir>/jobs/<name>) and publishes to its own registry version `<version_tag>-<name>`;
+# a job entry may still set any of these explicitly.
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import copy, glob, os, time, traceback
+
+from Orchestration.orchestrator import Orchestrator, load_config
+
+@dataclass
+class JobResult:
+    """Outcome of one batch job (small and picklable; the full metrics stay in the registry)."""
+    name: str
+    ok: bool
+    seconds: float
+    version_tag: str
+    artifact_dir: str = ""
+    train_shape: tuple = ()
+    r2: Dict[str, float] = field(default_factory=dict)   # axis → R^2 on the training window
+    stages: Dict[str, str] = field(default_factory=dict)
+    peak_rss_mb: float = 0.0
+    error: str = ""
+
+def load_jobs(paths: Sequence[str]) -> List[Tuple[str, dict]]:
+    """(name, config) per job from config files; a file with a `jobs:` list expands to its entries."""
+    jobs = []
+    for path in paths:
+        cfg = load_config(path)
+        if cfg.get("jobs"):
+            jobs.extend(expand_jobs(cfg))
+        else:
+            jobs.append((Path(path).stem, isolate(Path(path).stem, cfg)))
+    names = [name for name, _ in jobs]
+    dups = sorted({n for n in names if names.count(n) > 1})
+    if dups:
+        raise ValueError(f"Duplicate job names: {dups}.")
+    return jobs
+
+def glob_jobs(pattern: str) -> List[Tuple[str, dict]]:
+    """Jobs from every config file matching `pattern` (sorted)."""
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        raise FileNotFoundError(f"No config files match {pattern!r}.")
+    return load_jobs(paths)
+
+def expand_jobs(cfg: dict) -> List[Tuple[str, dict]]:
+    """Per-job configs from a config with a `jobs:` list of overrides."""
+    base = {k: v for k, v in cfg.items() if k not in ("jobs", "batch")}
+    jobs = []
+    for i, entry in enumerate(cfg["jobs"]):
+        entry = dict(entry)
+        name = str(entry.pop("name", f"job{i:03d}"))
+        jobs.append((name, deep_merge(isolate(name, base), entry)))
+    return jobs
+
+def isolate(name: str, cfg: dict) -> dict:
+    """Copy of `cfg` whose outputs cannot collide with other jobs'."""
+    cfg = copy.deepcopy(cfg)
+    work_dir = os.path.join(cfg.get("work_dir", "out"), "jobs", name)
+    cfg["work_dir"] = work_dir
+    cfg.setdefault("plots", {})["dir"] = work_dir
+    cache = cfg.setdefault("cache", {})
+    cache["dir"] = os.path.join(cache.get("dir", ".cache"), "jobs", name)
+    reg = cfg["registry"]
+    reg["version_tag"] = f"{reg['version_tag']}-{name}"
+    reg["update_latest"] = False  # `latest` is what serving follows; a job only moves its own tag
+    return cfg
+
+def deep_merge(base: dict, override: dict) -> dict:
+    """`override` merged into a copy of `base`; nested dicts merge, everything else replaces."""
+    out = copy.deepcopy(base)
+    for k, v in override.items():
+        out[k] = deep_merge(out[k], v) if isinstance(v, dict) and isinstance(out.get(k), dict) else copy.deepcopy(v)
+    return out
+
+def run_batch(jobs: Sequence[Tuple[str, dict]], max_workers: Optional[int] = None,
+              force: bool = False, from_stage: Optional[str] = None,
+              profile: bool = False) -> List[JobResult]:
+    """Run jobs on at most `max_workers` processes (default: CPU count); results in job order.
+    A failing job is reported in its JobResult and does not stop the others."""
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(jobs)))
+    if workers == 1:
+        return [run_job(name, cfg, force, from_stage, profile) for name, cfg in jobs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker) as pool:
+        futures = [pool.submit(run_job, name, cfg, force, from_stage, profile) for name, cfg in jobs]
+        return [f.result() for f in futures]
+
+def run_job(name: str, cfg: dict, force: bool = False, from_stage: Optional[str] = None,
+            profile: bool = False) -> JobResult:
+    """Run one pipeline config, capturing any error (the stage profile lands in its registry version)."""
+    t0 = time.perf_counter()
+    tag = cfg["registry"]["version_tag"]
+    try:
+        res = Orchestrator(cfg).run_all(force=force, from_stage=from_stage, profile=profile)
+    except Exception as e:
+        return JobResult(name, False, time.perf_counter() - t0, tag,
+                         error="".join(traceback.format_exception_only(type(e), e)).strip())
+    return JobResult(name, True, time.perf_counter() - t0, tag,
+                     artifact_dir=res.artifact_dir, train_shape=tuple(res.train_shape),
+                     r2={str(k): float(v) for k, v in zip(res.metrics["axis"], res.metrics["r2"])},
+                     stages=res.stages, peak_rss_mb=res.profile.get("peak_rss_mb", 0.0))
+
+def _warm_worker() -> None:
+    """Pool initializer: import the heavy pipeline modules once per worker, before the first job
+    (already loaded when the worker is forked from a parent that imported them)."""
+    # The orchestrator imports stages lazily; workers will run them all, so load them up front
+    import DataExtractionAnalysis.extractor, DataExtractionAnalysis.cache, DataExtractionAnalysis.analyzer  # noqa: F401
+    import DataPreparation.preprocessor, ModelTraining.trainer, ModelEvaluation.evaluator  # noqa: F401
+    import Thresholding.calibrator, ModelRegistry.registry  # noqa: F401
@@ -1,19 +1,19 @@
 # Load 'config.yaml' file -> High level pipeline runner
 # Extract → Analyze → Prepare → Select Model → Train/Predict → Evaluate/Plot → Calibrate Thresholds → Register Artifacts
+# Stage modules are imported inside the methods that run them, so a run only pays for the stages it
+# executes (SQLAlchemy / dotenv on extraction, matplotlib when plots are drawn; cached stages import neither).
 
 import os, yaml, pandas as pd
-import io
-from dataclasses import dataclass
-from typing import Any, Dict
-
-from DataExtractionAnalysis.extractor import DBExtractor, DBConfig
-from DataExtractionAnalysis.analyzer  import Analyzer
-from DataPreparation.preprocessor     import Preprocessor
-from ModelSelection.selector          import ModelSelector
-from ModelTraining.trainer            import LinearAxisTrainer
-from ModelEvaluation.evaluator        import Evaluator
-from Thresholding.calibrator          import ThresholdCalibrator
-from ModelRegistry.registry           import ModelRegistry
+import io, hashlib, copy
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
+
+from Orchestration.stage_cache        import StageCache
+from Orchestration.profiler           import Profiler
+
+if TYPE_CHECKING:
+    from ModelEvaluation.evaluator    import Evaluator
+    from ModelTraining.trainer        import Prediction
 
 @dataclass
 class OrchestrationResult:
@@ -22,19 +22,25 @@ class OrchestrationResult:
     metrics: pd.DataFrame
     thresholds: Dict[str, Any]
     artifact_dir: str
+    stages: Dict[str, str] = field(default_factory=dict)   # stage → "run" | "cached"
+    profile: Dict[str, Any] = field(default_factory=dict)  # per-stage measurements (profile.json schema)
+
+def load_config(config_path: str) -> dict:
+    """Read a pipeline config YAML."""
+    try:
+        with io.open(config_path, "r", encoding="utf-8") as f:
+            content = f.read()
+    except UnicodeDecodeError:
+        # Fallback for UTF-8 with BOM or mixed encodings
+        with io.open(config_path, "r", encoding="utf-8-sig") as f:
+            content = f.read()
+    return yaml.safe_load(content)
 
 class Orchestrator:
-    """High-level pipeline runner that mirrors the ML box in the diagram."""
-    def __init__(self, config_path: str = "config.yaml"):
-        try:
-            with io.open(config_path, "r", encoding="utf-8") as f:
-                content = f.read()
-        except UnicodeDecodeError:
-            # Fallback for UTF-8 with BOM or mixed encodings
-            with io.open(config_path, "r", encoding="utf-8-sig") as f:
-                content = f.read()
-
-        self.cfg = yaml.safe_load(content)
+    """High-level pipeline runner that mirrors the ML box in the diagram.
+    `config` is a path to a config YAML or an already-loaded config dict (batch jobs)."""
+    def __init__(self, config: Union[str, dict] = "config.yaml"):
+        self.cfg = copy.deepcopy(config) if isinstance(config, dict) else load_config(config)
 
         self.DB_URL_ENV = self.cfg["database"]["url_env"]
         self.TABLE      = self.cfg["data"]["table"]
@@ -44,70 +50,222 @@ class Orchestrator:
         self.T1         = self.cfg["data"]["train_end"]
         self.AXIS_ID    = self.cfg["data"].get("axis_id_col")
         self.VALUE_COL  = self.cfg["data"].get("value_col")
+        self.CHUNKSIZE  = self.cfg["data"].get("chunksize")
+        self.PIVOT_DUPS = self.cfg["data"].get("pivot_duplicates", "raise")
+        self.PIVOT_MISS = self.cfg["data"].get("pivot_missing", "nan")
+        self.DROP_ZEROS = bool(self.cfg["data"].get("drop_zeros", False))
+        self.PUSHDOWN   = bool(self.cfg["data"].get("pushdown", True))
+        self.RESAMPLE_S = self.cfg["prep"].get("resample_seconds")
+        self.RESAMPLE_AGG = self.cfg["prep"].get("resample_agg", "mean")
         self.TH_POLICY  = self.cfg.get("thresholds", {})
 
         self.PLOT_DIR   = self.cfg["plots"]["dir"]
+        self.PLOT_CFG   = self.cfg["plots"]
         self.REG_DIR    = self.cfg["registry"]["root_dir"]
         self.VER_TAG    = self.cfg["registry"]["version_tag"]
         self.MODEL_TYPE = self.cfg["model"]["type"]
+        self.CACHE_CFG  = self.cfg.get("cache") or {}
+        self.WORK_DIR   = self.cfg.get("work_dir", "out")   # intermediate models/stats/thresholds
 
-    def run_all(self) -> OrchestrationResult:
-        # 1) Extract
-        ext = DBExtractor(DBConfig(url_env=self.DB_URL_ENV))
-        axis_mode_long = all(isinstance(a, (int, float)) for a in self.AXES)
-        if axis_mode_long:
-            raw = ext.load_window(self.TABLE, self.TIME_COL, self.AXES, self.T0, self.T1,
-                                  axis_id_col=self.AXIS_ID, value_col=self.VALUE_COL)
-        else:
-            raw = ext.load_window(self.TABLE, self.TIME_COL, self.AXES, self.T0, self.T1)
+    def run_all(self, force: bool = False, from_stage: Optional[str] = None,
+                profile: bool = False) -> OrchestrationResult:
+        """Run the pipeline. With `cache.stages` enabled, a stage re-executes only when its config
+        subsection or an upstream output changed; `force` re-runs everything and `from_stage`
+        re-runs that stage and all later ones. Every stage is measured (see Orchestration/profiler.py);
+        `profile` adds cProfile / tracemalloc capture per stage."""
+        stages = StageCache(os.path.join(self.CACHE_CFG.get("dir", ".cache"), "stages"),
+                            enabled=bool(self.CACHE_CFG.get("stages")), force=force, from_stage=from_stage,
+                            max_bytes=int(self.CACHE_CFG.get("stages_max_mb", 2048)) * 2**20)
+        prof = Profiler(deep=profile, dump_dir=self._work("profile") if profile else None)
+        self._db_read = (0, 0)
 
-        ana = Analyzer()
-        eda = ana.basic_profile(raw, self.TIME_COL)
+        def run(stage, config, upstream, fn, files=(), rows_in=None):
+            with prof.measure(stage) as rec:
+                out, h = stages.run(stage, config, upstream, fn, files=files)
+                rec.status, rec.rows_in = stages.status[stage], rows_in
+            return out, h, rec
+
+        # 1) Extract
+        raw, h_raw, rec = run("extract", self._extract_config(), [], self._extract)
+        rec.rows_out = len(raw)
+        rec.db_rows, rec.db_bytes = self._db_read
+        eda, h_eda, _ = run("analyze", {}, [h_raw], lambda: self._analyze(raw), rows_in=len(raw))
 
         # 2) Prepare
-        prep = Preprocessor(out_dir="out")
-        train_df = prep.fit_transform(raw, self.TIME_COL,
-                                      [c for c in raw.columns if c != self.TIME_COL],
-                                      interpolate=self.cfg["prep"]["interpolate"])
+        train_df, h_train, rec = run("prepare", self.cfg["prep"], [h_raw], lambda: self._prepare(raw),
+                                     files=[self._work("prep_stats.json")], rows_in=len(raw))
+        rec.rows_out = len(train_df)
+        raw_shape = raw.shape
+        del raw  # not needed past this point; frees the extracted window before training
 
         # 3) Select
+        from ModelSelection.selector import ModelSelector
         ms = ModelSelector()
         choice = ms.choose(self.MODEL_TYPE)
 
         # 4) Train
-        trainer = LinearAxisTrainer(out_dir="out")
         axes_cols = [c for c in train_df.columns if c != "time_s"]
-        trainer.fit(train_df, axes_cols)
-        pred_train = trainer.predict(train_df)
+        # Only the (n, n_axes) pred/res blocks are stored; the Prediction re-references train_df
+        blocks, h_pred, rec = run("train", self.cfg["model"], [h_train],
+                                  lambda: self._train(train_df, axes_cols),
+                                  files=[self._work("models.pkl"), self._work("axis_stats.json")],
+                                  rows_in=len(train_df))
+        rec.rows_out = len(blocks[0])
+        from ModelTraining.trainer import Prediction
+        pred_train = Prediction(axes_cols, train_df["time_s"].to_numpy(dtype=float), *blocks, train_df)
 
         # 5) Evaluate
-        ev = Evaluator(plot_dir=self.PLOT_DIR)
+        ev = self._evaluator()
+        plot_key = {k: v for k, v in self.PLOT_CFG.items() if k != "n_jobs"}
+        metrics, _, rec = run("evaluate", plot_key, [h_pred],
+                              lambda: self._evaluate(ev, pred_train, axes_cols),
+                              files=[str(p) for p in ev.plot_files(axes_cols)], rows_in=len(pred_train))
+        rec.rows_out = len(metrics)
+
+        # 6) Threshold (pool settings do not change the result, so they are not part of the key).
+        #    Run lengths are counted in rows, so a resampled frame uses the grid step as dt.
+        th_key = {k: v for k, v in self.TH_POLICY.items() if k not in ("n_jobs", "executor")}
+        thresholds, _, rec = run("threshold", th_key, [h_pred, h_eda],
+                                 lambda: self._threshold(pred_train, axes_cols, self.RESAMPLE_S or eda.dt_seconds),
+                                 files=[self._work("thresholds.json")], rows_in=len(pred_train))
+        rec.rows_out = len(thresholds)
+
+        # 7) Registry (cheap copy; always republished). profile.json covers the stages before it.
+        with prof.measure("register") as rec:
+            rec.rows_in = len(metrics)
+            self._register(choice.name, metrics, prof.to_json())
+        stages.status["register"] = "run"
+        return OrchestrationResult(
+            raw_shape=raw_shape,
+            train_shape=train_df.shape,
+            metrics=metrics,
+            thresholds=thresholds,
+            artifact_dir=os.path.join(self.REG_DIR, self.VER_TAG),
+            stages=dict(stages.status),
+            profile=prof.to_json(),
+        )
+
+    def sweep(self, grid=None, holdout_end=None) -> pd.DataFrame:
+        """Threshold-policy sweep (Thresholding/sweep.py): fit on the training window, then calibrate and
+        backtest every policy of `grid` (default `sweep.grid`) on [train_end, holdout_end). Intermediate
+        files go to <work_dir>/sweep/ next to sweep.csv; nothing is registered."""
+        sw_cfg = self.cfg.get("sweep") or {}
+        grid = grid if grid is not None else sw_cfg.get("grid")
+        holdout_end = holdout_end if holdout_end is not None else sw_cfg.get("holdout_end")
+        if not grid or holdout_end is None:
+            raise ValueError("Sweep needs `sweep.grid` and `sweep.holdout_end` in the config.")
+        from DataPreparation.preprocessor import Preprocessor
+        from ModelTraining.trainer import LinearAxisTrainer
+        from Thresholding.sweep import ThresholdSweep
+        out_dir = self._work("sweep")
+
+        raw = self._extract()
+        dt_seconds = self.RESAMPLE_S or self._analyze(raw).dt_seconds
+        axes_cols = [c for c in raw.columns if c != self.TIME_COL]
+        prep = Preprocessor(out_dir=out_dir, resample_seconds=self.RESAMPLE_S, agg=self.RESAMPLE_AGG,
+                            max_gap_seconds=self.cfg["prep"].get("max_gap_seconds"))
+        train_df = prep.fit_transform(raw, self.TIME_COL, axes_cols, interpolate=self.cfg["prep"]["interpolate"])
+        del raw
+        hold_df = prep.transform(self._extract(self.T1, holdout_end), self.TIME_COL, axes_cols,
+                                 interpolate=self.cfg["prep"]["interpolate"])
+        trainer = LinearAxisTrainer(out_dir=out_dir)
+        trainer.fit(train_df, axes_cols)
+
+        policy = {**self.TH_POLICY, **{k: sw_cfg[k] for k in ("n_jobs", "executor") if k in sw_cfg}}
+        return ThresholdSweep(out_dir, policy).run(trainer.predict_arrays(train_df).res,
+                                                   trainer.predict_arrays(hold_df).res,
+                                                   axes_cols, dt_seconds, grid)
+
+    def _work(self, name: str) -> str:
+        return os.path.join(self.WORK_DIR, name)
+
+    def _extract_config(self) -> dict:
+        """What defines the extracted window (the DB URL itself is hashed, never stored)."""
+        from dotenv import load_dotenv
+        load_dotenv()
+        url = os.getenv(self.DB_URL_ENV) or ""
+        return {"database": self.cfg["database"], "data": self.cfg["data"],
+                "resample": [self.RESAMPLE_S, self.RESAMPLE_AGG],
+                "url": hashlib.sha256(url.encode()).hexdigest()}
+
+    def _extract(self, t0=None, t1=None) -> pd.DataFrame:
+        """The configured training window, or [t0, t1) with the same schema / prep pushdown settings."""
+        t0 = self.T0 if t0 is None else t0
+        t1 = self.T1 if t1 is None else t1
+        from DataExtractionAnalysis.extractor import DBExtractor, DBConfig
+        from DataExtractionAnalysis.cache import ExtractionCache
+        ext = DBExtractor(DBConfig(url_env=self.DB_URL_ENV))
+        source = ext
+        if self.CACHE_CFG.get("extract"):
+            cache_dir = os.path.join(self.CACHE_CFG.get("dir", ".cache"), "extract")
+            source = ExtractionCache(ext, cache_dir, int(self.CACHE_CFG.get("extract_max_mb", 2048)) * 2**20)
+        # Resampling and zero filtering run inside the DB query where the dialect allows
+        pushed = dict(chunksize=self.CHUNKSIZE, resample_seconds=self.RESAMPLE_S, agg=self.RESAMPLE_AGG,
+                      drop_zeros=self.DROP_ZEROS, pushdown=self.PUSHDOWN)
+        axis_mode_long = all(isinstance(a, (int, float)) for a in self.AXES)
+        if axis_mode_long:
+            raw = source.load_window(self.TABLE, self.TIME_COL, self.AXES, t0, t1,
+                                     axis_id_col=self.AXIS_ID, value_col=self.VALUE_COL,
+                                     duplicates=self.PIVOT_DUPS, missing=self.PIVOT_MISS, **pushed)
+        else:
+            raw = source.load_window(self.TABLE, self.TIME_COL, self.AXES, t0, t1, **pushed)
+        self._db_read = (ext.rows_read, ext.bytes_read)  # zero when served by the extraction cache
+        return raw
+
+    def _analyze(self, raw: pd.DataFrame):
+        from DataExtractionAnalysis.analyzer import Analyzer
+        return Analyzer().basic_profile(raw, self.TIME_COL)
+
+    def _prepare(self, raw: pd.DataFrame) -> pd.DataFrame:
+        from DataPreparation.preprocessor import Preprocessor
+        prep = Preprocessor(out_dir=self.WORK_DIR, resample_seconds=self.RESAMPLE_S, agg=self.RESAMPLE_AGG,
+                            max_gap_seconds=self.cfg["prep"].get("max_gap_seconds"))
+        return prep.fit_transform(raw, self.TIME_COL,
+                                  [c for c in raw.columns if c != self.TIME_COL],
+                                  interpolate=self.cfg["prep"]["interpolate"])
+
+    def _train(self, train_df: pd.DataFrame, axes_cols: list) -> tuple:
+        from ModelTraining.trainer import LinearAxisTrainer
+        trainer = LinearAxisTrainer(out_dir=self.WORK_DIR)
+        trainer.fit(train_df, axes_cols)
+        p = trainer.predict_arrays(train_df)
+        return p.pred, p.res
+
+    def _evaluator(self) -> "Evaluator":
+        from ModelEvaluation.evaluator import Evaluator
+        return Evaluator(plot_dir=self.PLOT_DIR,
+                         mode=self.PLOT_CFG.get("mode", "eager"),
+                         n_jobs=self.PLOT_CFG.get("n_jobs", 1),
+                         decimate_above=self.PLOT_CFG.get("decimate_above", 200_000))
+
+    def _evaluate(self, ev: "Evaluator", pred_train: "Prediction", axes_cols: list) -> pd.DataFrame:
         metrics = ev.metrics(pred_train, axes_cols)
         ev.plots(pred_train, axes_cols)
+        return metrics
 
-        # 6) Threshold
-        cal = ThresholdCalibrator(out_dir="out", policy=self.TH_POLICY)
-        cal.fit(pred_train, axes_cols, dt_seconds=eda.dt_seconds)
+    def _threshold(self, pred_train: "Prediction", axes_cols: list, dt_seconds: float) -> Dict[str, Any]:
+        from Thresholding.calibrator import ThresholdCalibrator
+        cal = ThresholdCalibrator(out_dir=self.WORK_DIR, policy=self.TH_POLICY)
+        cal.fit_residuals(pred_train.res, axes_cols, dt_seconds=dt_seconds)
+        return cal.th
 
-        # 7) Registry
-        reg = ModelRegistry(root_dir=self.REG_DIR)
+    def _register(self, model_name: str, metrics: pd.DataFrame, profile: Dict[str, Any]) -> None:
+        from ModelRegistry.registry import ModelRegistry
+        reg = ModelRegistry(root_dir=self.REG_DIR,
+                            gc_grace_s=self.cfg["registry"].get("gc_grace_s", 300.0))
         meta = {
-            "model": choice.name,
+            "model": model_name,
             "data": {"table": self.TABLE, "time_range": [self.T0, self.T1], "axes": list(self.AXES)},
-            "prep": {"interpolate": self.cfg["prep"]["interpolate"]},
+            "prep": dict(self.cfg["prep"]),
         }
         reg.save(
             version_tag=self.VER_TAG,
-            models_pkl_path="out/models.pkl",
-            prep_stats_path="out/prep_stats.json",
-            thresholds_path="out/thresholds.json",
+            models_pkl_path=self._work("models.pkl"),
+            prep_stats_path=self._work("prep_stats.json"),
+            thresholds_path=self._work("thresholds.json"),
             metrics_df=metrics,
             meta=meta,
-        )
-        return OrchestrationResult(
-            raw_shape=raw.shape,
-            train_shape=train_df.shape,
-            metrics=metrics,
-            thresholds=cal.th,
-            artifact_dir=os.path.join(self.REG_DIR, self.VER_TAG),
+            stats_path=self._work("axis_stats.json"),
+            profile=profile,
+            update_latest=self.cfg["registry"].get("update_latest", True),
         )
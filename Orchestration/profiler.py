@@ -0,0 +1,137 @@
+# Per-stage instrumentation for Orchestrator.run_all.
+# Always on (cheap): wall time, CPU time (this process + reaped worker processes), resident memory
+# at stage start and the peak growth during the stage, rows in / out, rows and bytes read from the DB.
+# Deep mode (`main.py --profile`) adds per stage a cProfile hotspot list (top functions by own time,
+# so wrappers do not crowd out the kernels; full stats dumped to <work_dir>/profile/<stage>.prof)
+# and the tracemalloc Python-heap peak with its top allocation sites. Both slow the run down
+# noticeably; use them to investigate, not in production runs.
+# Peak RSS per stage uses Linux's resettable high-water mark (/proc/self/clear_refs); elsewhere the
+# process-wide peak is used, so a stage only shows growth beyond all earlier stages' peaks.
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import cProfile, io, json, os, platform, pstats, sys, time, tracemalloc
+
+TOP_N = 15  # hotspot / allocation-site entries kept per stage in deep mode
+
+@dataclass
+class StageProfile:
+    """Measurements of one pipeline stage (sizes in MiB)."""
+    stage: str
+    status: str = "run"                  # run | cached (restored by StageCache)
+    wall_s: float = 0.0
+    cpu_s: float = 0.0                   # user + system, including reaped child processes
+    rss_start_mb: float = 0.0
+    rss_peak_delta_mb: float = 0.0       # peak resident memory during the stage minus rss_start_mb
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    db_rows: int = 0                     # result rows received from the DB
+    db_bytes: int = 0                    # size of those results as materialized frames
+    py_peak_mb: Optional[float] = None   # tracemalloc peak (deep mode)
+    hotspots: List[Dict[str, Any]] = field(default_factory=list)     # cProfile (deep mode)
+    allocations: List[Dict[str, Any]] = field(default_factory=list)  # tracemalloc (deep mode)
+
+class Profiler:
+    """Collects a StageProfile per `measure()` block; `deep` adds cProfile and tracemalloc."""
+    def __init__(self, deep: bool = False, dump_dir: Optional[str] = None):
+        self.deep = deep
+        self.dump_dir = Path(dump_dir) if dump_dir else None
+        self.stages: List[StageProfile] = []
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[StageProfile]:
+        """Time the enclosed block; the caller may fill rows / db fields of the yielded record."""
+        rec = StageProfile(stage)
+        rec.rss_start_mb = _reset_peak_rss()
+        prof = cProfile.Profile() if self.deep else None
+        if self.deep:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+            prof.enable()
+        c0, t0 = _cpu_seconds(), time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec.wall_s = time.perf_counter() - t0
+            rec.cpu_s = _cpu_seconds() - c0
+            if self.deep:
+                prof.disable()
+                rec.py_peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+                rec.allocations = _top_allocations(tracemalloc.take_snapshot())
+                tracemalloc.stop()
+                rec.hotspots = _hotspots(prof)
+                if self.dump_dir is not None:
+                    self.dump_dir.mkdir(parents=True, exist_ok=True)
+                    prof.dump_stats(str(self.dump_dir / f"{stage}.prof"))
+            rec.rss_peak_delta_mb = max(_peak_rss_mb() - rec.rss_start_mb, 0.0)
+            self.stages.append(rec)
+
+    def to_json(self) -> Dict[str, Any]:
+        """JSON-ready record: per-stage entries plus totals and the runtime environment."""
+        return {
+            "deep": self.deep,
+            "total_wall_s": time.perf_counter() - self._t0,
+            "total_cpu_s": sum(s.cpu_s for s in self.stages),
+            "peak_rss_mb": max((s.rss_start_mb + s.rss_peak_delta_mb for s in self.stages), default=0.0),
+            "db_rows": sum(s.db_rows for s in self.stages),
+            "db_bytes": sum(s.db_bytes for s in self.stages),
+            "stages": [asdict(s) for s in self.stages],
+            "env": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        }
+
+    def write(self, path) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f, indent=2)
+
+def _cpu_seconds() -> float:
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+def _status_kb(field_name: str) -> Optional[float]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field_name + ":"):
+                    return float(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def _reset_peak_rss() -> float:
+    """Current RSS in MiB, after resetting the peak where the OS allows it."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")  # reset VmHWM to the current RSS
+    except OSError:
+        pass
+    rss = _status_kb("VmRSS")
+    return rss / 1024 if rss is not None else _peak_rss_mb()
+
+def _peak_rss_mb() -> float:
+    hwm = _status_kb("VmHWM")
+    if hwm is not None:
+        return hwm / 1024
+    try:
+        import resource
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return kb / 1024 / (1024 if sys.platform == "darwin" else 1)
+    except ImportError:
+        return 0.0
+
+def _hotspots(prof: cProfile.Profile) -> List[Dict[str, Any]]:
+    """Top functions by own (exclusive) time."""
+    st = pstats.Stats(prof, stream=io.StringIO())
+    rows = sorted(st.stats.items(), key=lambda kv: kv[1][2], reverse=True)[:TOP_N]
+    return [{"function": f"{os.path.basename(fn)}:{line}({name})", "ncalls": nc,
+             "tottime_s": round(tt, 6), "cumtime_s": round(ct, 6)}
+            for (fn, line, name), (_cc, nc, tt, ct, _callers) in rows]
+
+def _top_allocations(snap: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+    """Largest live allocation sites at the end of the stage."""
+    return [{"site": f"{os.path.basename(s.traceback[0].filename)}:{s.traceback[0].lineno}",
+             "size_mb": round(s.size / 2**20, 3), "count": s.count}
+            for s in snap.statistics("lineno")[:TOP_N]]
@@ -0,0 +1,123 @@
+# Stage-level memoization for the orchestrator.
+# A stage's fingerprint = hash(stage name, its config subsection, hashes of its upstream outputs).
+# Outputs are pickled under <root>/<stage>/<fingerprint>/ together with copies of the files the
+# stage writes (e.g. out/models.pkl, plots), which are restored on a cache hit. Because the key
+# uses upstream *output* hashes, re-running a stage that yields identical data keeps the rest valid.
+# Entries are evicted least-recently-used (meta.json mtime, touched on every hit) once the cache
+# exceeds `max_bytes`; entries used by the current run are kept. A file lock serializes hits,
+# stores and eviction between processes sharing the cache dir.
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import hashlib, json, os, pickle, shutil, time, uuid
+
+from ModelRegistry.publish import FileLock
+
+STAGES = ("extract", "analyze", "prepare", "train", "evaluate", "threshold", "register")
+
+class StageCache:
+    """Runs pipeline stages, skipping those whose fingerprint already has a stored result."""
+    def __init__(self, root_dir: str, enabled: bool = True, force: bool = False,
+                 from_stage: Optional[str] = None, max_bytes: Optional[int] = 2 * 1024**3):
+        if from_stage is not None and from_stage not in STAGES:
+            raise ValueError(f"from_stage must be one of {STAGES}, got {from_stage!r}.")
+        self.root = Path(root_dir)
+        self.enabled = enabled
+        self.force = force
+        self.from_idx = STAGES.index(from_stage) if from_stage else len(STAGES)
+        self.max_bytes = max_bytes  # None = unbounded
+        self.status: Dict[str, str] = {}  # stage → "run" | "cached"
+        self._used: set = set()           # entries read or written by this run (never evicted)
+
+    @staticmethod
+    def fingerprint(stage: str, config: Any, upstream: Iterable[str]) -> str:
+        payload = json.dumps({"stage": stage, "config": config, "upstream": list(upstream)},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def run(self, stage: str, config: Any, upstream: Iterable[str], fn: Callable[[], Any],
+            files: Iterable[str] = ()) -> Tuple[Any, str]:
+        """Return (output, output_hash), executing `fn` only when the stage is invalidated."""
+        files = list(files)
+        fp = self.fingerprint(stage, config, upstream)
+        sdir = self.root / stage / fp
+        forced = self.force or STAGES.index(stage) >= self.from_idx
+
+        if self.enabled and not forced and (sdir / "output.pkl").exists():
+            with FileLock(self.root / ".lock"):
+                hit = self._load(sdir)
+            if hit is not None:
+                self.status[stage] = "cached"
+                return hit
+
+        out = fn()
+        self.status[stage] = "run"
+        if not self.enabled:
+            return out, ""  # no fingerprints needed, so skip serializing the output
+
+        blob = pickle.dumps(out, protocol=pickle.HIGHEST_PROTOCOL)
+        digest = hashlib.sha256(blob)
+        for path in files:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        out_hash = digest.hexdigest()[:32]
+
+        # Write into a temp dir and rename, so a crashed run never leaves a half entry
+        tmp = self.root / stage / f".{fp}.{uuid.uuid4().hex[:8]}"
+        (tmp / "files").mkdir(parents=True)
+        with open(tmp / "output.pkl", "wb") as f:
+            f.write(blob)
+        for i, path in enumerate(files):
+            shutil.copy2(path, tmp / "files" / str(i))
+        with open(tmp / "meta.json", "w") as f:
+            json.dump({"output_hash": out_hash, "files": files}, f, indent=2)
+        with FileLock(self.root / ".lock"):
+            shutil.rmtree(sdir, ignore_errors=True)
+            os.replace(tmp, sdir)
+            self._touch(sdir)
+            self._evict()
+        return out, out_hash
+
+    def _load(self, sdir: Path) -> Optional[Tuple[Any, str]]:
+        """(output, output_hash) of an entry, restoring its files; None if it was evicted meanwhile."""
+        if not (sdir / "output.pkl").exists():
+            return None
+        with open(sdir / "meta.json") as f:
+            meta = json.load(f)
+        for i, path in enumerate(meta["files"]):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            shutil.copy2(sdir / "files" / str(i), path)
+        with open(sdir / "output.pkl", "rb") as f:
+            out = pickle.load(f)
+        self._touch(sdir)
+        return out, meta["output_hash"]
+
+    def _touch(self, sdir: Path) -> None:
+        """Mark an entry used now (LRU clock: meta.json mtime, set explicitly for ns resolution)."""
+        now = time.time_ns()
+        os.utime(sdir / "meta.json", ns=(now, now))
+        self._used.add(sdir)
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until the cache fits in max_bytes. Call under the lock."""
+        if self.max_bytes is None:
+            return
+        entries = []
+        for stage in STAGES:
+            sroot = self.root / stage
+            if not sroot.is_dir():
+                continue
+            for sdir in sroot.iterdir():
+                meta = sdir / "meta.json"
+                if sdir.name.startswith(".") or not meta.exists():
+                    continue  # in-flight temp dirs of other writers
+                size = sum(p.stat().st_size for p in sdir.rglob("*") if p.is_file())
+                entries.append((meta.stat().st_mtime_ns, sdir, size))
+        total = sum(size for _, _, size in entries)
+        for _, sdir, size in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            if sdir in self._used:
+                continue
+            shutil.rmtree(sdir, ignore_errors=True)
+            total -= size
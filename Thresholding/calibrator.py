@@ -2,9 +2,12 @@
 # The threshold is calculated in the same way as the existing code. The difference lies in saving it to a file.
 
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Callable, Optional, Dict, Iterable, List
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import numpy as np, pandas as pd, json
 
+from Thresholding.sketch import KLLSketch
+
 class ThresholdCalibrator:
     """Residual-based thresholds per axis with trim + quantile policy."""
 
@@ -28,18 +31,23 @@ class ThresholdCalibrator:
         self.alert_quantile = float(policy.get("alert_quantile", 0.90))  
         self.error_quantile = float(policy.get("error_quantile", 0.50))
 
+        # Per-axis calibration pool: n_jobs > 1 runs axes concurrently ("thread" or "process")
+        self.n_jobs = int(policy.get("n_jobs", 1) or 1)
+        self.executor = str(policy.get("executor", "thread"))
+        if self.executor not in ("thread", "process"):
+            raise ValueError(f"executor must be 'thread' or 'process', got {self.executor!r}.")
+
+        # Streaming mode (fit_stream): normalized rank error of the quantile sketches
+        self.sketch_rank_error = float(policy.get("sketch_rank_error", 0.005))
+
     @staticmethod
-    def _run_lengths(mask: np.ndarray) -> List[int]:
-        """Return lengths of consecutive True segments."""
-        if mask.size == 0: return []
-        runs, r = [], 0
-        for v in mask:
-            if v: r += 1
-            else:
-                if r: runs.append(r)
-                r = 0
-        if r: runs.append(r)
-        return runs
+    def _run_lengths(mask: np.ndarray) -> np.ndarray:
+        """Return lengths of consecutive True segments (vectorized run-length encoding)."""
+        m = np.asarray(mask, dtype=bool)
+        if m.size == 0: return np.empty(0, dtype=np.int64)
+        # +1 where a run starts, -1 one past where it ends
+        edges = np.diff(m.view(np.int8), prepend=np.int8(0), append=np.int8(0))
+        return np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
 
     def _trimmed_pos(self, pos: np.ndarray) -> np.ndarray:
         """Optionally trim the top fraction of positive residuals."""
@@ -50,53 +58,164 @@ class ThresholdCalibrator:
         return pos
 
     def fit(self, df_pred: pd.DataFrame, axes: List[str], dt_seconds: float) -> None:
+        self._fit_columns([df_pred[f"{k}_res"].values for k in axes], axes, dt_seconds)
+
+    def fit_residuals(self, res: np.ndarray, axes: List[str], dt_seconds: float) -> None:
+        """Same as `fit`, reading an (n, n_axes) residual block (e.g. `Prediction.res`) directly."""
+        if res.ndim != 2 or res.shape[1] != len(axes):
+            raise ValueError(f"res must be (n, {len(axes)}), got {res.shape}.")
+        self._fit_columns([res[:, j] for j in range(len(axes))], axes, dt_seconds)
+
+    def _fit_columns(self, residuals: List[np.ndarray], axes: List[str], dt_seconds: float) -> None:
         step_from_sec = lambda s: max(1, int(round(s / max(dt_seconds, 1e-9))))
         default_alert_steps = step_from_sec(self.alert_seconds_default)
         default_error_steps = step_from_sec(self.error_seconds_default)
 
-        for k in axes:
-            res = df_pred[f"{k}_res"].values
-            pos = res[res > 0]
-
-            # MinC/MaxC with trim or robust fallback
-            if len(pos) < self.min_pos_for_trim and self.use_mad_fallback and len(pos) > 0:
-                # robust fallback if too few positives
-                med = float(np.median(pos)); mad = float(np.median(np.abs(pos - med)))
-                minc = med + 2.0 * mad
-                maxc = med + 3.0 * mad
-                method = "median+MAD"
-            else:
-                pos_eff = self._trimmed_pos(pos)
-                minc = float(np.percentile(pos_eff, self.minc_pct)) if len(pos_eff) else 0.0
-                maxc = float(np.percentile(pos_eff, self.maxc_pct)) if len(pos_eff) else 0.0
-                method = f"trim_top={self.trim_top}"
-
-            # Run-length distributions
-            alert_mask = res >= minc
-            error_mask = res >= maxc
-            run_alert = self._run_lengths(alert_mask)
-            run_error = self._run_lengths(error_mask)
-
-            # Alerts: use high quantile (>= default)
-            if run_alert:
-                q_alert = int(np.ceil(np.quantile(run_alert, self.alert_quantile)))
-                T_long_steps = max(default_alert_steps, q_alert)
-            else:
-                T_long_steps = default_alert_steps
+        args = (residuals, [default_alert_steps] * len(axes), [default_error_steps] * len(axes),
+                [dt_seconds] * len(axes))
+        if self.n_jobs > 1 and len(axes) > 1:
+            pool_cls = ThreadPoolExecutor if self.executor == "thread" else ProcessPoolExecutor
+            with pool_cls(max_workers=min(self.n_jobs, len(axes))) as pool:
+                results = list(pool.map(self._fit_axis, *args))
+        else:
+            results = list(map(self._fit_axis, *args))
+        self.th = dict(zip(axes, results))
 
-            # Errors: use median (>= default)
-            if run_error:
-                q_error = int(np.ceil(np.quantile(run_error, self.error_quantile)))
-                T_short_steps = max(default_error_steps, q_error)
-            else:
-                T_short_steps = default_error_steps
+        with open(self.out_dir / "thresholds.json", "w") as f:
+            json.dump(self.th, f, indent=2)
 
-            self.th[k] = {
-                "MinC": float(minc), "MaxC": float(maxc),
-                "T_long_steps": int(T_long_steps), "T_short_steps": int(T_short_steps),
-                "dt_seconds": float(dt_seconds),
-                "meta": {"method": method}
-            }
+    def _fit_axis(self, res: np.ndarray, default_alert_steps: int, default_error_steps: int,
+                  dt_seconds: float) -> Dict:
+        """Thresholds and dwell steps for one axis' residuals."""
+        pos = res[res > 0]
+
+        # MinC/MaxC with trim or robust fallback
+        if len(pos) < self.min_pos_for_trim and self.use_mad_fallback and len(pos) > 0:
+            # robust fallback if too few positives
+            med = float(np.median(pos)); mad = float(np.median(np.abs(pos - med)))
+            minc = med + 2.0 * mad
+            maxc = med + 3.0 * mad
+            method = "median+MAD"
+        else:
+            pos_eff = self._trimmed_pos(pos)
+            minc = float(np.percentile(pos_eff, self.minc_pct)) if len(pos_eff) else 0.0
+            maxc = float(np.percentile(pos_eff, self.maxc_pct)) if len(pos_eff) else 0.0
+            method = f"trim_top={self.trim_top}"
+
+        # Run-length distributions
+        run_alert = self._run_lengths(res >= minc)
+        run_error = self._run_lengths(res >= maxc)
+        T_long_steps, T_short_steps = self._dwell_steps(
+            np.quantile(run_alert, self.alert_quantile) if run_alert.size else None,
+            np.quantile(run_error, self.error_quantile) if run_error.size else None,
+            default_alert_steps, default_error_steps)
+        return self._entry(minc, maxc, T_long_steps, T_short_steps, dt_seconds, method)
+
+    @staticmethod
+    def _dwell_steps(q_alert_runs, q_error_runs, default_alert_steps: int, default_error_steps: int):
+        """Raise the default dwell steps to the observed run-length quantiles (None = no runs)."""
+        # Alerts: use high quantile (>= default)
+        if q_alert_runs is not None:
+            T_long_steps = max(default_alert_steps, int(np.ceil(q_alert_runs)))
+        else:
+            T_long_steps = default_alert_steps
+
+        # Errors: use median (>= default)
+        if q_error_runs is not None:
+            T_short_steps = max(default_error_steps, int(np.ceil(q_error_runs)))
+        else:
+            T_short_steps = default_error_steps
+        return T_long_steps, T_short_steps
+
+    @staticmethod
+    def _entry(minc, maxc, T_long_steps, T_short_steps, dt_seconds, method) -> Dict:
+        return {
+            "MinC": float(minc), "MaxC": float(maxc),
+            "T_long_steps": int(T_long_steps), "T_short_steps": int(T_short_steps),
+            "dt_seconds": float(dt_seconds),
+            "meta": {"method": method}
+        }
+
+    # ---- Streaming (out-of-core) calibration -------------------------------------------
+
+    def fit_stream(self, chunks: Callable[[], Iterable[pd.DataFrame]], axes: List[str],
+                   dt_seconds: float) -> None:
+        """Out-of-core variant of `fit` with constant memory.
+
+        `chunks` is called twice and must return the same time-ordered residual chunks
+        (frames with `<axis>_res` columns) each time:
+          1) positive residuals → mergeable quantile sketches → MinC/MaxC (trim honored by rank),
+          2) run lengths at those levels, carried across chunk boundaries → sketches → dwell steps.
+        Small inputs are exact; large ones are within `sketch_rank_error` in rank.
+        """
+        step_from_sec = lambda s: max(1, int(round(s / max(dt_seconds, 1e-9))))
+        default_alert_steps = step_from_sec(self.alert_seconds_default)
+        default_error_steps = step_from_sec(self.error_seconds_default)
+
+        pos_sk = {k: self._sketch() for k in axes}
+        for chunk in chunks():
+            for k in axes:
+                res = chunk[f"{k}_res"].to_numpy()
+                pos_sk[k].update(res[res > 0])
+        levels = {k: self._levels_from_sketch(pos_sk[k]) for k in axes}
+
+        run_sk = {k: (self._sketch(), self._sketch()) for k in axes}
+        carry = {k: [0, 0] for k in axes}
+        for chunk in chunks():
+            for k in axes:
+                res = chunk[f"{k}_res"].to_numpy()
+                for j, c in enumerate(levels[k][:2]):
+                    runs, carry[k][j] = self._chunk_runs(res >= c, carry[k][j])
+                    run_sk[k][j].update(runs)
+
+        for k in axes:
+            minc, maxc, method = levels[k]
+            for j in range(2):
+                if carry[k][j]:
+                    run_sk[k][j].update([carry[k][j]])
+            sk_alert, sk_error = run_sk[k]
+            T_long_steps, T_short_steps = self._dwell_steps(
+                float(sk_alert.quantile(self.alert_quantile)) if sk_alert.n else None,
+                float(sk_error.quantile(self.error_quantile)) if sk_error.n else None,
+                default_alert_steps, default_error_steps)
+            self.th[k] = self._entry(minc, maxc, T_long_steps, T_short_steps, dt_seconds, method)
 
         with open(self.out_dir / "thresholds.json", "w") as f:
             json.dump(self.th, f, indent=2)
+
+    def _sketch(self) -> KLLSketch:
+        # Never compact below min_pos_for_trim values, so the median+MAD fallback stays exact
+        k = max(KLLSketch(self.sketch_rank_error).k, self.min_pos_for_trim)
+        return KLLSketch(k=k)
+
+    def _levels_from_sketch(self, sk: KLLSketch):
+        """(MinC, MaxC, method) from a sketch of positive residuals, mirroring `_fit_axis`."""
+        n = sk.n
+        if n < self.min_pos_for_trim and self.use_mad_fallback and n > 0:
+            pos = sk.values()
+            med = float(np.median(pos)); mad = float(np.median(np.abs(pos - med)))
+            return med + 2.0 * mad, med + 3.0 * mad, "median+MAD"
+        if n == 0:
+            return 0.0, 0.0, f"trim_top={self.trim_top}"
+        # Percentile of the trimmed head s[:cut] == value at rank q*(cut-1) of the full stream
+        cut = n
+        if n >= self.min_pos_for_trim and self.trim_top > 0:
+            cut = max(1, int(np.floor(n * (1 - self.trim_top))))
+        minc, maxc = sk.at_positions([(self.minc_pct / 100) * (cut - 1), (self.maxc_pct / 100) * (cut - 1)])
+        return float(minc), float(maxc), f"trim_top={self.trim_top}"
+
+    @classmethod
+    def _chunk_runs(cls, mask: np.ndarray, carry: int):
+        """Closed run lengths in one chunk, given the run left open by the previous chunk.
+        Returns (runs, run still open at the end of this chunk)."""
+        runs = cls._run_lengths(mask)
+        if mask.size == 0:
+            return runs, carry
+        if carry:
+            if mask[0]:
+                runs[0] += carry
+            else:
+                runs = np.concatenate([np.asarray([carry], dtype=runs.dtype), runs])
+        if mask[-1]:
+            return runs[:-1], int(runs[-1])
+        return runs, 0
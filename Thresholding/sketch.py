@@ -0,0 +1,88 @@
+# Mergeable streaming quantile sketch (KLL-style compactors) used for out-of-core calibration.
+# Memory is bounded by the compactor capacities (about 3*k values), independent of stream length.
+# While fewer than ~k values have been seen nothing is compacted, so small inputs stay exact.
+
+import math
+import numpy as np
+
+class KLLSketch:
+    """Approximate quantiles of a stream of floats.
+
+    Values at compactor level h carry weight 2**h. A full level is sorted and every other
+    value (random offset) is promoted to the next level, which preserves the total weight.
+    Normalized rank error is roughly `rank_error` (k ≈ 3.3 / rank_error).
+    """
+    def __init__(self, rank_error: float = 0.005, seed: int = 0, k: int | None = None):
+        self.k = int(k) if k else max(8, math.ceil(3.3 / rank_error))
+        self.n = 0
+        self.levels: list[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def update(self, values) -> None:
+        """Add a batch of values (NaNs are ignored)."""
+        v = np.asarray(values, dtype=np.float64).ravel()
+        v = v[~np.isnan(v)]
+        if v.size == 0:
+            return
+        self.n += int(v.size)
+        self.levels[0] = np.concatenate([self.levels[0], v])
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Fold another sketch (e.g. from another chunk range or shard) into this one."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for h, buf in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], buf])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            buf = self.levels[h]
+            if buf.size > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                buf = np.sort(buf)
+                keep = buf.size % 2            # an odd value stays behind at this level
+                offset = int(self._rng.integers(2))
+                promoted = buf[keep + offset::2]
+                self.levels[h] = buf[:keep]
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def _sorted(self) -> tuple[np.ndarray, np.ndarray]:
+        """All retained values sorted, with cumulative weights."""
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(b.size, 2 ** h, dtype=np.int64) for h, b in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def values(self) -> np.ndarray | None:
+        """The exact sorted input while nothing has been compacted, else None."""
+        if len(self.levels) > 1:
+            return None
+        return np.sort(self.levels[0])
+
+    def at_positions(self, pos) -> np.ndarray:
+        """Value at fractional 0-based positions of the sorted stream, linearly interpolated
+        (same convention as np.percentile / np.quantile)."""
+        items, cw = self._sorted()
+        pos = np.clip(np.asarray(pos, dtype=np.float64), 0, max(self.n - 1, 0))
+        lo, hi = np.floor(pos), np.ceil(pos)
+        v_lo = items[np.minimum(np.searchsorted(cw, lo, side="right"), items.size - 1)]
+        v_hi = items[np.minimum(np.searchsorted(cw, hi, side="right"), items.size - 1)]
+        # Same lerp as numpy's "linear" method, so the exact (uncompacted) case matches bit for bit
+        t = pos - lo
+        diff = v_hi - v_lo
+        return np.where(t >= 0.5, v_hi - diff * (1 - t), v_lo + diff * t)
+
+    def quantile(self, q) -> np.ndarray:
+        """Quantile(s) q in [0, 1] over the whole stream."""
+        return self.at_positions(np.asarray(q, dtype=np.float64) * (self.n - 1))
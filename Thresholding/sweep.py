@@ -0,0 +1,135 @@
+# Threshold-policy sweep: calibrates a whole grid of policies (MinC/MaxC percentiles, trim ratio,
+# run-length quantiles, default dwell seconds) per axis in one pass, and backtests every candidate on a
+# holdout window, instead of one run_all per policy. Results land in <out_dir>/sweep.csv.
+#   - Positive residuals are sorted once per axis; MinC/MaxC for all percentiles sharing a trim ratio come
+#     from one np.percentile call on the shared sorted head (same values as ThresholdCalibrator).
+#   - Policies share levels, so run lengths are computed once per distinct level: the training runs give
+#     the dwell quantiles for every policy at that level, the sorted holdout runs plus their suffix sums
+#     give event and row counts for every dwell length at once.
+#   - Axes run concurrently on the calibrator's thread / process pool (`n_jobs`, `executor`).
+# Backtest semantics follow DetectionEngine (dwell counters start at zero): an exceedance run of L rows
+# at a level with dwell T fires one event when L >= T and spends L - T + 1 rows at or past the dwell.
+
+from itertools import product
+from typing import Dict, Iterable, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np, pandas as pd
+
+from Thresholding.calibrator import ThresholdCalibrator
+
+SWEEP_KEYS = ("minc_percentile", "maxc_percentile", "trim_top_ratio", "alert_quantile", "error_quantile",
+              "alert_seconds_default", "error_seconds_default")
+
+class ThresholdSweep:
+    """Grid calibration + holdout backtest of threshold policies; `policy` is the base `thresholds:`
+    section (non-swept settings, pool size)."""
+
+    def __init__(self, out_dir: str, policy: Optional[Dict] = None):
+        self.cal = ThresholdCalibrator(out_dir, policy)
+        self.out_dir = self.cal.out_dir
+        self.results: Optional[pd.DataFrame] = None
+
+    def policies(self, grid: Union[Dict[str, Iterable], List[Dict]]) -> pd.DataFrame:
+        """One row per candidate (index `policy`, columns SWEEP_KEYS). `grid` maps keys to value lists
+        (Cartesian product) or lists policy dicts; keys not given keep the base policy's value."""
+        rows = [dict(zip(grid, combo)) for combo in product(*(np.atleast_1d(v).tolist() for v in grid.values()))] \
+            if isinstance(grid, dict) else [dict(r) for r in grid]
+        unknown = {k for r in rows for k in r} - set(SWEEP_KEYS)
+        if unknown:
+            raise ValueError(f"Cannot sweep {sorted(unknown)}; sweepable keys are {SWEEP_KEYS}.")
+        if not rows:
+            raise ValueError("Empty policy grid.")
+        c = self.cal
+        base = dict(minc_percentile=c.minc_pct, maxc_percentile=c.maxc_pct, trim_top_ratio=c.trim_top,
+                    alert_quantile=c.alert_quantile, error_quantile=c.error_quantile,
+                    alert_seconds_default=c.alert_seconds_default, error_seconds_default=c.error_seconds_default)
+        pol = pd.DataFrame([{**base, **r} for r in rows], columns=list(SWEEP_KEYS), dtype=float)
+        pol.index.name = "policy"
+        return pol
+
+    def run(self, train_res: np.ndarray, holdout_res: np.ndarray, axes: List[str], dt_seconds: float,
+            grid: Union[Dict[str, Iterable], List[Dict]]) -> pd.DataFrame:
+        """Calibrate every policy of `grid` on the (n, n_axes) training residuals and backtest it on the
+        (m, n_axes) holdout residuals. Returns one row per (policy, axis): the swept settings, MinC/MaxC,
+        dwell steps, and per level the holdout exceedance runs, events, rows past the dwell and run
+        lengths (max / mean). Also written to sweep.csv."""
+        for name, a in (("train_res", train_res), ("holdout_res", holdout_res)):
+            if a.ndim != 2 or a.shape[1] != len(axes):
+                raise ValueError(f"{name} must be (n, {len(axes)}), got {a.shape}.")
+        pol = self.policies(grid)
+        args = ([train_res[:, j] for j in range(len(axes))], [holdout_res[:, j] for j in range(len(axes))],
+                [pol] * len(axes), [dt_seconds] * len(axes))
+        n_jobs = self.cal.n_jobs
+        if n_jobs > 1 and len(axes) > 1:
+            pool_cls = ThreadPoolExecutor if self.cal.executor == "thread" else ProcessPoolExecutor
+            with pool_cls(max_workers=min(n_jobs, len(axes))) as pool:
+                per_axis = list(pool.map(self._sweep_axis, *args))
+        else:
+            per_axis = list(map(self._sweep_axis, *args))
+
+        swept = [k for k in SWEEP_KEYS if pol[k].nunique() > 1] or ["minc_percentile"]
+        frames = []
+        for axis, cols in zip(axes, per_axis):
+            f = pol[swept].reset_index()
+            f.insert(1, "axis", axis)
+            frames.append(f.assign(**cols))
+        self.results = pd.concat(frames, ignore_index=True)
+        self.results.to_csv(self.out_dir / "sweep.csv", index=False)
+        return self.results
+
+    @staticmethod
+    def summary(results: pd.DataFrame) -> pd.DataFrame:
+        """Per-policy totals over axes (events, rows past the dwell, longest run)."""
+        keys = [c for c in results.columns if c in SWEEP_KEYS]
+        return results.groupby(["policy", *keys], sort=True).agg(
+            alerts=("alerts", "sum"), errors=("errors", "sum"),
+            alert_rows=("alert_rows", "sum"), error_rows=("error_rows", "sum"),
+            alert_max_run=("alert_max_run", "max"), error_max_run=("error_max_run", "max")).reset_index()
+
+    def _sweep_axis(self, res: np.ndarray, hold: np.ndarray, pol: pd.DataFrame,
+                    dt_seconds: float) -> Dict[str, np.ndarray]:
+        """All policies for one axis (mirrors ThresholdCalibrator._fit_axis per policy)."""
+        cal, n = self.cal, len(pol)
+        pos = np.sort(res[res > 0])
+        minc, maxc = np.zeros(n), np.zeros(n)
+        if 0 < len(pos) < cal.min_pos_for_trim and cal.use_mad_fallback:
+            med = float(np.median(pos)); mad = float(np.median(np.abs(pos - med)))
+            minc[:], maxc[:] = med + 2.0 * mad, med + 3.0 * mad
+        elif len(pos):
+            trim = pol["trim_top_ratio"].to_numpy()
+            for tr in np.unique(trim):
+                rows = trim == tr
+                cut = len(pos)
+                if len(pos) >= cal.min_pos_for_trim and tr > 0:
+                    cut = max(1, int(np.floor(len(pos) * (1 - tr))))
+                pct = np.concatenate([pol["minc_percentile"].to_numpy()[rows], pol["maxc_percentile"].to_numpy()[rows]])
+                u, inv = np.unique(pct, return_inverse=True)
+                levels = np.percentile(pos[:cut], u)[inv]
+                minc[rows], maxc[rows] = levels[:rows.sum()], levels[rows.sum():]
+
+        out = {"MinC": minc, "MaxC": maxc}
+        for name, level, q_key, sec_key, t_key in (
+                ("alert", minc, "alert_quantile", "alert_seconds_default", "T_long_steps"),
+                ("error", maxc, "error_quantile", "error_seconds_default", "T_short_steps")):
+            steps = np.maximum(1, np.round(pol[sec_key].to_numpy() / max(dt_seconds, 1e-9))).astype(np.int64)
+            q = pol[q_key].to_numpy()
+            runs_n, events, past, max_run = (np.zeros(n, dtype=np.int64) for _ in range(4))
+            mean_run = np.zeros(n)
+            u_lvl, inv = np.unique(level, return_inverse=True)
+            for i, c in enumerate(u_lvl):
+                rows = inv == i
+                runs = cal._run_lengths(res >= c)
+                if runs.size:
+                    uq, qi = np.unique(q[rows], return_inverse=True)
+                    steps[rows] = np.maximum(steps[rows], np.ceil(np.quantile(runs, uq)).astype(np.int64)[qi])
+                h = np.sort(cal._run_lengths(hold >= c))
+                tail = np.r_[np.cumsum(h[::-1])[::-1], 0]  # tail[k] = sum(h[k:])
+                k = np.searchsorted(h, steps[rows], side="left")
+                fired = len(h) - k
+                runs_n[rows], events[rows] = len(h), fired
+                past[rows] = tail[k] - (steps[rows] - 1) * fired
+                max_run[rows] = h[-1] if h.size else 0
+                mean_run[rows] = h.mean() if h.size else 0.0
+            out.update({t_key: steps, f"{name}_runs": runs_n, f"{name}s": events, f"{name}_rows": past,
+                        f"{name}_max_run": max_run, f"{name}_mean_run": mean_run})
+        return out
@@ -1,5 +1,5 @@
-"""Placeholder package to represent the 'Trained Machine Learning Model' block.
+"""Package representing the 'Trained Machine Learning Model' block.
 
-Artifacts are not stored here (they go to the ModelRegistry), but this module
-exists to mirror the diagram block and to allow future helper utilities.
+Artifacts are not stored here (they go to the ModelRegistry); this package holds the
+utilities that apply them, e.g. `detector.DetectionEngine` for online anomaly detection.
 """
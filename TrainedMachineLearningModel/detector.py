@@ -0,0 +1,122 @@
+# Online anomaly detection against a registry version (memory-mapped model.npy + manifest.json,
+# or models.pkl + thresholds.json + prep_stats.json for versions saved before that format).
+# Scores batches of live samples for all axes at once: prediction, residual, and per-axis dwell
+# counters that emit Alert / Error events once a run of exceedances lasts T_long / T_short steps.
+# All per-batch work goes through ufuncs with out= into buffers preallocated at load time.
+
+from dataclasses import dataclass
+from typing import List
+import numpy as np
+
+from ModelRegistry.columnar import load_version
+
+STATE_OK, STATE_ALERT, STATE_ERROR = 0, 1, 2
+
+@dataclass
+class Event:
+    ts: float
+    axis: str
+    level: str        # "alert" | "error"
+    dwell_steps: int  # consecutive exceedances when the event fired
+    row: int          # sample index within the scored batch
+
+@dataclass
+class DetectionResult:
+    """Views over the engine's buffers; valid until the next `score` call (copy to keep)."""
+    pred: np.ndarray         # (n, n_axes)
+    res: np.ndarray          # (n, n_axes)
+    alert_dwell: np.ndarray  # (n, n_axes) consecutive steps with res >= MinC
+    error_dwell: np.ndarray  # (n, n_axes) consecutive steps with res >= MaxC
+    state: np.ndarray        # (n, n_axes) STATE_OK / STATE_ALERT / STATE_ERROR
+    events: List[Event]
+
+class DetectionEngine:
+    """Applies per-axis linear models and residual thresholds to streaming samples.
+
+    `ts` are raw times in the unit of the training time column (float seconds); the
+    registry's time0 is subtracted before prediction. Dwell counters persist across calls.
+    """
+    def __init__(self, root_dir: str = "ModelRegistry/artifacts", version: str = "latest",
+                 max_batch: int = 4096):
+        m = load_version(root_dir, version)
+        self.version_dir = m.version_dir
+        self.version = m.version
+        self.format = m.format
+        self.time0 = m.time0
+        self.axes = m.axes
+        # Parameter vectors stay read-only views on the mapped file
+        self.coef, self.intercept = m.coef, m.intercept
+        self.minc, self.maxc = m.minc, m.maxc
+        self.t_long, self.t_short = m.t_long, m.t_short
+        self._allocate(max_batch)
+        self.reset()
+
+    def _allocate(self, max_batch: int) -> None:
+        n, k = max_batch, len(self.axes)
+        self.max_batch = n
+        self._t     = np.empty(n, dtype=np.float64)
+        self._pred  = np.empty((n, k), dtype=np.float64)
+        self._res   = np.empty((n, k), dtype=np.float64)
+        self._hit   = np.empty((n, k), dtype=bool)
+        self._last  = np.empty((n, k), dtype=np.int64)   # last non-exceeding row index
+        self._alert = np.empty((n, k), dtype=np.int64)
+        self._error = np.empty((n, k), dtype=np.int64)
+        self._fire  = np.empty((n, k), dtype=bool)
+        self._state = np.empty((n, k), dtype=np.int8)
+        self._rows  = np.arange(n, dtype=np.int64)[:, None]
+
+    def reset(self) -> None:
+        """Clear the dwell counters (e.g. after a gap in the stream)."""
+        self.alert_run = np.zeros(len(self.axes), dtype=np.int64)
+        self.error_run = np.zeros(len(self.axes), dtype=np.int64)
+
+    def score(self, ts, Y) -> DetectionResult:
+        """Score n samples: ts (n,), Y (n, n_axes) in `self.axes` order. n <= max_batch."""
+        ts = np.asarray(ts, dtype=np.float64).reshape(-1)
+        Y = np.asarray(Y, dtype=np.float64).reshape(ts.size, len(self.axes))
+        n = ts.size
+        if n > self.max_batch:
+            raise ValueError(f"batch of {n} exceeds max_batch={self.max_batch}; split it or re-create the engine.")
+        t, pred, res = self._t[:n], self._pred[:n], self._res[:n]
+
+        np.subtract(ts, self.time0, out=t)
+        np.multiply(t[:, None], self.coef, out=pred)
+        np.add(pred, self.intercept, out=pred)
+        np.subtract(Y, pred, out=res)
+
+        events: List[Event] = []
+        alert = self._dwell(res, self.minc, self.alert_run, self._alert[:n])
+        error = self._dwell(res, self.maxc, self.error_run, self._error[:n])
+        self._collect(alert, self.t_long, "alert", ts, events)
+        self._collect(error, self.t_short, "error", ts, events)
+
+        state = self._state[:n]
+        state.fill(STATE_OK)
+        np.greater_equal(alert, self.t_long, out=self._fire[:n])
+        state[self._fire[:n]] = STATE_ALERT
+        np.greater_equal(error, self.t_short, out=self._fire[:n])
+        state[self._fire[:n]] = STATE_ERROR
+        return DetectionResult(pred, res, alert, error, state, events)
+
+    def _dwell(self, res: np.ndarray, level: np.ndarray, carry: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """Consecutive-exceedance count at every row, continuing the run carried in `carry`."""
+        n = res.shape[0]
+        miss, last, rows = self._hit[:n], self._last[:n], self._rows[:n]
+        np.greater_equal(res, level, out=miss)
+        np.logical_not(miss, out=miss)
+        # index of the latest row that was NOT an exceedance (-1 - carry before the batch)
+        np.copyto(last, -1 - carry)
+        np.copyto(last, rows, where=miss)
+        np.maximum.accumulate(last, axis=0, out=last)
+        np.subtract(rows, last, out=out)
+        carry[:] = out[-1] if n else carry
+        return out
+
+    def _collect(self, dwell: np.ndarray, steps: np.ndarray, level: str, ts: np.ndarray,
+                 events: List[Event]) -> None:
+        """Emit one event per run, on the step where its dwell reaches the threshold."""
+        fire = self._fire[:dwell.shape[0]]
+        np.equal(dwell, steps, out=fire)
+        if fire.any():
+            for i, j in zip(*np.nonzero(fire)):
+                events.append(Event(float(ts[i]), self.axes[j], level, int(dwell[i, j]), int(i)))
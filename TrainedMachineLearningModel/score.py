@@ -0,0 +1,114 @@
+# Offline scoring of a recorded CSV / Parquet file against a registry version with NumPy only
+# (no pandas, SQLAlchemy or matplotlib, so it starts fast in cron jobs and sidecars).
+# Columns are read straight into arrays, DetectionEngine scores them in max_batch slices (dwell
+# counters carry across slices, as for a live stream), and the per-row residuals and states
+# (0 ok, 1 alert, 2 error) can be written back as CSV. Parquet input needs pyarrow (Arrow columns,
+# no pandas). The time column holds float seconds or ISO timestamps, as in training.
+#
+# Run: python main.py score samples.csv --out scores.csv   (or python -m TrainedMachineLearningModel.score)
+
+from dataclasses import dataclass, replace
+from typing import Dict, List
+import argparse, csv, time
+import numpy as np
+
+from TrainedMachineLearningModel.detector import DetectionEngine, Event
+
+@dataclass
+class ScoreResult:
+    version: str
+    axes: List[str]
+    ts: np.ndarray      # (n,) raw times as read
+    res: np.ndarray     # (n, n_axes)
+    state: np.ndarray   # (n, n_axes) STATE_OK / STATE_ALERT / STATE_ERROR
+    events: List[Event]
+
+def read_columns(path: str, names: List[str]) -> Dict[str, np.ndarray]:
+    """Named columns of a CSV (header row) or Parquet file as arrays; values as float64, a column that
+    does not parse as numbers (e.g. ISO timestamps) as datetime64."""
+    if path.endswith((".parquet", ".parq", ".pq")):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=names)
+        return {n: table.column(n).to_numpy() for n in names}
+    with open(path, newline="") as f:
+        header = [h.strip() for h in next(csv.reader(f))]
+    missing = [n for n in names if n not in header]
+    if missing:
+        raise ValueError(f"{path} lacks columns {missing} (has {header}).")
+    out = {}
+    for n in names:
+        i = header.index(n)
+        try:
+            out[n] = np.loadtxt(path, delimiter=",", skiprows=1, usecols=i, dtype=np.float64, ndmin=1)
+        except ValueError:
+            raw = np.loadtxt(path, delimiter=",", skiprows=1, usecols=i, dtype=str, ndmin=1)
+            try:
+                out[n] = np.where(raw == "", "nan", raw).astype(np.float64)  # empty cells → NaN
+            except ValueError:
+                out[n] = np.char.rstrip(raw, "Z").astype("datetime64[ns]")
+    return out
+
+def seconds(t: np.ndarray) -> np.ndarray:
+    """Float seconds (datetime64 → seconds since the epoch, like the preprocessor's time_s)."""
+    if np.issubdtype(t.dtype, np.datetime64):
+        return t.astype("datetime64[ns]").view(np.int64) / 1e9
+    return t.astype(np.float64)
+
+def score_file(path: str, root_dir: str = "ModelRegistry/artifacts", version: str = "latest",
+               time_col: str = "ts", max_batch: int = 65536) -> ScoreResult:
+    """Score every row of `path` (columns `time_col` + the version's axes) in time order."""
+    eng = DetectionEngine(root_dir, version, max_batch=max_batch)
+    cols = read_columns(path, [time_col, *eng.axes])
+    ts = seconds(cols[time_col])
+    Y = np.column_stack([cols[k].astype(np.float64) for k in eng.axes]) if len(ts) else np.empty((0, len(eng.axes)))
+    res = np.empty(Y.shape)
+    state = np.empty(Y.shape, dtype=np.int8)
+    events: List[Event] = []
+    for i in range(0, len(ts), max_batch):
+        r = eng.score(ts[i:i + max_batch], Y[i:i + max_batch])
+        res[i:i + max_batch], state[i:i + max_batch] = r.res, r.state
+        events.extend(replace(e, row=e.row + i) for e in r.events)
+    return ScoreResult(eng.version, list(eng.axes), ts, res, state, events)
+
+def write_scores(result: ScoreResult, path: str) -> None:
+    """CSV with ts, <axis>_res..., <axis>_state... per row."""
+    header = ",".join(["ts", *(f"{k}_res" for k in result.axes), *(f"{k}_state" for k in result.axes)])
+    k = len(result.axes)
+    np.savetxt(path, np.column_stack([result.ts, result.res, result.state]), delimiter=",", header=header,
+               comments="", fmt=["%.17g"] * (1 + k) + ["%d"] * k)
+
+def add_arguments(p: argparse.ArgumentParser) -> None:
+    p.add_argument("file", help="CSV (header row) or Parquet file with the time column and axis columns")
+    p.add_argument("--root", default="ModelRegistry/artifacts", help="registry root dir")
+    p.add_argument("--version", default="latest")
+    p.add_argument("--time-col", default="ts")
+    p.add_argument("--max-batch", type=int, default=65536)
+    p.add_argument("--out", help="write per-row residuals and states to this CSV")
+    p.add_argument("--events", action="store_true", help="print every alert / error event")
+
+def run(a) -> int:
+    t0 = time.perf_counter()
+    r = score_file(a.file, a.root, a.version, a.time_col, a.max_batch)
+    wall = time.perf_counter() - t0
+    if a.out:
+        write_scores(r, a.out)
+
+    # Summary (one line per axis), optionally every event
+    print(f"Scored {len(r.ts)} rows x {len(r.axes)} axes with {r.version} in {wall:.2f}s"
+          + (f"  → {a.out}" if a.out else ""))
+    for j, k in enumerate(r.axes):
+        n_alert = sum(e.axis == k and e.level == "alert" for e in r.events)
+        n_error = sum(e.axis == k and e.level == "error" for e in r.events)
+        print(f"  {k}: alerts={n_alert}  errors={n_error}  rows in alert/error={int((r.state[:, j] > 0).sum())}")
+    if a.events:
+        for e in r.events:
+            print(f"  {e.ts:.3f}  {e.axis}  {e.level}  dwell={e.dwell_steps}  row={e.row}")
+    return 0
+
+def main():
+    p = argparse.ArgumentParser(description="Score a CSV / Parquet file against a registry version (NumPy only).")
+    add_arguments(p)
+    raise SystemExit(run(p.parse_args()))
+
+if __name__ == "__main__":
+    main()
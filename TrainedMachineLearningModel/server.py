@@ -0,0 +1,213 @@
+# Local asyncio inference server for registry models (HTTP/1.1, JSON-lines bodies).
+# Concurrent single-sample requests are coalesced into vectorized micro-batches
+# (max_batch samples or max_wait_ms, whichever comes first) and scored by one DetectionEngine.
+# A watcher hot-reloads the engine when the `latest` pointer changes; the swap happens between
+# batches, so in-flight requests finish on the old version and none are dropped.
+#
+#   POST /score   body: one JSON object per line, {"ts": 123.4, "values": [..]} or {"ts": .., "axis1": .., ...}
+#                 reply: one JSON object per line with pred, res, state per axis and fired events
+#   GET  /health  reply: {"version": .., "axes": [..]}
+#
+# Run: python -m TrainedMachineLearningModel.server --root ModelRegistry/artifacts --port 8765
+
+import argparse, asyncio, json
+from typing import List, Tuple
+import numpy as np
+
+from TrainedMachineLearningModel.detector import DetectionEngine
+from ModelRegistry.publish import resolve_version
+
+STATE_NAMES = ("ok", "alert", "error")
+
+class MicroBatchServer:
+    """Coalesces concurrent scoring requests into micro-batches for a hot-reloadable engine."""
+    def __init__(self, root_dir: str = "ModelRegistry/artifacts", version: str = "latest",
+                 max_batch: int = 256, max_wait_ms: float = 2.0, reload_interval: float = 1.0):
+        self.root_dir, self.version = root_dir, version
+        self.max_batch = int(max_batch)
+        self.max_wait = float(max_wait_ms) / 1000.0
+        self.reload_interval = float(reload_interval)
+        self.engine = DetectionEngine(root_dir, version, max_batch=self.max_batch)
+        self.engine_id = self._signature()
+        self._queue: asyncio.Queue | None = None
+        self._tasks: List[asyncio.Task] = []
+        self._server: asyncio.AbstractServer | None = None
+
+    # ---- lifecycle ----------------------------------------------------------------------
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> int:
+        """Start listening; returns the bound port (use port=0 for an ephemeral one)."""
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._batch_loop()), asyncio.create_task(self._watch_loop())]
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close(); await self._server.wait_closed()
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    # ---- hot reload ---------------------------------------------------------------------
+
+    def _signature(self) -> Tuple:
+        """Identity of the version the pointer currently resolves to."""
+        vdir = resolve_version(self.root_dir, self.version)
+        files = [vdir / n for n in ("manifest.json", "model.npy", "models.pkl", "thresholds.json", "prep_stats.json")]
+        return (str(vdir), *[f.stat().st_mtime_ns if f.exists() else None for f in files])
+
+    async def _watch_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                sig = self._signature()
+                if sig != self.engine_id:
+                    engine = await asyncio.to_thread(DetectionEngine, self.root_dir, self.version, self.max_batch)
+                    # Single reference swap; the batch loop picks it up for the next batch
+                    self.engine, self.engine_id = engine, sig
+            except (OSError, ValueError, KeyError, EOFError):
+                # Version still being written (or pointer briefly missing); retry next tick
+                continue
+
+    # ---- micro-batching -----------------------------------------------------------------
+
+    async def score(self, ts: float, values) -> dict:
+        """Queue one sample and wait for its batched result."""
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((float(ts), values, fut))
+        return await fut
+
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch) -> None:
+        engine = self.engine
+        ok, ts, rows = [], [], []
+        for item in batch:
+            try:
+                rows.append(self._row(engine, item[1])); ts.append(item[0]); ok.append(item)
+            except (KeyError, TypeError, ValueError) as e:
+                if not item[2].done():
+                    item[2].set_result({"ts": item[0], "error": f"bad sample: {e}"})
+        if not ok:
+            return
+        try:
+            r = engine.score(np.asarray(ts), np.asarray(rows))
+        except Exception as e:  # never leave callers waiting on a failed batch
+            for _, _, fut in ok:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        events = [[] for _ in ok]
+        for ev in r.events:
+            events[ev.row].append({"axis": ev.axis, "level": ev.level, "dwell_steps": ev.dwell_steps})
+        version = engine.version
+        for i, (t, _, fut) in enumerate(ok):
+            if fut.done():
+                continue
+            fut.set_result({
+                "ts": t, "version": version,
+                "pred": r.pred[i].tolist(), "res": r.res[i].tolist(),
+                "state": [STATE_NAMES[s] for s in r.state[i]],
+                "events": events[i],
+            })
+
+    @staticmethod
+    def _row(engine: DetectionEngine, values) -> list:
+        if isinstance(values, dict):
+            return [float(values[k]) for k in engine.axes]
+        if len(values) != len(engine.axes):
+            raise ValueError(f"expected {len(engine.axes)} values, got {len(values)}")
+        return [float(v) for v in values]
+
+    # ---- HTTP / JSON-lines --------------------------------------------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = line.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+
+                if method == "GET" and path == "/health":
+                    status, payload = "200 OK", json.dumps({"version": self.engine.version,
+                                                            "axes": self.engine.axes}) + "\n"
+                elif method == "POST" and path == "/score":
+                    try:
+                        status, payload = "200 OK", await self._score_lines(body)
+                    except (ValueError, KeyError) as e:
+                        status, payload = "400 Bad Request", json.dumps({"error": str(e)}) + "\n"
+                else:
+                    status, payload = "404 Not Found", json.dumps({"error": "not found"}) + "\n"
+
+                data = payload.encode()
+                writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/x-ndjson\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _score_lines(self, body: bytes) -> str:
+        samples = []
+        for line in body.splitlines():
+            if line.strip():
+                obj = json.loads(line)
+                values = obj.get("values")
+                if values is None:
+                    values = {k: v for k, v in obj.items() if k != "ts"}
+                samples.append(self.score(obj["ts"], values))
+        results = await asyncio.gather(*samples)
+        return "".join(json.dumps(r) + "\n" for r in results)
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--root", default="ModelRegistry/artifacts", help="registry root dir")
+    p.add_argument("--version", default="latest")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--max-batch", type=int, default=256)
+    p.add_argument("--max-wait-ms", type=float, default=2.0)
+    a = p.parse_args()
+
+    async def _serve():
+        srv = MicroBatchServer(a.root, a.version, max_batch=a.max_batch, max_wait_ms=a.max_wait_ms)
+        port = await srv.start(a.host, a.port)
+        print(f"Serving {srv.engine.version} ({srv.engine_id[0]}) on http://{a.host}:{port}  (axes: {', '.join(srv.engine.axes)})")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# ThresholdCalibrator.fit on long synthetic residuals: Python-loop run lengths (previous code)
+# vs vectorized run lengths, serial and on thread/process pools. Checks thresholds.json is byte-identical.
+# Usage: python -m benchmarks.bench_calibrator [--rows 10000000] [--axes 8] [--jobs 4]
+
+import argparse, os, tempfile, time
+import numpy as np, pandas as pd
+from Thresholding.calibrator import ThresholdCalibrator
+
+POLICY = dict(minc_percentile=75, maxc_percentile=95, trim_top_ratio=0.02, min_pos_for_trim=20,
+              use_mad_fallback=True, alert_seconds_default=5.0, error_seconds_default=3.0,
+              alert_quantile=0.80, error_quantile=0.50)
+
+def _loop_run_lengths(mask: np.ndarray) -> np.ndarray:
+    runs, r = [], 0
+    for v in mask:
+        if v: r += 1
+        else:
+            if r: runs.append(r)
+            r = 0
+    if r: runs.append(r)
+    return np.asarray(runs, dtype=np.int64)
+
+class _LoopCalibrator(ThresholdCalibrator):
+    _run_lengths = staticmethod(_loop_run_lengths)
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=10_000_000)
+    p.add_argument("--axes", type=int, default=8)
+    p.add_argument("--jobs", type=int, default=4)
+    p.add_argument("--skip-loop", action="store_true", help="skip the slow Python-loop baseline")
+    a = p.parse_args()
+
+    rng = np.random.default_rng(0)
+    axes = [f"axis{i}" for i in range(1, a.axes + 1)]
+    # AR(1) residuals so exceedances come in runs
+    e = rng.normal(size=(a.rows, a.axes))
+    res = np.empty_like(e); res[0] = e[0]
+    for i in range(0, a.rows, 1_000_000):
+        blk = e[i:i + 1_000_000]
+        res[i:i + 1_000_000] = pd.DataFrame(blk).ewm(alpha=0.4, adjust=False).mean().to_numpy()
+    df = pd.DataFrame(res, columns=[f"{k}_res" for k in axes])
+
+    runs = [("vectorized", ThresholdCalibrator, {}),
+            (f"threads x{a.jobs}", ThresholdCalibrator, {"n_jobs": a.jobs, "executor": "thread"}),
+            (f"processes x{a.jobs}", ThresholdCalibrator, {"n_jobs": a.jobs, "executor": "process"})]
+    if not a.skip_loop:
+        runs.insert(0, ("python loop", _LoopCalibrator, {}))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = {}
+        for name, cls, extra in runs:
+            out = os.path.join(tmp, name.replace(" ", "_"))
+            cal = cls(out, policy={**POLICY, **extra})
+            t0 = time.perf_counter()
+            cal.fit(df, axes, dt_seconds=1.891)
+            print(f"{name:>14}: {time.perf_counter() - t0:7.2f}s")
+            with open(os.path.join(out, "thresholds.json"), "rb") as f:
+                outputs[name] = f.read()
+        same = len(set(outputs.values())) == 1
+        print(f"rows={a.rows} axes={a.axes}  thresholds.json byte-identical across runs: {same}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# Replays a recorded window through TrainedMachineLearningModel.detector.DetectionEngine and
+# reports throughput and per-call / per-sample latency percentiles at several batch sizes.
+# Usage: python -m benchmarks.bench_detection_replay [--rows 200000] [--axes 8] [--window rec.npz]
+#   --window: npz with `ts` (n,) and `Y` (n, n_axes) recorded from the DB; default is synthetic.
+
+import argparse, tempfile, time
+import numpy as np
+from benchmarks.common import build_registry
+from TrainedMachineLearningModel.detector import DetectionEngine
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=200_000)
+    p.add_argument("--axes", type=int, default=8)
+    p.add_argument("--batches", type=int, nargs="+", default=[1, 16, 256, 4096])
+    p.add_argument("--window", help="recorded window (.npz with ts, Y)")
+    a = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ts, Y = build_registry(tmp, a.rows, a.axes)
+        if a.window:
+            rec = np.load(a.window); ts, Y = rec["ts"], rec["Y"]
+        for b in a.batches:
+            eng = DetectionEngine(tmp, "latest", max_batch=b)
+            n_calls = len(ts) // b
+            lat = np.empty(n_calls)
+            events = 0
+            t_all = time.perf_counter()
+            for c in range(n_calls):
+                s = slice(c * b, (c + 1) * b)
+                t0 = time.perf_counter()
+                r = eng.score(ts[s], Y[s])
+                lat[c] = time.perf_counter() - t0
+                events += len(r.events)
+            wall = time.perf_counter() - t_all
+            n = n_calls * b
+            p50, p99 = np.percentile(lat, [50, 99]) * 1e6
+            print(f"batch={b:5d}  {n / wall:12,.0f} samples/s  call p50={p50:8.1f}us p99={p99:8.1f}us  "
+                  f"per-sample p99={p99 / b:7.2f}us  events={events}")
+
+if __name__ == "__main__":
+    main()
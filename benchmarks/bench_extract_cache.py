@@ -0,0 +1,37 @@
+# Extraction wall time with and without ExtractionCache on a SQLite stand-in:
+# direct DB read, cold cache (miss), warm cache (hit), and an extended train_end (tail fetch only).
+# Usage: python -m benchmarks.bench_extract_cache [--rows 300000]
+
+import argparse, os, tempfile, time
+from benchmarks.common import make_sqlite
+from DataExtractionAnalysis.extractor import DBExtractor, DBConfig
+from DataExtractionAnalysis.cache import ExtractionCache
+
+def _timed(fn):
+    t0 = time.perf_counter(); df = fn(); return time.perf_counter() - t0, df
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=300_000, help="timestamps (x8 LONG rows)")
+    a = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.sqlite")
+        last = make_sqlite(db, a.rows)
+        os.environ["BENCH_DB_URL"] = f"sqlite:///{db}"
+        ext = DBExtractor(DBConfig(url_env="BENCH_DB_URL"))
+        cache = ExtractionCache(ext, os.path.join(tmp, "cache"))
+        axes, kw = list(range(1, 9)), dict(axis_id_col="axis_id", value_col="value")
+        end, end2 = 0.9 * last, last + 1.0
+
+        runs = [("direct DB", lambda: ext.load_window("stream_samples", "ts", axes, 0.0, end, **kw)),
+                ("cold cache", lambda: cache.load_window("stream_samples", "ts", axes, 0.0, end, **kw)),
+                ("warm cache", lambda: cache.load_window("stream_samples", "ts", axes, 0.0, end, **kw)),
+                ("extend +10%", lambda: cache.load_window("stream_samples", "ts", axes, 0.0, end2, **kw)),
+                ("direct DB +10%", lambda: ext.load_window("stream_samples", "ts", axes, 0.0, end2, **kw))]
+        for name, fn in runs:
+            wall, df = _timed(fn)
+            print(f"{name:>15}: {wall:6.2f}s  rows={len(df)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Wall time and result size of DBExtractor.load_window with SQL pushdown (resampling, zero filtering,
+# LONG pivot in the query) vs the pandas path (full-rate rows transferred, then reduced).
+# Runs against SQLite, and against DuckDB too when `duckdb` and `duckdb_engine` are installed.
+# Usage: python -m benchmarks.bench_extract_pushdown [--rows 300000] [--resample 10]
+
+import argparse, os, sqlite3, tempfile, time
+from benchmarks.common import make_sqlite
+
+CASES = [  # (label, load_window kwargs)
+    ("raw", dict()),
+    ("drop_zeros", dict(drop_zeros=True)),
+    ("resample", dict(resample_seconds=None)),           # filled from --resample
+    ("resample+drop_zeros", dict(resample_seconds=None, drop_zeros=True)),
+]
+
+def _duckdb_copy(sqlite_path: str, duck_path: str) -> bool:
+    """Copy the benchmark tables into a DuckDB file; False when DuckDB is not installed."""
+    try:
+        import duckdb, duckdb_engine  # noqa: F401
+        import pandas as pd
+    except ImportError:
+        return False
+    src = sqlite3.connect(sqlite_path)
+    con = duckdb.connect(duck_path)
+    for table in ("stream_samples", "wide_samples"):
+        df = pd.read_sql_query(f"SELECT * FROM {table}", src)
+        con.register("df", df)
+        con.execute(f"CREATE TABLE {table} AS SELECT * FROM df")
+        con.unregister("df")
+    con.close(); src.close()
+    return True
+
+def _run(url: str, label: str, end: float, resample: float) -> None:
+    os.environ["BENCH_DB_URL"] = url
+    from DataExtractionAnalysis.extractor import DBExtractor, DBConfig
+    ext = DBExtractor(DBConfig(url_env="BENCH_DB_URL"))
+    schemas = [("LONG", "stream_samples", list(range(1, 9)), dict(axis_id_col="axis_id", value_col="value")),
+               ("WIDE", "wide_samples", [f"axis{a}" for a in range(1, 9)], {})]
+    for schema, table, axes, extra in schemas:
+        for case, kw in CASES:
+            kw = {**kw, **extra, **({"resample_seconds": resample} if "resample_seconds" in kw else {})}
+            line = []
+            for pushdown in (False, True):
+                ext.rows_read = ext.bytes_read = 0
+                t0 = time.perf_counter()
+                df = ext.load_window(table, "ts", axes, 0.0, end, pushdown=pushdown, **kw)
+                wall = time.perf_counter() - t0
+                line.append(f"{'sql' if pushdown else 'pandas'} {wall:6.2f}s {ext.rows_read:>9} rows "
+                            f"{ext.bytes_read / 2**20:7.1f} MiB")
+            print(f"{label:>6} {schema:<4} {case:<20} -> {len(df):>7} rows | " + " | ".join(line))
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=300_000, help="timestamps (x8 LONG rows)")
+    p.add_argument("--resample", type=float, default=10.0, help="bucket size in seconds")
+    a = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.sqlite")
+        end = make_sqlite(db, a.rows) + 1.0
+        make_sqlite(db, a.rows, schema="wide", table="wide_samples")
+        _run(f"sqlite:///{db}", "sqlite", end, a.resample)
+        duck = os.path.join(tmp, "bench.duckdb")
+        if _duckdb_copy(db, duck):
+            _run(f"duckdb:///{duck}", "duckdb", end, a.resample)
+        else:
+            print("duckdb / duckdb_engine not installed; skipped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Peak RSS and wall time of DBExtractor.load_window (one buffered query) vs iter_window (chunked stream).
+# Usage: python -m benchmarks.bench_extract_stream [--rows 500000] [--chunksize 50000]
+
+import argparse, json, os, tempfile, time
+from benchmarks.common import make_sqlite, peak_rss_mb, run_isolated
+
+def _worker(db: str, mode: str, end: float, chunksize: int) -> None:
+    os.environ["BENCH_DB_URL"] = f"sqlite:///{db}"
+    from DataExtractionAnalysis.extractor import DBExtractor, DBConfig
+    ext = DBExtractor(DBConfig(url_env="BENCH_DB_URL"))
+    base = peak_rss_mb()
+    t0 = time.perf_counter()
+    n = 0
+    if mode == "eager":
+        n = len(ext.load_window("stream_samples", "ts", list(range(1, 9)), 0.0, end,
+                                axis_id_col="axis_id", value_col="value"))
+    else:
+        for chunk in ext.iter_window("stream_samples", "ts", list(range(1, 9)), 0.0, end,
+                                     axis_id_col="axis_id", value_col="value", chunksize=chunksize):
+            n += len(chunk)
+    print(json.dumps({"mode": mode, "rows": n, "wall_s": time.perf_counter() - t0,
+                      "peak_rss_delta_mb": peak_rss_mb() - base}))
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=500_000, help="timestamps (x8 LONG rows)")
+    p.add_argument("--chunksize", type=int, default=50_000)
+    p.add_argument("--worker", nargs=3, metavar=("DB", "MODE", "END"))
+    a = p.parse_args()
+    if a.worker:
+        return _worker(a.worker[0], a.worker[1], float(a.worker[2]), a.chunksize)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.sqlite")
+        end = make_sqlite(db, a.rows) + 1.0
+        for mode in ("eager", "stream"):
+            r = run_isolated("benchmarks.bench_extract_stream", "--chunksize", str(a.chunksize),
+                             "--worker", db, mode, str(end))
+            print(f"{r['mode']:>6}: rows={r['rows']}  wall={r['wall_s']:.2f}s  "
+                  f"peak RSS +{r['peak_rss_delta_mb']:.1f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# CLI startup cost per entry point from `python -X importtime`: total import time (sum of the
+# top-level cumulative entries), process wall time, module count, and which heavy packages got loaded.
+# "all stage modules" imports every stage eagerly — what each command paid before imports were lazy,
+# and what a run pays once all its stages execute.
+# Usage: python -m benchmarks.bench_import_time [--repeat 5] [--rows 10000]
+
+import argparse, os, subprocess, sys, tempfile, time
+import numpy as np
+from benchmarks.common import build_registry
+
+HEAVY = ("pandas", "sqlalchemy", "matplotlib", "dotenv", "joblib", "pyarrow")
+ALL_STAGES = ("DataExtractionAnalysis.extractor, DataExtractionAnalysis.cache, DataExtractionAnalysis.analyzer, "
+              "DataPreparation.preprocessor, ModelSelection.selector, ModelTraining.trainer, "
+              "ModelEvaluation.evaluator, matplotlib.figure, Thresholding.calibrator, Thresholding.sweep, "
+              "ModelRegistry.registry, Orchestration.orchestrator")
+
+def _importtime(argv: list) -> dict:
+    """Run one command under -X importtime; import totals parsed from stderr."""
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-X", "importtime", *argv], capture_output=True, text=True,
+                         env=dict(os.environ, MPLBACKEND="Agg"))
+    wall = time.perf_counter() - t0
+    if out.returncode:
+        raise RuntimeError(f"{argv} failed:\n{out.stderr[-2000:]}")
+    names, total = [], 0
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        names.append(name.strip())
+        if not name.startswith("  "):  # top-level entry (one leading space after the bar)
+            total += int(cumulative)
+    return {"import_s": total / 1e6, "wall_s": wall, "modules": len(names),
+            "heavy": [h for h in HEAVY if h in names]}
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--repeat", type=int, default=5, help="runs per entry point (best is reported)")
+    p.add_argument("--rows", type=int, default=10_000, help="rows in the scored CSV")
+    a = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "registry")
+        ts, Y = build_registry(root, n_rows=a.rows)
+        csv_path = os.path.join(tmp, "samples.csv")
+        header = ",".join(["ts", *(f"axis{j}" for j in range(1, Y.shape[1] + 1))])
+        np.savetxt(csv_path, np.column_stack([ts, Y]), delimiter=",", header=header, comments="")
+
+        entry_points = [
+            ("main.py --help", ["main.py", "--help"]),
+            ("main.py score", ["main.py", "score", csv_path, "--root", root]),
+            ("server --help", ["-m", "TrainedMachineLearningModel.server", "--help"]),
+            ("orchestrator import", ["-c", "import Orchestration.orchestrator"]),
+            ("all stage modules", ["-c", f"import {ALL_STAGES}"]),
+        ]
+        print(f"{'entry point':<22} {'imports':>9} {'wall':>8} {'modules':>8}  heavy packages loaded")
+        for name, argv in entry_points:
+            runs = [_importtime(argv) for _ in range(a.repeat)]
+            best = min(runs, key=lambda r: r["import_s"])
+            print(f"{name:<22} {best['import_s']:8.3f}s {min(r['wall_s'] for r in runs):7.3f}s "
+                  f"{best['modules']:>8}  {', '.join(best['heavy']) or '-'}")
+
+if __name__ == "__main__":
+    main()
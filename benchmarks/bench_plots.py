@@ -0,0 +1,67 @@
+# Evaluator.plots: pyplot full-resolution scatter (previous code) vs OO Agg with pixel-grid
+# decimation, serial and on a process pool. Wall time and peak RSS per row count, each case
+# in a fresh process.
+# Usage: python -m benchmarks.bench_plots [--rows 1000000 10000000 50000000] [--axes 2] [--jobs 4]
+#        [--legacy-max 10000000]   (the full-resolution baseline takes minutes beyond that)
+
+import argparse, json, resource, tempfile, time
+import numpy as np, pandas as pd
+from benchmarks.common import peak_rss_mb, run_isolated
+
+def _legacy_plots(plot_dir: str, df_pred: pd.DataFrame, axes: list[str]) -> None:
+    import matplotlib; matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    c_data, c_line = "C0", "C1"
+    for k in axes:
+        fig = plt.figure(figsize=(8, 4))
+        plt.scatter(df_pred["time_s"], df_pred[k], s=10, alpha=0.7, label="data", color=c_data)
+        plt.plot(df_pred["time_s"], df_pred[f"{k}_pred"], label="fit", color=c_line, linewidth=1.5)
+        plt.xlabel("time (s)"); plt.ylabel(k); plt.legend(); plt.tight_layout()
+        fig.savefig(f"{plot_dir}/{k}_fit.png"); plt.close(fig)
+        fig = plt.figure(figsize=(8, 3))
+        plt.scatter(df_pred["time_s"], df_pred[f"{k}_res"], s=10, alpha=0.8, label="residuals", color=c_data)
+        plt.axhline(0, color=c_line, linestyle="--", linewidth=1)
+        plt.tight_layout(); fig.savefig(f"{plot_dir}/{k}_residual.png"); plt.close(fig)
+
+def _worker(rows: int, n_axes: int, mode: str, jobs: int) -> None:
+    rng = np.random.default_rng(0)
+    axes = [f"axis{i}" for i in range(1, n_axes + 1)]
+    df = pd.DataFrame({"time_s": np.cumsum(rng.uniform(1.5, 2.3, rows))})
+    for k in axes:
+        pred = 0.01 * df["time_s"].to_numpy()
+        res = rng.normal(0, 2, rows)
+        df[k], df[f"{k}_pred"], df[f"{k}_res"] = pred + res, pred, res
+    from ModelEvaluation.evaluator import Evaluator  # import cost kept out of the timing
+    base = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        if mode == "legacy":
+            _legacy_plots(tmp, df, axes)
+        else:
+            Evaluator(tmp, n_jobs=jobs if mode == "pool" else 1).plots(df, axes)
+        wall = time.perf_counter() - t0
+    child = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(json.dumps({"wall_s": wall, "peak_rss_delta_mb": peak_rss_mb() - base, "child_peak_mb": child}))
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000, 50_000_000])
+    p.add_argument("--axes", type=int, default=2)
+    p.add_argument("--jobs", type=int, default=4)
+    p.add_argument("--legacy-max", type=int, default=10_000_000)
+    p.add_argument("--worker", nargs=2, metavar=("ROWS", "MODE"))
+    a = p.parse_args()
+    if a.worker:
+        return _worker(int(a.worker[0]), a.axes, a.worker[1], a.jobs)
+
+    for rows in a.rows:
+        modes = (["legacy"] if rows <= a.legacy_max else []) + ["decimated", "pool"]
+        for mode in modes:
+            r = run_isolated("benchmarks.bench_plots", "--axes", str(a.axes), "--jobs", str(a.jobs),
+                             "--worker", str(rows), mode)
+            label = f"pool x{a.jobs}" if mode == "pool" else mode
+            print(f"rows={rows:>10,}  {label:>10}: {r['wall_s']:7.2f}s  peak RSS +{r['peak_rss_delta_mb']:7.1f} MiB"
+                  f"  (workers {r['child_peak_mb']:.0f} MiB)")
+
+if __name__ == "__main__":
+    main()
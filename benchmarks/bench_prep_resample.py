@@ -0,0 +1,59 @@
+# Wall time and peak RSS of preparing an irregular window: pandas (groupby resample + interpolate on
+# the whole frame) vs Preprocessor (vectorized grid resampler + gap-limited interpolation), whole
+# frame and chunk-by-chunk with carry-over.
+# Usage: python -m benchmarks.bench_prep_resample [--rows 2000000] [--step 10] [--max-gap 30]
+
+import argparse, json, tempfile, time
+import numpy as np
+from benchmarks.common import peak_rss_mb, run_isolated
+
+def _frame(n: int, n_axes: int = 8, seed: int = 0):
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    ts = np.cumsum(rng.uniform(1.5, 2.3, n))
+    Y = 0.001 * np.arange(1, n_axes + 1) * ts[:, None] + rng.normal(0, 2, (n, n_axes))
+    Y[rng.random(Y.shape) < 0.02] = np.nan
+    df = pd.DataFrame(Y, columns=[f"axis{a}" for a in range(1, n_axes + 1)])
+    df.insert(0, "ts", ts)
+    return df
+
+def _worker(mode: str, n: int, step: float, max_gap: float, chunk: int) -> None:
+    df = _frame(n)
+    axes = [c for c in df.columns if c != "ts"]
+    base = peak_rss_mb()
+    t0 = time.perf_counter()
+    if mode == "pandas":
+        from DataExtractionAnalysis.extractor import resample_frame
+        out = resample_frame(df, "ts", step)
+        out = out.set_index("ts").reindex(np.arange(out.ts.iloc[0], out.ts.iloc[-1] + step / 2, step))
+        out = out.interpolate(method="index", limit_area="inside").dropna(how="all")
+        rows = len(out)
+    else:
+        from DataPreparation.preprocessor import Preprocessor
+        prep = Preprocessor(tempfile.mkdtemp(), resample_seconds=step, max_gap_seconds=max_gap)
+        if mode == "whole":
+            rows = len(prep.fit_transform(df, "ts", axes, interpolate=True))
+        else:
+            chunks = (df.iloc[i:i + chunk] for i in range(0, len(df), chunk))
+            rows = sum(len(c) for c in prep.fit_transform_chunks(chunks, "ts", axes, interpolate=True))
+    print(json.dumps({"mode": mode, "rows": rows, "wall_s": time.perf_counter() - t0,
+                      "peak_rss_delta_mb": peak_rss_mb() - base}))
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=2_000_000)
+    p.add_argument("--step", type=float, default=10.0)
+    p.add_argument("--max-gap", type=float, default=30.0)
+    p.add_argument("--chunksize", type=int, default=200_000)
+    p.add_argument("--worker")
+    a = p.parse_args()
+    if a.worker:
+        return _worker(a.worker, a.rows, a.step, a.max_gap, a.chunksize)
+    for mode in ("pandas", "whole", "chunked"):
+        r = run_isolated("benchmarks.bench_prep_resample", "--rows", str(a.rows), "--step", str(a.step),
+                         "--max-gap", str(a.max_gap), "--chunksize", str(a.chunksize), "--worker", mode)
+        print(f"{r['mode']:>8}: rows={r['rows']}  wall={r['wall_s']:.2f}s  "
+              f"peak RSS +{r['peak_rss_delta_mb']:.1f} MiB")
+
+if __name__ == "__main__":
+    main()
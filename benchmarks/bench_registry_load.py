@@ -0,0 +1,41 @@
+# Startup latency of opening a registry version: legacy loader (joblib unpickle of models.pkl +
+# thresholds.json + prep_stats.json) vs the columnar loader (manifest.json + mmap of model.npy).
+# Each measurement runs in a fresh process; reported as loader imports + open, and open alone
+# (the legacy path imports joblib lazily, so that import counts towards its open).
+# Usage: python -m benchmarks.bench_registry_load [--axes 8 512 8192] [--repeat 7]
+
+import argparse, statistics, tempfile, time
+
+def _worker(root: str, mode: str) -> None:
+    t0 = time.perf_counter()
+    from ModelRegistry.columnar import load_version, _load_legacy
+    from ModelRegistry.publish import resolve_version
+    t1 = time.perf_counter()
+    m = _load_legacy(resolve_version(root, "latest")) if mode == "legacy" else load_version(root, "latest")
+    float(m.coef[0] + m.maxc[-1])  # touch the parameters
+    t2 = time.perf_counter()
+    import json
+    print(json.dumps({"total_ms": (t2 - t0) * 1e3, "open_ms": (t2 - t1) * 1e3, "format": m.format}))
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--axes", type=int, nargs="+", default=[8, 512, 8192])
+    p.add_argument("--repeat", type=int, default=7)
+    p.add_argument("--worker", nargs=2, metavar=("ROOT", "MODE"))
+    a = p.parse_args()
+    if a.worker:
+        return _worker(*a.worker)
+
+    from benchmarks.common import build_registry, run_isolated
+    for n_axes in a.axes:
+        with tempfile.TemporaryDirectory() as tmp:
+            build_registry(tmp, n_rows=2_000, n_axes=n_axes)
+            for mode in ("legacy", "columnar"):
+                runs = [run_isolated("benchmarks.bench_registry_load", "--worker", tmp, mode)
+                        for _ in range(a.repeat)]
+                total = statistics.median(r["total_ms"] for r in runs)
+                opened = statistics.median(r["open_ms"] for r in runs)
+                print(f"axes={n_axes:5d}  {mode:>8}: imports+open {total:7.1f} ms   open {opened:7.2f} ms")
+
+if __name__ == "__main__":
+    main()
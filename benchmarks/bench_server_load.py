@@ -0,0 +1,71 @@
+# Load generator for TrainedMachineLearningModel.server: starts a local server process on a
+# synthetic registry, drives it with many concurrent keep-alive clients sending single samples,
+# and reports throughput and tail latency. Optionally republishes `latest` mid-run (hot reload).
+# Usage: python -m benchmarks.bench_server_load [--clients 64] [--requests 200] [--max-batch 256]
+#        [--max-wait-ms 2] [--reload]
+
+import argparse, asyncio, json, subprocess, sys, tempfile, time
+import numpy as np
+from benchmarks.common import build_registry
+
+async def _client(host, port, ts, Y, lat, errors, versions):
+    reader, writer = await asyncio.open_connection(host, port)
+    for t, y in zip(ts, Y):
+        body = json.dumps({"ts": float(t), "values": y.tolist()}).encode() + b"\n"
+        t0 = time.perf_counter()
+        writer.write(b"POST /score HTTP/1.1\r\nHost: x\r\nContent-Type: application/x-ndjson\r\n"
+                     b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+        await writer.drain()
+        status = await reader.readline()
+        length = 0
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        payload = json.loads(await reader.readexactly(length))
+        lat.append(time.perf_counter() - t0)
+        if b" 200 " not in status or "error" in payload:
+            errors.append(payload)
+        versions.add(payload.get("version"))
+    writer.close()
+
+async def _drive(port, ts, Y, clients, per_client, reload_fn):
+    lat, errors, versions = [], [], set()
+    chunks = [(ts[i * per_client:(i + 1) * per_client], Y[i * per_client:(i + 1) * per_client])
+              for i in range(clients)]
+    t0 = time.perf_counter()
+    tasks = [asyncio.create_task(_client("127.0.0.1", port, t, y, lat, errors, versions)) for t, y in chunks]
+    if reload_fn:
+        await asyncio.sleep(0.5); await asyncio.to_thread(reload_fn)
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - t0, np.asarray(lat), errors, versions
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--clients", type=int, default=64)
+    p.add_argument("--requests", type=int, default=200, help="requests per client")
+    p.add_argument("--max-batch", type=int, default=256)
+    p.add_argument("--max-wait-ms", type=float, default=2.0)
+    p.add_argument("--port", type=int, default=18765)
+    p.add_argument("--reload", action="store_true", help="republish `latest` during the run")
+    a = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ts, Y = build_registry(tmp, 50_000, 8)
+        srv = subprocess.Popen([sys.executable, "-m", "TrainedMachineLearningModel.server", "--root", tmp,
+                                "--port", str(a.port), "--max-batch", str(a.max_batch),
+                                "--max-wait-ms", str(a.max_wait_ms)], stdout=subprocess.PIPE, text=True)
+        try:
+            srv.stdout.readline()  # "Serving ..." once the port is bound
+            reload_fn = (lambda: build_registry(tmp, 50_000, 8, version_tag="bench2", seed=1)) if a.reload else None
+            wall, lat, errors, versions = asyncio.run(
+                _drive(a.port, ts, Y, a.clients, a.requests, reload_fn))
+        finally:
+            srv.terminate(); srv.wait()
+
+    p50, p99, p999 = np.percentile(lat, [50, 99, 99.9]) * 1e3
+    print(f"clients={a.clients} requests={len(lat)} max_batch={a.max_batch} max_wait={a.max_wait_ms}ms")
+    print(f"  throughput {len(lat) / wall:,.0f} req/s   latency p50={p50:.2f}ms p99={p99:.2f}ms p99.9={p999:.2f}ms")
+    print(f"  errors={len(errors)}  versions served={sorted(v for v in versions if v)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Threshold-policy grid search on synthetic residuals: ThresholdSweep (shared sorted residuals and
+# run-length structures, one pass per axis) vs one ThresholdCalibrator fit + holdout backtest per policy
+# (what a loop of run_all calls does after extraction). The per-policy loop is timed on a sample and
+# extrapolated; the sampled policies are checked for identical thresholds and event counts.
+# Usage: python -m benchmarks.bench_threshold_sweep [--rows 1000000] [--holdout 250000] [--axes 8] [--jobs 4]
+
+import argparse, tempfile, time
+import numpy as np, pandas as pd
+from Thresholding.calibrator import ThresholdCalibrator
+from Thresholding.sweep import ThresholdSweep
+
+GRID = dict(minc_percentile=[60, 65, 70, 75, 80, 85, 90], maxc_percentile=[95, 96, 97, 98, 99],
+            trim_top_ratio=[0.0, 0.01, 0.02, 0.05], alert_quantile=[0.5, 0.7, 0.8, 0.9, 0.95],
+            error_quantile=[0.5, 0.7, 0.9], alert_seconds_default=[3.0, 5.0])  # 4200 policies
+
+def _residuals(rng, n: int, k: int) -> np.ndarray:
+    """AR(1) residuals so exceedances come in runs."""
+    return pd.DataFrame(rng.normal(size=(n, k))).ewm(alpha=0.4, adjust=False).mean().to_numpy()
+
+def _backtest(res: np.ndarray, level: float, steps: int) -> tuple:
+    """Events and rows past the dwell for one policy (per-policy baseline)."""
+    runs = ThresholdCalibrator._run_lengths(res >= level)
+    fired = runs[runs >= steps]
+    return len(fired), int((fired - steps + 1).sum())
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--holdout", type=int, default=250_000)
+    p.add_argument("--axes", type=int, default=8)
+    p.add_argument("--jobs", type=int, default=4)
+    p.add_argument("--sample", type=int, default=20, help="policies timed in the per-policy baseline")
+    a = p.parse_args()
+
+    rng = np.random.default_rng(0)
+    axes = [f"axis{i}" for i in range(1, a.axes + 1)]
+    train, hold = _residuals(rng, a.rows, a.axes), _residuals(rng, a.holdout, a.axes)
+    dt = 1.891
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for jobs in (1, a.jobs):
+            sw = ThresholdSweep(tmp, {"n_jobs": jobs, "executor": "thread"})
+            t0 = time.perf_counter()
+            res = sw.run(train, hold, axes, dt, GRID)
+            n_pol = res["policy"].nunique()
+            print(f"sweep x{jobs:<2}: {n_pol} policies x {a.axes} axes in {time.perf_counter() - t0:6.2f}s")
+
+        pol = sw.policies(GRID)
+        sample = rng.choice(len(pol), min(a.sample, len(pol)), replace=False)
+        t0, same = time.perf_counter(), True
+        for i in sample:
+            cal = ThresholdCalibrator(tmp, pol.loc[i].to_dict())
+            cal.fit_residuals(train, axes, dt)
+            got = res[res["policy"] == i].set_index("axis")
+            for j, k in enumerate(axes):
+                th, row = cal.th[k], got.loc[k]
+                same &= (th["MinC"], th["MaxC"], th["T_long_steps"], th["T_short_steps"]) == \
+                        (row["MinC"], row["MaxC"], row["T_long_steps"], row["T_short_steps"])
+                same &= _backtest(hold[:, j], th["MinC"], th["T_long_steps"]) == (row["alerts"], row["alert_rows"])
+                same &= _backtest(hold[:, j], th["MaxC"], th["T_short_steps"]) == (row["errors"], row["error_rows"])
+        per = (time.perf_counter() - t0) / len(sample)
+        print(f"per-policy: {per:6.3f}s each → {per * n_pol:8.1f}s for the grid (extrapolated from {len(sample)})")
+        print(f"rows={a.rows} holdout={a.holdout}  sampled policies identical: {same}")
+
+if __name__ == "__main__":
+    main()
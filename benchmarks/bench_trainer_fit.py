@@ -0,0 +1,43 @@
+# Per-axis sklearn LinearRegression loop (previous trainer) vs the vectorized closed-form fit.
+# Usage: python -m benchmarks.bench_trainer_fit [--rows 200000] [--axes 8 64 256 512]
+
+import argparse, tempfile, time
+import numpy as np, pandas as pd
+from sklearn.linear_model import LinearRegression
+from ModelTraining.trainer import LinearAxisTrainer
+
+def _sklearn_loop(train_df: pd.DataFrame, axes: list[str]) -> dict:
+    X_full = train_df[["time_s"]].values
+    models = {}
+    for k in axes:
+        y = train_df[k].values
+        mask = np.isfinite(y) & (y != 0)
+        lr = LinearRegression().fit(X_full[mask], y[mask])
+        models[k] = {"coef": float(lr.coef_[0]), "intercept": float(lr.intercept_)}
+    return models
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=200_000)
+    p.add_argument("--axes", type=int, nargs="+", default=[8, 64, 256, 512])
+    a = p.parse_args()
+
+    rng = np.random.default_rng(0)
+    t = np.cumsum(rng.uniform(1.5, 2.3, a.rows)) + 1.7e9  # epoch-sized magnitudes
+    with tempfile.TemporaryDirectory() as tmp:
+        trainer = LinearAxisTrainer(out_dir=tmp)
+        for n_axes in a.axes:
+            axes = [f"axis{i}" for i in range(1, n_axes + 1)]
+            Y = 0.01 * (t[:, None] - t[0]) * rng.normal(size=n_axes) + rng.normal(0, 2, (a.rows, n_axes))
+            Y[rng.random(Y.shape) < 0.01] = 0.0
+            df = pd.DataFrame(Y, columns=axes); df.insert(0, "time_s", t)
+
+            t0 = time.perf_counter(); ref = _sklearn_loop(df, axes); w0 = time.perf_counter() - t0
+            t0 = time.perf_counter(); trainer.fit(df, axes); w1 = time.perf_counter() - t0
+            err = max(abs(ref[k][f] - trainer.models[k][f]) / max(1.0, abs(ref[k][f]))
+                      for k in axes for f in ("coef", "intercept"))
+            print(f"axes={n_axes:4d}  sklearn loop {w0:7.3f}s  vectorized {w1:7.3f}s  "
+                  f"speedup x{w0 / w1:5.1f}  max rel diff {err:.1e}")
+
+if __name__ == "__main__":
+    main()
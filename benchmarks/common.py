@@ -0,0 +1,77 @@
+# Shared helpers for the benchmark scripts: synthetic SQLite tables and peak-RSS probes.
+# Run benchmarks from the project root, e.g. `python -m benchmarks.bench_extract_stream`.
+
+import json, os, sqlite3, subprocess, sys
+import numpy as np
+
+def make_sqlite(path: str, n_ts: int, n_axes: int = 8, schema: str = "long",
+                table: str = "stream_samples", seed: int = 0) -> float:
+    """Create a synthetic table (LONG: ts, axis_id, value | WIDE: ts, axis1..N). Returns the last ts."""
+    rng = np.random.default_rng(seed)
+    ts = np.cumsum(rng.uniform(1.5, 2.3, n_ts))
+    con = sqlite3.connect(path)
+    con.execute(f"DROP TABLE IF EXISTS {table}")
+    if schema == "long":
+        con.execute(f"CREATE TABLE {table} (ts REAL, axis_id INTEGER, value REAL)")
+    else:
+        cols = ", ".join(f"axis{a} REAL" for a in range(1, n_axes + 1))
+        con.execute(f"CREATE TABLE {table} (ts REAL, {cols})")
+    block = 200_000
+    for i in range(0, n_ts, block):
+        t = ts[i:i + block]
+        y = np.stack([0.001 * a * t + 10 * a + rng.normal(0, 2, len(t)) for a in range(1, n_axes + 1)], axis=1)
+        y[rng.random(y.shape) < 0.01] = 0.0
+        if schema == "long":
+            rows = ((float(t[j]), a + 1, float(y[j, a])) for j in range(len(t)) for a in range(n_axes))
+            con.executemany(f"INSERT INTO {table} VALUES (?,?,?)", rows)
+        else:
+            marks = ",".join("?" * (n_axes + 1))
+            con.executemany(f"INSERT INTO {table} VALUES ({marks})",
+                            (tuple([float(t[j]), *y[j].tolist()]) for j in range(len(t))))
+    con.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_ts ON {table}(ts)")
+    con.commit(); con.close()
+    return float(ts[-1])
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    try:
+        import resource
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return kb / 1024 / (1024 if sys.platform == "darwin" else 1)
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 2**20
+
+def run_isolated(module: str, *args: str) -> dict:
+    """Run `python -m module args...` in a fresh process (clean RSS) and parse its last JSON line."""
+    out = subprocess.run([sys.executable, "-m", module, *args], check=True,
+                         capture_output=True, text=True, env=dict(os.environ))
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def build_registry(root: str, n_rows: int = 200_000, n_axes: int = 8, version_tag: str = "bench",
+                   seed: int = 0):
+    """Train on a synthetic window and publish it to a registry under `root` (also `latest`).
+    Returns (ts, Y) of the synthetic window, usable as a recorded replay."""
+    import pandas as pd
+    from ModelTraining.trainer import LinearAxisTrainer
+    from Thresholding.calibrator import ThresholdCalibrator
+    from ModelRegistry.registry import ModelRegistry
+
+    rng = np.random.default_rng(seed)
+    axes = [f"axis{a}" for a in range(1, n_axes + 1)]
+    ts = np.cumsum(rng.uniform(1.5, 2.3, n_rows))
+    Y = 0.001 * np.arange(1, n_axes + 1) * ts[:, None] + 10 + rng.normal(0, 2, (n_rows, n_axes))
+    df = pd.DataFrame(Y, columns=axes); df.insert(0, "time_s", ts - ts[0])
+
+    work = os.path.join(root, "_work"); os.makedirs(work, exist_ok=True)
+    with open(os.path.join(work, "prep_stats.json"), "w") as f:
+        json.dump({"time0": float(ts[0])}, f)
+    trainer = LinearAxisTrainer(out_dir=work); trainer.fit(df, axes)
+    cal = ThresholdCalibrator(out_dir=work, policy={"minc_percentile": 75, "maxc_percentile": 95,
+                                                    "trim_top_ratio": 0.02})
+    cal.fit(trainer.predict(df), axes, dt_seconds=float(np.median(np.diff(ts))))
+    metrics = pd.DataFrame({"axis": axes})
+    ModelRegistry(root).save(version_tag, os.path.join(work, "models.pkl"),
+                             os.path.join(work, "prep_stats.json"), os.path.join(work, "thresholds.json"),
+                             metrics, {"model": "linear"}, stats_path=os.path.join(work, "axis_stats.json"))
+    return ts, Y
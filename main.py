@@ -1,21 +1,58 @@
 # main.py — entry point with a tiny CLI
-import argparse
-from Orchestration.orchestrator import Orchestrator
+#   python main.py [run] [--config ...]   → pipeline (single run, or batch for `jobs:` / --jobs)
+#   python main.py sweep [--config ...]   → threshold-policy sweep on the holdout window
+#   python main.py score FILE [...]       → score a CSV / Parquet file against a registry version
+# Each command imports only what it uses; `score` loads NumPy and the registry, nothing else.
+import argparse, os, sys, time
+from Orchestration.stage_cache import STAGES
+
+COMMANDS = ("run", "sweep", "score")
 
 #CLI
-def parse_args():
+def parse_args(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv.insert(0, "run")  # bare flags keep meaning `run`
     p = argparse.ArgumentParser()
-    p.add_argument("--config", default="config.yaml", help="Path to config YAML")
-    return p.parse_args()
+    sub = p.add_subparsers(dest="command", required=True)
 
-if __name__ == "__main__":
-    args = parse_args()
-    orch = Orchestrator(args.config)
-    res = orch.run_all()
+    run = sub.add_parser("run", help="Run the pipeline (default command)")
+    run.add_argument("--config", default="config.yaml", help="Path to config YAML (a `jobs:` list runs batch mode)")
+    run.add_argument("--force", action="store_true", help="Re-run every stage (ignore cached stage results)")
+    run.add_argument("--from-stage", choices=STAGES, help="Re-run this stage and all later ones")
+    run.add_argument("--profile", action="store_true",
+                     help="Capture cProfile hotspots and tracemalloc peaks per stage (slower; see profile.json)")
+    run.add_argument("--jobs", metavar="GLOB", help="Batch mode: one job per config file matching GLOB")
+    run.add_argument("--workers", type=int, help="Batch mode: max worker processes (default: batch.max_workers or CPU count)")
+
+    sweep = sub.add_parser("sweep", help="Calibrate + backtest the `sweep.grid` threshold policies (no registry)")
+    sweep.add_argument("--config", default="config.yaml", help="Path to config YAML")
+
+    from TrainedMachineLearningModel.score import add_arguments
+    add_arguments(sub.add_parser("score", help="Score a CSV / Parquet file with a registry version (NumPy only)"))
+    return p.parse_args(argv)
+
+def run_single(cfg: dict, args) -> None:
+    from Orchestration.orchestrator import Orchestrator
+    orch = Orchestrator(cfg)
+    res = orch.run_all(force=args.force, from_stage=args.from_stage, profile=args.profile)
 
     # Summary
     print("Artifacts:", res.artifact_dir)
     print(f"Raw: {res.raw_shape[0]}x{res.raw_shape[1]}  |  Train: {res.train_shape[0]}x{res.train_shape[1]}")
+    print("Stages:", "  ".join(f"{k}={v}" for k, v in res.stages.items()))
+
+    # Profile (one line per stage)
+    print("\nProfile:")
+    for s in res.profile["stages"]:
+        rows = f"{s['rows_in'] if s['rows_in'] is not None else '-'}→{s['rows_out'] if s['rows_out'] is not None else '-'}"
+        line = (f"  {s['stage']:<9} {s['status']:<6} wall={s['wall_s']:7.2f}s  cpu={s['cpu_s']:7.2f}s  "
+                f"rss+{s['rss_peak_delta_mb']:7.1f} MiB  rows {rows}")
+        if s["db_rows"]:
+            line += f"  db {s['db_rows']} rows / {s['db_bytes'] / 2**20:.1f} MiB"
+        if s["py_peak_mb"] is not None:
+            line += f"  py-peak {s['py_peak_mb']:.1f} MiB  top: {s['hotspots'][0]['function'] if s['hotspots'] else '-'}"
+        print(line)
 
     # Metrics (one line per axis)
     print("\nMetrics:")
@@ -27,4 +64,56 @@ if __name__ == "__main__":
     for i, (axis, v) in enumerate(sorted(res.thresholds.items())):
         if i >= 8: break
         print(f"  {axis}: MinC={v['MinC']:.3f}  MaxC={v['MaxC']:.3f}  "
-              f"T_long={v['T_long_steps']} steps  T_short={v['T_short_steps']} steps")
\ No newline at end of file
+              f"T_long={v['T_long_steps']} steps  T_short={v['T_short_steps']} steps")
+
+def run_sweep(cfg: dict) -> None:
+    from Orchestration.orchestrator import Orchestrator
+    from Thresholding.sweep import ThresholdSweep
+    t0 = time.perf_counter()
+    res = Orchestrator(cfg).sweep()
+    summary = ThresholdSweep.summary(res)
+
+    # Per-policy totals over axes (first 10 by fewest holdout events)
+    print(f"Sweep: {len(summary)} policies x {res['axis'].nunique()} axes in {time.perf_counter() - t0:.1f}s"
+          f"  → {os.path.join(cfg.get('work_dir', 'out'), 'sweep', 'sweep.csv')}")
+    print(summary.sort_values(["errors", "alerts", "policy"]).head(10).to_string(index=False))
+
+def run_jobs(jobs: list, workers, args) -> int:
+    from Orchestration.batch import run_batch
+    results = run_batch(jobs, max_workers=workers, force=args.force, from_stage=args.from_stage,
+                        profile=args.profile)
+
+    # Consolidated summary (one line per job)
+    failed = [r for r in results if not r.ok]
+    print(f"Batch: {len(results)} jobs, {len(results) - len(failed)} ok, {len(failed)} failed  "
+          f"|  {sum(r.seconds for r in results):.1f}s job time")
+    width = max(len(r.name) for r in results)
+    for r in results:
+        if r.ok:
+            r2 = list(r.r2.values())
+            print(f"  {r.name:<{width}}  ok      {r.seconds:7.1f}s  Train: {r.train_shape[0]}x{r.train_shape[1]}  "
+                  f"R2 mean={sum(r2) / len(r2):.3f} min={min(r2):.3f}  peak RSS {r.peak_rss_mb:.0f} MiB  → {r.artifact_dir}")
+        else:
+            print(f"  {r.name:<{width}}  FAILED  {r.seconds:7.1f}s  {r.error}")
+    return 1 if failed else 0
+
+def run_command(args) -> int:
+    if args.command == "score":
+        from TrainedMachineLearningModel.score import run
+        return run(args)
+    from Orchestration.orchestrator import load_config
+    from Orchestration.batch import expand_jobs, glob_jobs
+    if args.command == "sweep":
+        run_sweep(load_config(args.config))
+        return 0
+    if args.jobs:
+        return run_jobs(glob_jobs(args.jobs), args.workers, args)
+    cfg = load_config(args.config)
+    if cfg.get("jobs"):
+        workers = args.workers or (cfg.get("batch") or {}).get("max_workers")
+        return run_jobs(expand_jobs(cfg), workers, args)
+    run_single(cfg, args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(run_command(parse_args()))
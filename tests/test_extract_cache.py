@@ -0,0 +1,35 @@
+# Concurrent runs sharing one ExtractionCache dir must not lose each other's index entries.
+import json, os, sqlite3
+import multiprocessing as mp
+import numpy as np
+
+from DataExtractionAnalysis.cache import ExtractionCache
+from DataExtractionAnalysis.extractor import DBExtractor, DBConfig
+
+WINDOWS = 8
+
+def _worker(args):
+    url, cache_dir, w = args
+    os.environ["TEST_DB_URL"] = url
+    cache = ExtractionCache(DBExtractor(DBConfig(url_env="TEST_DB_URL")), cache_dir)
+    for _ in range(3):  # repeated loads also rewrite the index (last_used)
+        df = cache.load_window("wide_samples", "ts", ["axis1"], float(w * 100), float(w * 100 + 100),
+                               pushdown=False)
+    return len(df)
+
+def test_concurrent_loads_keep_every_entry(tmp_path):
+    path = tmp_path / "db.sqlite"
+    con = sqlite3.connect(path)
+    con.execute("CREATE TABLE wide_samples (ts REAL, axis1 REAL)")
+    t = np.arange(0.0, WINDOWS * 100.0, 0.5)
+    con.executemany("INSERT INTO wide_samples VALUES (?,?)", [(float(x), float(x) + 1.0) for x in t])
+    con.commit(); con.close()
+    cache_dir = str(tmp_path / "cache")
+    jobs = [(f"sqlite:///{path}", cache_dir, w) for w in range(WINDOWS)]
+    with mp.get_context("spawn").Pool(4) as pool:
+        rows = pool.map(_worker, jobs)
+    assert rows == [200] * WINDOWS
+    with open(tmp_path / "cache" / "index.json") as f:
+        index = json.load(f)
+    assert len(index) == WINDOWS
+    assert sorted(e["start"] for e in index.values()) == [w * 100.0 for w in range(WINDOWS)]
@@ -0,0 +1,88 @@
+# SQL pushdown (resampling, zero filtering, LONG pivot in the query) must return the same frame as the pandas path.
+import sqlite3
+import numpy as np, pandas as pd
+import pytest
+
+from DataExtractionAnalysis.extractor import DBExtractor, DBConfig
+
+AXES_LONG, AXES_WIDE = [1, 2, 3], ["axis1", "axis2", "axis3"]
+
+@pytest.fixture
+def extractor(tmp_path, monkeypatch):
+    """SQLite DB with TIMESTAMP columns; samples every 1-3 s, many exactly on bucket edges."""
+    rng = np.random.default_rng(0)
+    t = pd.Timestamp("2024-03-01") + pd.to_timedelta(np.cumsum(rng.integers(1, 4, 2000)), unit="s")
+    ts = t.strftime("%Y-%m-%d %H:%M:%S")
+    Y = rng.normal(size=(len(ts), 3))
+    Y[rng.random(Y.shape) < 0.05] = 0.0
+    path = tmp_path / "ts.sqlite"
+    con = sqlite3.connect(path)
+    con.execute("CREATE TABLE long_samples (ts TIMESTAMP, axis_id INTEGER, value REAL)")
+    con.executemany("INSERT INTO long_samples VALUES (?,?,?)",
+                    [(s, a + 1, float(Y[i, a])) for i, s in enumerate(ts) for a in range(3)])
+    con.execute("CREATE TABLE wide_samples (ts TIMESTAMP, axis1 REAL, axis2 REAL, axis3 REAL)")
+    con.executemany("INSERT INTO wide_samples VALUES (?,?,?,?)",
+                    [(s, *map(float, Y[i])) for i, s in enumerate(ts)])
+    con.commit(); con.close()
+    monkeypatch.setenv("TEST_DB_URL", f"sqlite:///{path}")
+    return DBExtractor(DBConfig(url_env="TEST_DB_URL"))
+
+@pytest.mark.parametrize("step", [7, 10, 60])
+@pytest.mark.parametrize("layout", ["long", "wide"])
+@pytest.mark.parametrize("drop_zeros", [False, True])
+def test_timestamp_resample_matches_pandas(extractor, step, layout, drop_zeros):
+    kw = dict(resample_seconds=step, agg="mean", drop_zeros=drop_zeros)
+    if layout == "long":
+        args = ("long_samples", "ts", AXES_LONG, "2024-03-01 00:00:00", "2024-03-01 02:00:00")
+        kw.update(axis_id_col="axis_id", value_col="value")
+    else:
+        args = ("wide_samples", "ts", AXES_WIDE, "2024-03-01 00:00:00", "2024-03-01 02:00:00")
+    sql = extractor.load_window(*args, pushdown=True, **kw)
+    pdf = extractor.load_window(*args, pushdown=False, **kw)
+    assert len(sql) > 0
+    pd.testing.assert_frame_equal(sql, pdf, check_dtype=False, check_names=False)
+
+@pytest.fixture
+def long_extractor(tmp_path, monkeypatch):
+    """LONG table (float ts) with an unconfigured axis id, timestamps holding only that id,
+    missing axes, NULLs and zeros; `dups` repeats some (ts, axis_id) pairs."""
+    rng = np.random.default_rng(1)
+    rows = []
+    for t in np.round(np.cumsum(rng.uniform(0.2, 1.5, 1500)), 3):
+        r = rng.random()
+        ids = [9] if r < 0.05 else [a for a in (1, 2, 3) if rng.random() > 0.1] + ([9] if r < 0.3 else [])
+        for a in ids:
+            v = 0.0 if rng.random() < 0.05 else None if rng.random() < 0.02 else float(rng.normal())
+            rows.append((float(t), a, v))
+    path = tmp_path / "long.sqlite"
+    con = sqlite3.connect(path)
+    for name, extra in (("long_samples", []), ("dups", rows[10:400:37])):
+        con.execute(f"CREATE TABLE {name} (ts REAL, axis_id INTEGER, value REAL)")
+        con.executemany(f"INSERT INTO {name} VALUES (?,?,?)", rows + extra)
+    con.commit(); con.close()
+    monkeypatch.setenv("TEST_DB_URL", f"sqlite:///{path}")
+    return DBExtractor(DBConfig(url_env="TEST_DB_URL"))
+
+@pytest.mark.parametrize("step", [None, 5])
+@pytest.mark.parametrize("missing", ["nan", "drop"])
+@pytest.mark.parametrize("drop_zeros", [False, True])
+def test_long_pushdown_matches_pivot(long_extractor, step, missing, drop_zeros):
+    kw = dict(axis_id_col="axis_id", value_col="value", missing=missing, resample_seconds=step,
+              drop_zeros=drop_zeros)
+    args = ("long_samples", "ts", AXES_LONG, 0.0, 1e9)
+    sql = long_extractor.load_window(*args, pushdown=True, **kw)
+    pdf = long_extractor.load_window(*args, pushdown=False, **kw)
+    assert len(sql) > 0
+    pd.testing.assert_frame_equal(sql, pdf, check_dtype=False)
+
+@pytest.mark.parametrize("step", [None, 5])
+def test_long_pushdown_duplicates(long_extractor, step):
+    kw = dict(axis_id_col="axis_id", value_col="value", resample_seconds=step)
+    args = ("dups", "ts", AXES_LONG, 0.0, 1e9)
+    for pushdown in (True, False):
+        with pytest.raises(ValueError, match="duplicate"):
+            long_extractor.load_window(*args, duplicates="raise", pushdown=pushdown, **kw)
+    # "first" / "last" depend on row order, which SQL cannot express: never pushed down
+    assert not long_extractor.can_push_down(True, step, "mean", duplicates="last")
+    out = long_extractor.load_window(*args, duplicates="last", **kw)
+    assert len(out) > 0
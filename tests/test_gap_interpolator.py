@@ -0,0 +1,47 @@
+# Chunked gap interpolation: same output as one whole-input pass, with a bounded carry.
+import numpy as np
+import pytest
+
+from DataPreparation.resample import GapInterpolator
+
+def stream(interp, t, Y, chunk):
+    """Push `chunk`-row slices; returns the concatenated output and the largest carry seen."""
+    ts, ys, carry = [], [], 0
+    for i in range(0, len(t), chunk):
+        a, b = interp.push(t[i:i + chunk], Y[i:i + chunk], final=i + chunk >= len(t))
+        ts.append(a); ys.append(b)
+        carry = max(carry, len(interp._t))
+    return np.concatenate(ts), np.concatenate(ys), carry
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(5)
+    t = np.cumsum(rng.uniform(0.5, 1.5, 5000))
+    Y = np.column_stack([np.sin(t / 50.0), np.cos(t / 70.0)])
+    Y[rng.random(Y.shape) < 0.2] = np.nan
+    Y[1000:4000, 0] = np.nan  # one long stretch in one axis
+    return t, Y
+
+@pytest.mark.parametrize("max_gap", [None, 5.0])
+@pytest.mark.parametrize("chunk", [1, 97, 1000])
+def test_chunked_matches_whole(data, max_gap, chunk):
+    t, Y = data
+    t1, Y1 = GapInterpolator(2, max_gap, max_carry_rows=None).push(t, Y.copy(), final=True)
+    t2, Y2, _ = stream(GapInterpolator(2, max_gap, max_carry_rows=None), t, Y, chunk)
+    np.testing.assert_array_equal(t1, t2)
+    np.testing.assert_allclose(Y1, Y2, rtol=1e-12, equal_nan=True)
+
+def test_carry_is_capped(data):
+    t, Y = data
+    _, _, unbounded = stream(GapInterpolator(2, None, max_carry_rows=None), t, Y, 100)
+    assert unbounded >= 2900  # without a cap the stretch holds back every later chunk
+
+    t2, Y2, carry = stream(GapInterpolator(2, None, max_carry_rows=500), t, Y, 100)
+    assert carry <= 500
+    np.testing.assert_array_equal(t2, t)
+    # Released rows of the stretch carry the last value before it forward, as at a trailing edge
+    p = np.flatnonzero(~np.isnan(Y[:1000, 0]))[-1]
+    np.testing.assert_array_equal(Y2[p + 1:3500, 0], Y[p, 0])
+    # The rows still pending when the stretch closes are interpolated as usual
+    assert np.isfinite(Y2[3500:4000, 0]).all()
+    assert np.all(np.diff(Y2[3500:4001, 0]) != 0)
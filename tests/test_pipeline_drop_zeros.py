@@ -0,0 +1,49 @@
+# End to end with data.drop_zeros: zeros become missing cells that every stage must skip per axis.
+import sqlite3
+from pathlib import Path
+import numpy as np, pandas as pd
+import pytest
+
+from Orchestration.orchestrator import Orchestrator, load_config
+
+@pytest.fixture
+def db_url(tmp_path, monkeypatch):
+    """SQLite DB with the same noisy linear signals as WIDE and LONG tables, ~10% exact zeros."""
+    rng = np.random.default_rng(3)
+    t = np.cumsum(rng.uniform(0.5, 1.5, 3000))
+    Y = np.column_stack([0.01 * (j + 1) * t + rng.normal(0.0, 1.0, t.size) for j in range(3)])
+    Y[rng.random(Y.shape) < 0.1] = 0.0
+    path = tmp_path / "samples.sqlite"
+    con = sqlite3.connect(path)
+    con.execute("CREATE TABLE wide_samples (ts REAL, axis1 REAL, axis2 REAL, axis3 REAL)")
+    con.executemany("INSERT INTO wide_samples VALUES (?,?,?,?)", [(float(s), *map(float, y)) for s, y in zip(t, Y)])
+    con.execute("CREATE TABLE long_samples (ts REAL, axis_id INTEGER, value REAL)")
+    con.executemany("INSERT INTO long_samples VALUES (?,?,?)",
+                    [(float(s), j + 1, float(y[j])) for s, y in zip(t, Y) for j in range(3)])
+    con.commit(); con.close()
+    monkeypatch.setenv("TEST_DB_URL", f"sqlite:///{path}")
+    return "TEST_DB_URL"
+
+def run(tmp_path, db_url, layout, pushdown):
+    cfg = load_config(Path(__file__).resolve().parents[1] / "config.yaml")
+    cfg.pop("jobs", None)
+    cfg["database"]["url_env"] = db_url
+    cfg["data"].update(table=f"{layout}_samples", axes=[1, 2, 3] if layout == "long" else ["axis1", "axis2", "axis3"],
+                       train_start=0.0, train_end=1e9, chunksize=None, drop_zeros=True, pushdown=pushdown)
+    name = f"{layout}-{pushdown}"
+    cfg["work_dir"] = str(tmp_path / name / "out")
+    cfg["plots"].update(dir=str(tmp_path / name / "out"), mode="eager", decimate_above=1000)
+    cfg["cache"] = {"dir": str(tmp_path / name / "cache")}
+    cfg["registry"].update(root_dir=str(tmp_path / name / "registry"))
+    return Orchestrator(cfg).run_all()
+
+@pytest.mark.parametrize("layout", ["wide", "long"])
+def test_drop_zeros_pipeline(tmp_path, db_url, layout):
+    pushed = run(tmp_path, db_url, layout, pushdown=True)
+    local = run(tmp_path, db_url, layout, pushdown=False)
+    for res in (pushed, local):
+        m = res.metrics
+        assert len(m) == 3 and np.isfinite(m[["r2", "mae", "rmse"]].to_numpy()).all()
+        assert (m["r2"] > 0.9).all()
+        assert all(np.isfinite(th["MinC"]) and th["MaxC"] >= th["MinC"] for th in res.thresholds.values())
+    pd.testing.assert_frame_equal(pushed.metrics, local.metrics)
@@ -0,0 +1,37 @@
+# Every layer that resamples (SQL pushdown, DBExtractor.resample_frame, Preprocessor) must put a
+# sample in the same bucket, including samples on bucket edges that t / step misses by one ulp.
+import sqlite3
+import numpy as np, pandas as pd
+import pytest
+
+from DataExtractionAnalysis.extractor import DBExtractor, DBConfig, epoch_seconds, resample_frame
+from DataPreparation.resample import PrepPipeline, grid_buckets
+
+STEP = 0.1
+EDGES = np.array([0.3, 0.6, 0.7, 1.2, 1.4, 1.9])  # k * STEP, but t / STEP rounds just below k
+
+def test_edges_land_in_their_own_bucket():
+    assert (np.floor(EDGES / STEP) < np.round(EDGES / STEP)).all()  # the case being guarded
+    np.testing.assert_array_equal(grid_buckets(EDGES, STEP), np.round(EDGES / STEP))
+
+@pytest.fixture
+def extractor(tmp_path, monkeypatch):
+    path = tmp_path / "edges.sqlite"
+    con = sqlite3.connect(path)
+    con.execute("CREATE TABLE wide_samples (ts REAL, axis1 REAL)")
+    con.executemany("INSERT INTO wide_samples VALUES (?,?)", [(float(t), float(i + 1)) for i, t in enumerate(EDGES)])
+    con.commit(); con.close()
+    monkeypatch.setenv("TEST_DB_URL", f"sqlite:///{path}")
+    return DBExtractor(DBConfig(url_env="TEST_DB_URL"))
+
+def test_layers_agree_on_edges(extractor):
+    args = ("wide_samples", "ts", ["axis1"], 0.0, 10.0)
+    sql = extractor.load_window(*args, resample_seconds=STEP, pushdown=True)
+    pdf = extractor.load_window(*args, resample_seconds=STEP, pushdown=False)
+    frame = resample_frame(pd.DataFrame({"ts": EDGES, "axis1": np.arange(1.0, 7.0)}), "ts", STEP)
+    t, Y = PrepPipeline(1, STEP).run(EDGES, np.arange(1.0, 7.0)[:, None])
+    pd.testing.assert_frame_equal(sql, pdf, check_dtype=False)
+    assert len(sql) == len(EDGES)  # one sample per bucket, none shifted into its neighbour
+    for ts, v in ((frame["ts"], frame["axis1"]), (t, Y[:, 0])):
+        np.testing.assert_allclose(epoch_seconds(sql["ts"]), ts, atol=1e-6)  # WIDE reads parse ts as datetime
+        np.testing.assert_array_equal(sql["axis1"], v)
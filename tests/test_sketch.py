@@ -0,0 +1,60 @@
+# KLLSketch and ThresholdCalibrator.fit_stream stay within sketch_rank_error of the exact quantiles.
+import numpy as np
+import pandas as pd
+import pytest
+
+from Thresholding.calibrator import ThresholdCalibrator
+from Thresholding.sketch import KLLSketch
+
+Q = np.array([0.01, 0.1, 0.25, 0.5, 0.8, 0.9, 0.99, 0.999])
+
+def rank_error(sorted_x, est, q):
+    """Distance in normalized rank between the estimates and the requested quantiles."""
+    lo = np.searchsorted(sorted_x, est, side="left") / sorted_x.size
+    hi = np.searchsorted(sorted_x, est, side="right") / sorted_x.size
+    return np.maximum(np.maximum(lo - q, q - hi), 0.0)
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(2)
+    return np.concatenate([rng.normal(0.0, 1.0, 150_000), rng.lognormal(1.0, 1.5, 50_000)])
+
+@pytest.mark.parametrize("eps", [0.01, 0.005])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_quantiles_within_rank_error(values, eps, seed):
+    x = np.random.default_rng(seed).permutation(values)
+    sk = KLLSketch(eps, seed=seed)
+    for i in range(0, x.size, 7_919):
+        sk.update(x[i:i + 7_919])
+    assert sk.values() is None  # compacted: this is the approximate path
+    assert rank_error(np.sort(x), sk.quantile(Q), Q).max() <= eps
+
+def test_merged_shards_within_rank_error(values):
+    shards = np.array_split(values, 5)
+    sketches = [KLLSketch(0.005, seed=i) for i in range(5)]
+    for sk, s in zip(sketches, shards):
+        sk.update(s)
+    merged = sketches[3].merge(sketches[0]).merge(sketches[4]).merge(sketches[1]).merge(sketches[2])
+    assert merged.n == values.size
+    assert rank_error(np.sort(values), merged.quantile(Q), Q).max() <= 0.005
+
+def test_small_input_is_exact(values):
+    sk = KLLSketch(0.005)
+    sk.update(values[:500])
+    np.testing.assert_array_equal(sk.quantile(Q), np.quantile(values[:500], Q))
+
+def test_fit_stream_matches_exact_fit(tmp_path):
+    rng = np.random.default_rng(4)
+    res = np.column_stack([rng.normal(0.0, 1.0, 300_000), rng.standard_t(3, 300_000)])
+    axes, policy = ["axis1", "axis2"], {"trim_top_ratio": 0.02}
+    exact = ThresholdCalibrator(tmp_path / "exact", policy)
+    exact.fit_residuals(res, axes, dt_seconds=1.0)
+    stream = ThresholdCalibrator(tmp_path / "stream", policy)
+    df = pd.DataFrame(res, columns=[f"{k}_res" for k in axes])
+    stream.fit_stream(lambda: (df.iloc[i:i + 40_000] for i in range(0, len(df), 40_000)), axes, dt_seconds=1.0)
+    for j, k in enumerate(axes):
+        # MinC/MaxC sit within sketch_rank_error (in rank among the positive residuals) of the exact ones
+        pos = np.sort(res[res[:, j] > 0, j])
+        exact_q = np.searchsorted(pos, [exact.th[k]["MinC"], exact.th[k]["MaxC"]]) / pos.size
+        est = np.array([stream.th[k]["MinC"], stream.th[k]["MaxC"]])
+        assert rank_error(pos, est, exact_q).max() <= stream.sketch_rank_error
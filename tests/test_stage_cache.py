@@ -0,0 +1,42 @@
+# StageCache stays within max_bytes, evicting least-recently-used entries of earlier runs.
+import os
+import numpy as np
+
+from Orchestration.stage_cache import StageCache
+
+def entries(root):
+    return sorted(p.name for s in root.iterdir() if s.is_dir() for p in s.iterdir() if not p.name.startswith("."))
+
+def test_lru_eviction(tmp_path):
+    root = tmp_path / "stages"
+    payload = lambda i: (lambda: np.full(1 << 14, i, dtype=np.float64))  # ~128 KiB pickled
+    fps = []
+    for i in range(3):  # three runs with different configs
+        cache = StageCache(str(root), max_bytes=300 * 1024)
+        out, _ = cache.run("extract", {"run": i}, [], payload(i))
+        fps.append(StageCache.fingerprint("extract", {"run": i}, []))
+        if i == 1:
+            # Reuse run 0's entry: it becomes the most recently used one
+            hit, _ = cache.run("extract", {"run": 0}, [], payload(-1))
+            assert cache.status["extract"] == "cached" and hit[0] == 0
+    # 3 x 128 KiB > 300 KiB: the least recently used entry (run 1) went, run 0 survived its reuse
+    assert entries(root) == sorted([fps[0], fps[2]])
+
+def test_current_run_is_never_evicted(tmp_path):
+    root = tmp_path / "stages"
+    cache = StageCache(str(root), max_bytes=1)
+    cache.run("extract", {}, [], lambda: np.zeros(1 << 14))
+    cache.run("prepare", {}, ["x"], lambda: np.ones(1 << 14))
+    assert len(entries(root)) == 2
+    later = StageCache(str(root), max_bytes=1)
+    later.run("train", {}, [], lambda: 1)
+    assert entries(root) == [StageCache.fingerprint("train", {}, [])]
+
+def test_unbounded_and_disabled(tmp_path):
+    root = tmp_path / "stages"
+    for i in range(3):
+        StageCache(str(root), max_bytes=None).run("extract", {"run": i}, [], lambda: np.zeros(1 << 14))
+    assert len(entries(root)) == 3
+    off = StageCache(str(tmp_path / "off"), enabled=False)
+    assert off.run("extract", {}, [], lambda: 7) == (7, "")
+    assert not os.path.exists(tmp_path / "off")
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ModelTraining import trainer as trainer_mod
+from ModelTraining.trainer import AxisStats, LinearAxisTrainer
+
+AXES = ["axis1", "axis2", "axis3"]
+
+
+@pytest.fixture
+def frame():
+    """Epoch-sized time_s (the cancellation-prone case) with exact zeros and NaNs in every axis."""
+    rng = np.random.default_rng(7)
+    n = 6000
+    t = 1.7e9 + np.cumsum(rng.uniform(0.5, 2.0, n))
+    df = pd.DataFrame({"time_s": t})
+    for j, k in enumerate(AXES):
+        y = (j + 1) * 1e-3 * (t - t[0]) + 10.0 * j + rng.normal(0.0, 0.5, n)
+        y[rng.random(n) < 0.05] = 0.0
+        y[rng.random(n) < 0.03] = np.nan
+        df[k] = y
+    return df
+
+
+def reference(df):
+    """np.polyfit on each axis' finite, non-zero rows."""
+    out = {}
+    for k in AXES:
+        keep = np.isfinite(df[k]) & (df[k] != 0)
+        out[k] = np.polyfit(df.loc[keep, "time_s"], df.loc[keep, k], 1)
+    return out
+
+
+def assert_models_close(models, expected):
+    for k in AXES:
+        np.testing.assert_allclose(models[k]["coef"], expected[k]["coef"], rtol=1e-9)
+        np.testing.assert_allclose(models[k]["intercept"], expected[k]["intercept"], rtol=1e-9, atol=1e-6)
+
+
+def test_fit_matches_polyfit(frame, tmp_path, monkeypatch):
+    monkeypatch.setattr(trainer_mod, "FIT_BLOCK_ROWS", 1000)  # exercise the block merge too
+    tr = LinearAxisTrainer(tmp_path)
+    tr.fit(frame, AXES)
+    ref = reference(frame)
+    assert_models_close(tr.models, {k: {"coef": a, "intercept": b} for k, (a, b) in ref.items()})
+
+
+def test_sequential_partial_fit_matches_fit(frame, tmp_path):
+    full = LinearAxisTrainer(tmp_path / "full")
+    full.fit(frame, AXES)
+
+    inc = LinearAxisTrainer(tmp_path / "inc")
+    bounds = [0, 1500, 3100, 4000, len(frame)]
+    inc.fit(frame.iloc[bounds[0]:bounds[1]], AXES)
+    for lo, hi in zip(bounds[1:-1], bounds[2:]):
+        inc = LinearAxisTrainer(tmp_path / "inc")  # fresh process: statistics come from axis_stats.json
+        inc.partial_fit(frame.iloc[lo:hi], AXES)
+
+    assert_models_close(inc.models, full.models)
+    np.testing.assert_array_equal(inc.stats.n, full.stats.n)
+
+
+def test_shuffled_shard_merge_matches_fit(frame, tmp_path):
+    full = LinearAxisTrainer(tmp_path)
+    full.fit(frame, AXES)
+
+    rng = np.random.default_rng(11)
+    shards = np.array_split(rng.permutation(len(frame)), 3)
+    stats = [AxisStats.from_frame(frame.iloc[np.sort(s)], AXES) for s in shards]
+    merged = stats[2].merge(stats[0]).merge(stats[1])
+    coef, intercept = merged.solve()
+
+    assert_models_close({k: {"coef": a, "intercept": b} for k, a, b in zip(AXES, coef, intercept)},
+                        full.models)
+    np.testing.assert_array_equal(merged.n, full.stats.n)